@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from typing import List
+from app.api.deps import get_async_db
+from app.models.plan import Plan, PlanParticipant
+from app.schemas.plan import PlanCreate, PlanRead
+from app.schemas.reco import VenueReco
+from app.services.agent_service import create_booking_for_plan
+from app.services.reco_serving import recommend_venues_for_group_async
+
+router = APIRouter()
+
+@router.post("/", response_model=PlanRead)
+async def create_plan(plan_in: PlanCreate, db: AsyncSession = Depends(get_async_db)):
+    plan = Plan(
+        organizer_id=plan_in.organizer_id,
+        venue_id=plan_in.venue_id,
+        start_time=plan_in.start_time,
+    )
+    db.add(plan)
+    await db.commit()
+    await db.refresh(plan)
+
+    # Optional: add organizer as accepted participant
+    participant = PlanParticipant(
+        plan_id=plan.id,
+        user_id=plan_in.organizer_id,
+        status="accepted",
+    )
+    db.add(participant)
+    await db.commit()
+
+    return PlanRead.model_validate(plan)
+
+@router.post("/{plan_id}/confirm")
+async def confirm_plan(plan_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    plan = await db.get(Plan, plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+
+    plan.status = "confirmed"
+    await db.commit()
+    await db.refresh(plan)
+
+    booking = await db.run_sync(create_booking_for_plan, plan)
+    return {"plan_id": str(plan.id), "booking_id": str(booking.id)}
+
+@router.get("/{plan_id}/venue-recos", response_model=List[VenueReco])
+async def get_plan_venue_recommendations(
+    plan_id: UUID,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_async_db)
+):
+    plan = await db.get(Plan, plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+
+    # The organizer is a participant too, so declining drops them as well
+    participant_ids = list(
+        await db.scalars(
+            select(PlanParticipant.user_id).where(
+                PlanParticipant.plan_id == plan_id, PlanParticipant.status != "declined"
+            )
+        )
+    )
+    return await recommend_venues_for_group_async(
+        db, user_ids=participant_ids, limit=limit
+    )
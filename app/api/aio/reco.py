@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from typing import Awaitable, Callable, Hashable, List, Literal, TypeVar
+from app.api import reco as sync_reco
+from app.api.conditional import conditional_async, make_etag
+from app.api.deps import get_async_db
+from app.api.responses import FastJSONResponse
+from app.core.encoding import dumps
+from app.core.config import settings
+from app.schemas.reco import VenueReco, UserReco
+from app.services.mf_engine import MFUnavailable
+from app.services.reco_cache import reco_cache
+from app.services.reco_serving import (
+    recommend_venues_for_group_async,
+    serve_people_recos_async,
+    serve_venue_recos_async,
+)
+from app.services.singleflight import SingleFlightTimeout, reco_flight_async
+
+router = APIRouter()
+
+T = TypeVar("T")
+
+async def _serve(key: Hashable, user_id: UUID, compute: Callable[[], Awaitable[T]]) -> T:
+    """Serve from cache; on a miss, coalesce identical concurrent computations."""
+    try:
+        return await reco_cache.get_or_compute_async(
+            key, user_id, lambda: reco_flight_async.do(key, compute)
+        )
+    except SingleFlightTimeout:
+        raise HTTPException(status_code=504, detail="Recommendation timed out")
+    except MFUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+async def _respond(key: tuple, user_id: UUID, compute: Callable[[], Awaitable[list]]):
+    """`_serve`, caching the encoded body instead when `fast_responses` is on."""
+    if settings.fast_responses:
+        async def encoded() -> bytes:
+            return dumps(await compute())
+
+        return FastJSONResponse(await _serve((*key, "json"), user_id, encoded))
+    return await _serve(key, user_id, compute)
+
+# A bulk export: stays a sync route on the sync engine, in the threadpool
+router.add_api_route(
+    "/venues/batch",
+    sync_reco.get_venue_recommendations_batch,
+    methods=["POST"],
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "One JSON `VenueRecoBatchItem` per line, in request order.",
+            "content": {"application/x-ndjson": {}},
+        }
+    },
+)
+
+@router.get("/venues/group", response_model=List[VenueReco])
+async def get_group_venue_recommendations(
+    user_ids: List[UUID] = Query(..., min_length=1, max_length=50),
+    limit: int = 10,
+    db: AsyncSession = Depends(get_async_db)
+):
+    recos = await recommend_venues_for_group_async(db, user_ids=user_ids, limit=limit)
+    return FastJSONResponse(recos) if settings.fast_responses else recos
+
+@router.get("/venues/{user_id}", response_model=List[VenueReco])
+async def get_venue_recommendations(
+    request: Request,
+    response: Response,
+    user_id: UUID,
+    limit: int = 10,
+    engine: Literal["heuristic", "mf"] | None = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Only the configured default falls back to the heuristic; an explicit
+    # ?engine=mf the model cannot serve is a 503
+    fallback = engine is None
+    engine = engine or settings.reco_engine
+    # Taken before computing: a write during the computation changes the tag
+    etag = make_etag(reco_cache.catalog_version, reco_cache.user_version(user_id))
+
+    def compute():
+        return serve_venue_recos_async(db, user_id, limit, engine, fallback)
+
+    return await conditional_async(
+        request,
+        response,
+        etag,
+        lambda: _respond(reco_cache.venue_key(user_id, limit, engine, fallback), user_id, compute),
+        cache_control="private, no-cache",
+    )
+
+@router.get("/people/{user_id}", response_model=List[UserReco])
+async def get_people_recommendations(
+    user_id: UUID,
+    venue_id: UUID | None = None,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_async_db)
+):
+    def compute():
+        return serve_people_recos_async(db, user_id, venue_id, limit)
+
+    return await _serve(reco_cache.people_key(user_id, venue_id, limit), user_id, compute)
+
+router.add_api_route("/cache/stats", sync_reco.get_cache_stats, methods=["GET"])
+router.add_api_route("/pipeline/stats", sync_reco.get_pipeline_stats, methods=["GET"])
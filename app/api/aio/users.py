@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app.api.deps import get_async_db
+from app.api.pagination import NDJSON_RESPONSES, PageParams, paginate_async
+from uuid import UUID
+from app.models.user import User
+from app.models.social import UserSocialEdge
+from app.schemas.user import UserCreate, UserRead
+from app.schemas.social import SocialEdgeCreate, SocialEdgeRead
+from app.services.reco_cache import reco_cache
+from app.services.social_graph import social_graph
+
+router = APIRouter()
+
+@router.post("/", response_model=UserRead)
+async def create_user(user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(User.id).where(User.handle == user_in.handle))
+    if existing:
+        raise HTTPException(status_code=400, detail="Handle already taken")
+    user = User(**user_in.model_dump())
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+@router.get("/", response_model=List[UserRead], responses=NDJSON_RESPONSES)
+async def list_users(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await paginate_async(db, User, UserRead, page, response)
+
+@router.post("/{user_id}/edges", response_model=SocialEdgeRead)
+async def create_social_edge(
+    user_id: UUID,
+    edge_in: SocialEdgeCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if edge_in.other_user_id == user_id:
+        raise HTTPException(status_code=400, detail="A user cannot have an edge to themselves")
+    if await db.get(User, user_id) is None or await db.get(User, edge_in.other_user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    edge = UserSocialEdge(user_id=user_id, **edge_in.model_dump())
+    db.add(edge)
+    await db.commit()
+    await db.refresh(edge)
+    social_graph.add_edge(edge.user_id, edge.other_user_id, edge.strength)
+    # Both ends: cached recos and ETags of either user can depend on the edge
+    reco_cache.invalidate_user(user_id)
+    reco_cache.invalidate_user(edge_in.other_user_id)
+    return edge
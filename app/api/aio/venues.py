@@ -0,0 +1,72 @@
+from datetime import datetime
+import anyio.to_thread
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from typing import List
+from app.api.conditional import conditional_async, make_etag
+from app.api.deps import get_async_db
+from app.api.pagination import NDJSON_RESPONSES, PageParams, paginate_async
+from app.models.venue import Venue
+from app.schemas.venue import VenueCreate, VenueRead
+from app.schemas.interactions import InteractionCreate
+from app.core.config import settings
+from app.services.interaction_buffer import BufferFull, interaction_buffer
+from app.services.interaction_service import record_interactions
+from app.services.reco_cache import reco_cache
+from app.services.venue_index import venue_index
+
+router = APIRouter()
+
+@router.post("/", response_model=VenueRead)
+async def create_venue(venue_in: VenueCreate, db: AsyncSession = Depends(get_async_db)):
+    venue = Venue(**venue_in.model_dump())
+    db.add(venue)
+    await db.commit()
+    await db.refresh(venue)
+    venue_index.add(venue)
+    reco_cache.bump_catalog_version()
+    return venue
+
+@router.get("/", response_model=List[VenueRead], responses=NDJSON_RESPONSES)
+async def list_venues(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await conditional_async(
+        request,
+        response,
+        make_etag(reco_cache.catalog_version),
+        lambda: paginate_async(db, Venue, VenueRead, page, response),
+    )
+
+@router.post("/{venue_id}/interact")
+async def record_interaction(
+    venue_id: UUID,
+    interaction: InteractionCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    values = dict(
+        user_id=interaction.user_id,
+        venue_id=venue_id,
+        interaction_type=interaction.interaction_type,
+        dwell_time_seconds=interaction.dwell_time_seconds or 0,
+        created_at=datetime.utcnow(),
+    )
+    if settings.interaction_write_behind:
+        try:
+            # `submit` may wait on a spool fsync: keep it off the event loop
+            await anyio.to_thread.run_sync(interaction_buffer.submit, [values])
+        except BufferFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Interaction queue is full",
+                headers={"Retry-After": "1"},
+            )
+        return {"status": "ok"}
+
+    # Rollups are updated in the same transaction as the raw event
+    await db.run_sync(record_interactions, [values])
+    return {"status": "ok"}
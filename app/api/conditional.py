@@ -0,0 +1,66 @@
+import secrets
+import time
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+# Versions are in-memory counters, so ETags from another process (or an
+# earlier run of this one) must never match
+PROCESS_NONCE = secrets.token_hex(8)
+
+
+def make_etag(*versions: object) -> str:
+    epoch = int(time.time() // settings.etag_epoch_seconds)
+    return '"' + ".".join(str(v) for v in (PROCESS_NONCE, epoch, *versions)) + '"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison against an If-None-Match list, as RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (
+        candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")
+    )
+
+
+def conditional(
+    request: Request,
+    response: Response,
+    etag: str,
+    produce: Callable[[], object],
+    cache_control: str = "no-cache",
+):
+    """
+    A bare 304 if the client already holds `etag`, otherwise `produce()` with
+    the ETag attached (to the returned Response, if it is one).
+
+    `etag` must be taken before `produce` runs, so a write that lands during
+    the computation changes the next request's tag.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return _attach(produce(), response, headers)
+
+
+async def conditional_async(
+    request: Request,
+    response: Response,
+    etag: str,
+    produce: Callable[[], Awaitable[object]],
+    cache_control: str = "no-cache",
+):
+    """`conditional` for a coroutine `produce`."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return _attach(await produce(), response, headers)
+
+
+def _attach(result, response: Response, headers: dict[str, str]):
+    (result if isinstance(result, Response) else response).headers.update(headers)
+    return result
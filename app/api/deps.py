@@ -1,4 +1,5 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
+from app.db import session
 from app.db.session import SessionLocal
 
 def get_db() -> Generator:
@@ -7,3 +8,7 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncGenerator:
+    async with session.AsyncSessionLocal() as db:
+        yield db
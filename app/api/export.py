@@ -0,0 +1,57 @@
+import secrets
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.api.deps import get_db
+from app.core.config import settings
+from app.services.export_service import EXPORT_SOURCES, csv_lines, export_cutoff, stream_rows
+
+router = APIRouter()
+
+ExportTable = Literal[tuple(EXPORT_SOURCES)]
+
+# Watermark to pass as `since` on the next incremental request
+NEXT_SINCE_HEADER = "X-Next-Since"
+
+def require_export_token(authorization: str | None = Header(default=None)) -> None:
+    if settings.export_token is None:
+        raise HTTPException(status_code=404, detail="Export is disabled")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), settings.export_token.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid export token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+@router.get(
+    "/{table}",
+    response_class=StreamingResponse,
+    dependencies=[Depends(require_export_token)],
+    responses={
+        200: {
+            "description": "CSV with a header row. Incremental tables return the rows "
+            f"written or updated after `since`; pass the `{NEXT_SINCE_HEADER}` header "
+            "as the next `since`.",
+            "content": {"text/csv": {}},
+        }
+    },
+)
+def export_table(
+    table: ExportTable,
+    since: datetime | None = None,
+    db: Session = Depends(get_db)
+):
+    headers = {}
+    until = None
+    if EXPORT_SOURCES[table].watermark_column is not None:
+        until = export_cutoff(settings.export_watermark_lag_seconds)
+        headers[NEXT_SINCE_HEADER] = until.isoformat()
+    columns, chunks = stream_rows(
+        db, table, since=since, until=until, chunk_size=settings.export_chunk_size
+    )
+    return StreamingResponse(csv_lines(columns, chunks), media_type="text/csv", headers=headers)
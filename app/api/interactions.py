@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.api.deps import get_db
+from app.core.config import settings
+from app.models.user import User
+from app.models.venue import Venue
+from app.schemas.interactions import InteractionBatchCreate, InteractionBatchResult
+from app.services.interaction_buffer import BufferFull, interaction_buffer
+from app.services.interaction_service import record_interactions
+
+router = APIRouter()
+
+def _naive_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+@router.post("/batch", response_model=InteractionBatchResult)
+def record_interactions_batch(
+    batch: InteractionBatchCreate,
+    db: Session = Depends(get_db)
+):
+    """
+    Record many interactions, across any number of venues, in one transaction
+    (or queue them, in write-behind mode). The whole batch is rejected if it
+    references unknown users or venues.
+    """
+    user_ids = {i.user_id for i in batch.interactions}
+    venue_ids = {i.venue_id for i in batch.interactions}
+    # One existence check per table for the whole batch
+    unknown_users = user_ids - {
+        user_id for (user_id,) in db.query(User.id).filter(User.id.in_(user_ids))
+    }
+    unknown_venues = venue_ids - {
+        venue_id for (venue_id,) in db.query(Venue.id).filter(Venue.id.in_(venue_ids))
+    }
+    if unknown_users or unknown_venues:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "unknown_user_ids": sorted(str(u) for u in unknown_users),
+                "unknown_venue_ids": sorted(str(v) for v in unknown_venues),
+            },
+        )
+
+    now = datetime.utcnow()
+    rows = [
+        dict(
+            user_id=i.user_id,
+            venue_id=i.venue_id,
+            interaction_type=i.interaction_type,
+            dwell_time_seconds=i.dwell_time_seconds or 0,
+            # Buffered events keep the time they happened, but never a future one
+            created_at=min(_naive_utc(i.created_at), now) if i.created_at else now,
+        )
+        for i in batch.interactions
+    ]
+    if settings.interaction_write_behind:
+        try:
+            interaction_buffer.submit(rows)
+        except BufferFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Interaction queue is full",
+                headers={"Retry-After": "1"},
+            )
+        return InteractionBatchResult(inserted=len(rows), queued=True)
+
+    record_interactions(db, rows)
+    return InteractionBatchResult(inserted=len(rows))
@@ -0,0 +1,109 @@
+from typing import Literal, Optional
+
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.responses import FastJSONResponse
+from app.core.config import settings
+from app.services.pagination import (
+    InvalidPageRequest,
+    keyset_page,
+    parse_fields,
+    stream_ndjson,
+    stream_ndjson_async,
+)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# OpenAPI addition for listings that also support ?stream=ndjson
+NDJSON_RESPONSES = {
+    200: {
+        "description": "A page of rows, or with `stream=ndjson` every row as one JSON "
+        "object per line.",
+        "content": {"application/x-ndjson": {}},
+    }
+}
+
+
+class PageParams:
+    """`limit`, `cursor`, `fields` and `stream` query parameters of a listing."""
+
+    def __init__(
+        self,
+        limit: int = Query(settings.list_page_size, ge=1, le=settings.list_max_page_size),
+        cursor: Optional[str] = Query(
+            None, description=f"Value of the previous page's `{NEXT_CURSOR_HEADER}` header"
+        ),
+        fields: Optional[str] = Query(
+            None, description="Comma-separated fields to return; `id` is always included"
+        ),
+        stream: Optional[Literal["ndjson"]] = Query(
+            None, description="Stream every row after `cursor` instead of one page; `limit` is ignored"
+        ),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = fields
+        self.stream = stream
+
+
+def _fields(schema: type[BaseModel], page: PageParams) -> list[str] | None:
+    fields = parse_fields(page.fields, schema)
+    if fields is None and (page.stream or settings.fast_responses):
+        # All columns as plain rows, encoded without building the model
+        fields = list(schema.model_fields)
+    return fields
+
+
+def _page_response(rows: list, next_cursor: str | None, projected: bool, response: Response):
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    if projected:
+        return FastJSONResponse(rows, headers=headers)
+    response.headers.update(headers)
+    return rows
+
+
+def paginate(db: Session, model: type, schema: type[BaseModel], page: PageParams, response: Response):
+    """
+    One page of a listing, with the next page's cursor in `X-Next-Cursor`.
+
+    Full rows go back through the route's `response_model`, unless
+    `fast_responses` is on; projected rows are partial, so they are always
+    encoded directly. `stream=ndjson` returns the whole listing as a stream
+    instead.
+    """
+    try:
+        fields = _fields(schema, page)
+        if page.stream == "ndjson":
+            return StreamingResponse(
+                stream_ndjson(
+                    db, model, fields, cursor=page.cursor, chunk_size=settings.list_stream_chunk_size
+                ),
+                media_type="application/x-ndjson",
+            )
+        rows, next_cursor = keyset_page(db, model, page.limit, page.cursor, fields)
+    except InvalidPageRequest as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return _page_response(rows, next_cursor, fields is not None, response)
+
+
+async def paginate_async(
+    db: AsyncSession, model: type, schema: type[BaseModel], page: PageParams, response: Response
+):
+    """`paginate` on an async session."""
+    try:
+        fields = _fields(schema, page)
+        if page.stream == "ndjson":
+            return StreamingResponse(
+                await stream_ndjson_async(
+                    db, model, fields, cursor=page.cursor, chunk_size=settings.list_stream_chunk_size
+                ),
+                media_type="application/x-ndjson",
+            )
+        rows, next_cursor = await db.run_sync(keyset_page, model, page.limit, page.cursor, fields)
+    except InvalidPageRequest as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return _page_response(rows, next_cursor, fields is not None, response)
@@ -5,7 +5,9 @@ from typing import List
 from app.api.deps import get_db
 from app.models.plan import Plan, PlanParticipant
 from app.schemas.plan import PlanCreate, PlanRead
+from app.schemas.reco import VenueReco
 from app.services.agent_service import create_booking_for_plan
+from app.services.reco_service import recommend_venues_for_group
 
 router = APIRouter()
 
@@ -43,3 +45,24 @@ def confirm_plan(plan_id: UUID, db: Session = Depends(get_db)):
 
     booking = create_booking_for_plan(db, plan)
     return {"plan_id": str(plan.id), "booking_id": str(booking.id)}
+
+@router.get("/{plan_id}/venue-recos", response_model=List[VenueReco])
+def get_plan_venue_recommendations(
+    plan_id: UUID,
+    limit: int = 10,
+    db: Session = Depends(get_db)
+):
+    plan = db.query(Plan).get(plan_id)
+    if not plan:
+        raise HTTPException(status_code=404, detail="Plan not found")
+
+    # The organizer is a participant too, so declining drops them as well
+    participant_ids = [
+        user_id
+        for (user_id,) in db.query(PlanParticipant.user_id)
+        .filter(PlanParticipant.plan_id == plan_id, PlanParticipant.status != "declined")
+        .all()
+    ]
+    return recommend_venues_for_group(
+        db, user_ids=participant_ids, limit=limit
+    )
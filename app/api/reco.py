@@ -1,23 +1,98 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
-from typing import List
+from typing import Callable, Hashable, List, Literal, TypeVar
+from app.api.conditional import conditional, make_etag
 from app.api.deps import get_db
-from app.schemas.reco import VenueReco, UserReco
-from app.services.reco_service import (
-    recommend_venues_for_user,
-    recommend_people_for_user,
-)
+from app.api.responses import FastJSONResponse
+from app.core.encoding import dumps
+from app.core.config import settings
+from app.schemas.reco import VenueReco, UserReco, VenueRecoBatchRequest, VenueRecoBatchItem
+from app.services.reco_service import recommend_venues_for_group, recommend_venues_for_users
+from app.services.reco_serving import serve_people_recos, serve_venue_recos
+from app.services.mf_engine import MFUnavailable
+from app.services.reco_cache import reco_cache
+from app.services.singleflight import SingleFlightTimeout, reco_flight
+from app.services.venue_pipeline import venue_pipeline
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+def _serve(key: Hashable, user_id: UUID, compute: Callable[[], T]) -> T:
+    """Serve from cache; on a miss, coalesce identical concurrent computations."""
+    try:
+        return reco_cache.get_or_compute(
+            key, user_id, lambda: reco_flight.do(key, compute)
+        )
+    except SingleFlightTimeout:
+        raise HTTPException(status_code=504, detail="Recommendation timed out")
+    except MFUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+def _respond(key: tuple, user_id: UUID, compute: Callable[[], list]):
+    """`_serve`, caching the encoded body instead when `fast_responses` is on."""
+    if settings.fast_responses:
+        return FastJSONResponse(_serve((*key, "json"), user_id, lambda: dumps(compute())))
+    return _serve(key, user_id, compute)
+
+@router.post(
+    "/venues/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "One JSON `VenueRecoBatchItem` per line, in request order.",
+            "content": {"application/x-ndjson": {}},
+        }
+    },
+)
+def get_venue_recommendations_batch(
+    batch: VenueRecoBatchRequest,
+    db: Session = Depends(get_db)
+):
+    def lines():
+        for user_id, recos in recommend_venues_for_users(db, batch.user_ids, limit=batch.limit):
+            item = VenueRecoBatchItem(user_id=user_id, recos=recos)
+            yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/venues/group", response_model=List[VenueReco])
+def get_group_venue_recommendations(
+    user_ids: List[UUID] = Query(..., min_length=1, max_length=50),
+    limit: int = 10,
+    db: Session = Depends(get_db)
+):
+    recos = recommend_venues_for_group(db, user_ids=user_ids, limit=limit)
+    return FastJSONResponse(recos) if settings.fast_responses else recos
+
 @router.get("/venues/{user_id}", response_model=List[VenueReco])
 def get_venue_recommendations(
+    request: Request,
+    response: Response,
     user_id: UUID,
     limit: int = 10,
+    engine: Literal["heuristic", "mf"] | None = None,
     db: Session = Depends(get_db)
 ):
-    return recommend_venues_for_user(db, user_id=user_id, limit=limit)
+    # Only the configured default falls back to the heuristic; an explicit
+    # ?engine=mf the model cannot serve is a 503
+    fallback = engine is None
+    engine = engine or settings.reco_engine
+    # Taken before computing: a write during the computation changes the tag
+    etag = make_etag(reco_cache.catalog_version, reco_cache.user_version(user_id))
+
+    def compute():
+        return serve_venue_recos(db, user_id, limit, engine, fallback)
+
+    return conditional(
+        request,
+        response,
+        etag,
+        lambda: _respond(reco_cache.venue_key(user_id, limit, engine, fallback), user_id, compute),
+        cache_control="private, no-cache",
+    )
 
 @router.get("/people/{user_id}", response_model=List[UserReco])
 def get_people_recommendations(
@@ -26,4 +101,15 @@ def get_people_recommendations(
     limit: int = 10,
     db: Session = Depends(get_db)
 ):
-    return recommend_people_for_user(db, user_id=user_id, venue_id=venue_id, limit=limit)
+    def compute():
+        return serve_people_recos(db, user_id, venue_id, limit)
+
+    return _serve(reco_cache.people_key(user_id, venue_id, limit), user_id, compute)
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    return reco_cache.snapshot()
+
+@router.get("/pipeline/stats")
+def get_pipeline_stats():
+    return venue_pipeline.timings.snapshot()
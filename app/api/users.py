@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.api.deps import get_db
+from app.api.pagination import NDJSON_RESPONSES, PageParams, paginate
+from uuid import UUID
 from app.models.user import User
+from app.models.social import UserSocialEdge
 from app.schemas.user import UserCreate, UserRead
+from app.schemas.social import SocialEdgeCreate, SocialEdgeRead
+from app.services.reco_cache import reco_cache
+from app.services.social_graph import social_graph
 
 router = APIRouter()
 
@@ -18,6 +24,30 @@ def create_user(user_in: UserCreate, db: Session = Depends(get_db)):
     db.refresh(user)
     return user
 
-@router.get("/", response_model=List[UserRead])
-def list_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+@router.get("/", response_model=List[UserRead], responses=NDJSON_RESPONSES)
+def list_users(
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db)
+):
+    return paginate(db, User, UserRead, page, response)
+
+@router.post("/{user_id}/edges", response_model=SocialEdgeRead)
+def create_social_edge(
+    user_id: UUID,
+    edge_in: SocialEdgeCreate,
+    db: Session = Depends(get_db)
+):
+    if edge_in.other_user_id == user_id:
+        raise HTTPException(status_code=400, detail="A user cannot have an edge to themselves")
+    if db.query(User).get(user_id) is None or db.query(User).get(edge_in.other_user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    edge = UserSocialEdge(user_id=user_id, **edge_in.model_dump())
+    db.add(edge)
+    db.commit()
+    db.refresh(edge)
+    social_graph.add_edge(edge.user_id, edge.other_user_id, edge.strength)
+    # Both ends: cached recos and ETags of either user can depend on the edge
+    reco_cache.invalidate_user(user_id)
+    reco_cache.invalidate_user(edge_in.other_user_id)
+    return edge
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from uuid import UUID
 from typing import List
+from app.api.conditional import conditional, make_etag
 from app.api.deps import get_db
+from app.api.pagination import NDJSON_RESPONSES, PageParams, paginate
 from app.models.venue import Venue
-from app.models.interactions import UserVenueInteraction
 from app.schemas.venue import VenueCreate, VenueRead
 from app.schemas.interactions import InteractionCreate
+from app.core.config import settings
+from app.services.interaction_buffer import BufferFull, interaction_buffer
+from app.services.interaction_service import record_interactions
+from app.services.reco_cache import reco_cache
+from app.services.venue_index import venue_index
 
 router = APIRouter()
 
@@ -16,11 +23,23 @@ def create_venue(venue_in: VenueCreate, db: Session = Depends(get_db)):
     db.add(venue)
     db.commit()
     db.refresh(venue)
+    venue_index.add(venue)
+    reco_cache.bump_catalog_version()
     return venue
 
-@router.get("/", response_model=List[VenueRead])
-def list_venues(db: Session = Depends(get_db)):
-    return db.query(Venue).all()
+@router.get("/", response_model=List[VenueRead], responses=NDJSON_RESPONSES)
+def list_venues(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db)
+):
+    return conditional(
+        request,
+        response,
+        make_etag(reco_cache.catalog_version),
+        lambda: paginate(db, Venue, VenueRead, page, response),
+    )
 
 @router.post("/{venue_id}/interact")
 def record_interaction(
@@ -28,12 +47,24 @@ def record_interaction(
     interaction: InteractionCreate,
     db: Session = Depends(get_db)
 ):
-    record = UserVenueInteraction(
+    values = dict(
         user_id=interaction.user_id,
         venue_id=venue_id,
         interaction_type=interaction.interaction_type,
-        dwell_time_seconds=interaction.dwell_time_seconds or 0
+        dwell_time_seconds=interaction.dwell_time_seconds or 0,
+        created_at=datetime.utcnow(),
     )
-    db.add(record)
-    db.commit()
+    if settings.interaction_write_behind:
+        try:
+            interaction_buffer.submit([values])
+        except BufferFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Interaction queue is full",
+                headers={"Retry-After": "1"},
+            )
+        return {"status": "ok"}
+
+    # Rollups are updated in the same transaction as the raw event
+    record_interactions(db, [values])
     return {"status": "ok"}
@@ -1,9 +1,108 @@
+from typing import Literal
+
 from pydantic import PostgresDsn
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: PostgresDsn
 
+    # Serve the users, venues, reco and plans routers from async routes on an
+    # async engine (asyncpg). The async URL defaults to database_url with
+    # its driver swapped for asyncpg.
+    async_database: bool = False
+    async_database_url: str | None = None
+
+    # Venue recommendations: only venues within this radius (plus a popularity
+    # backfill) are scored; exp(-0.3 * km) is ~0.0025 at 20 km.
+    reco_radius_km: float = 20.0
+    reco_popular_backfill: int = 50
+    # The trending ranking is global: recomputed this often per process
+    reco_trending_refresh_seconds: float = 60.0
+    # Cap on the union of candidate generators' proposals scored per request
+    reco_candidate_budget: int = 500
+
+    # Half-life of the decayed interaction counters on the rollups, which
+    # venue and people recos read as the user's (recency-weighted) preference
+    decay_half_life_days: float = 14.0
+
+    # In-memory spatial index over venues
+    venue_index_cell_deg: float = 0.1
+    venue_index_refresh_seconds: float = 300.0
+
+    # In-memory social graph used by people recommendations
+    social_graph_refresh_seconds: float = 300.0
+    reco_fof_candidates: int = 200
+
+    # In-memory user x category affinity matrix
+    category_affinity_refresh_seconds: float = 300.0
+
+    # In-process recommendation result cache
+    reco_cache_max_entries: int = 10_000
+    reco_cache_max_bytes: int = 64 * 1024 * 1024
+    reco_cache_ttl_seconds: float = 60.0
+
+    # How long a request waits on an identical in-flight reco computation
+    reco_singleflight_timeout_seconds: float = 10.0
+
+    # Offline top-K recommendations (python -m app.precompute)
+    precompute_top_k: int = 50
+    precompute_batch_size: int = 1_000
+    # Scratch memory for one chunk of batch venue scoring (precompute and
+    # /reco/venues/batch); chunks shrink as the catalog grows
+    reco_batch_memory_bytes: int = 128 * 1024 * 1024
+
+    # Venue reco engine behind /reco/venues. "mf" serves the implicit-ALS model
+    # trained by `python -m app.train_mf`, falling back to the heuristic
+    # scorer for users the model has not seen.
+    reco_engine: Literal["heuristic", "mf"] = "heuristic"
+    mf_model_path: str = "mf_model.npz"
+    mf_factors: int = 32
+    mf_iterations: int = 15
+    mf_regularization: float = 0.1
+    mf_alpha: float = 10.0
+
+    # Learned ranker over the venue candidates (python -m app.train_ranker).
+    # "learned" replaces the blended heuristic score with P(plan) from the
+    # model loaded at startup.
+    reco_ranker: Literal["heuristic", "learned"] = "heuristic"
+    ranker_model: Literal["logistic", "gbdt"] = "logistic"
+    ranker_model_path: str = "ranker.joblib"
+    ranker_negatives_per_positive: int = 4
+
+    # Write-behind interaction ingest: events are spooled and queued, and a
+    # background thread commits them in micro-batches. Off by default.
+    interaction_write_behind: bool = False
+    interaction_buffer_max_size: int = 100_000
+    interaction_buffer_batch_size: int = 1_000
+    interaction_buffer_flush_seconds: float = 0.5
+    interaction_spool_path: str = "interactions.spool"
+
+    # Keyset-paginated /users/ and /venues/ listings
+    list_page_size: int = 100
+    list_max_page_size: int = 1_000
+    # Rows per server-side cursor fetch for ?stream=ndjson listings
+    list_stream_chunk_size: int = 1_000
+
+    # ETags of /venues/ and /reco/venues/{user_id} are built from this
+    # process's catalog and per-user versions; they also roll over every
+    # etag_epoch_seconds, bounding how long a worker that did not see a
+    # write (made by another worker) keeps answering 304.
+    etag_epoch_seconds: float = 60.0
+
+    # Encode /venues/ and /reco/venues responses straight to JSON bytes
+    # (cached as bytes for recos) instead of re-validating them through
+    # their response_model. Output is byte-identical either way.
+    fast_responses: bool = False
+
+    # Training-data export (python -m app.export). The /export endpoint is
+    # disabled unless a bearer token is configured.
+    export_dir: str = "exports"
+    export_chunk_size: int = 100_000
+    export_token: str | None = None
+    # Incremental exports stop this far behind now: longer than any write
+    # transaction, so no row can still commit behind the watermark
+    export_watermark_lag_seconds: float = 300.0
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,79 @@
+import dataclasses
+import json
+import math
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+# Float tokens orjson renders differently from `repr` (which the stdlib
+# encoder uses): magnitudes below 1e-4 (`0.00001` vs `1e-05`) or from 1e16
+# up (`1e16` vs `1e+16`). A match inside a string only costs a fallback.
+_REPR_MISMATCH = re.compile(rb"[:,\[]-?(?:0\.0000|[0-9.]+e)")
+
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        # Field values as they are; fine for the plain models we build ourselves
+        return value.__dict__
+    if dataclasses.is_dataclass(value):
+        return {f.name: getattr(value, f.name) for f in dataclasses.fields(value)}
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj) -> bytes:
+    # Same settings as Starlette's JSONResponse, i.e. the response_model path
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+def dumps(obj) -> bytes:
+    """
+    Compact UTF-8 JSON, byte-identical to what FastAPI's default response
+    path would send for the same plain values. UUIDs, Decimals and naive
+    datetimes are encoded the way their pydantic fields would be; pydantic
+    models (without aliases or custom serializers) and dataclasses as objects
+    of their fields.
+
+    Uses orjson when installed; the few documents whose floats orjson would
+    format differently are re-encoded with the stdlib encoder.
+    """
+    if orjson is None:
+        return _stdlib_dumps(obj)
+    encoded = orjson.dumps(obj, default=_default)
+    if _REPR_MISMATCH.search(encoded) or b"null" in encoded and _has_non_finite(obj):
+        return _stdlib_dumps(obj)
+    return encoded
+
+
+def _has_non_finite(obj) -> bool:
+    """orjson writes NaN/inf as null where the stdlib encoder raises."""
+    if isinstance(obj, (float, Decimal)):
+        return not math.isfinite(obj)
+    if isinstance(obj, BaseModel):
+        return _has_non_finite(obj.__dict__)
+    if dataclasses.is_dataclass(obj):
+        return _has_non_finite(_default(obj))
+    if isinstance(obj, dict):
+        return any(_has_non_finite(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(v) for v in obj)
+    return False
@@ -11,3 +11,27 @@ SessionLocal = sessionmaker(
 )
 
 Base = declarative_base()
+
+
+def async_url(url: str) -> str:
+    """The same Postgres database, through the asyncpg driver."""
+    scheme, sep, rest = url.partition("://")
+    return f"postgresql+asyncpg{sep}{rest}" if scheme.startswith("postgresql") else url
+
+
+# Only built when enabled, so the sync stack never needs asyncpg installed
+async_engine = None
+AsyncSessionLocal = None
+if settings.async_database:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        settings.async_database_url or async_url(str(settings.database_url)),
+        echo=False,
+    )
+    # Objects stay usable after commit without an implicit (sync) refresh
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
@@ -0,0 +1,32 @@
+# app/export.py
+
+import sys
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.export_service import EXPORT_SOURCES, export_tables
+
+
+# -------------------------
+# Incremental training-data export
+#   python -m app.export [--full] [table ...]
+# -------------------------
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    incremental = "--full" not in args
+    tables = [a for a in args if a != "--full"] or list(EXPORT_SOURCES)
+
+    db = SessionLocal()
+    try:
+        written = export_tables(
+            db,
+            settings.export_dir,
+            tables=tables,
+            chunk_size=settings.export_chunk_size,
+            incremental=incremental,
+            lag_seconds=settings.export_watermark_lag_seconds,
+        )
+    finally:
+        db.close()
+    for table, files in written.items():
+        print(f"{table}: {len(files)} new file(s)")
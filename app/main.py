@@ -1,10 +1,49 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.api import users, venues, reco, plans, health
+from app.api import users, venues, interactions, reco, plans, export, health
+from app.api.aio import plans as async_plans
+from app.api.aio import reco as async_reco
+from app.api.aio import users as async_users
+from app.api.aio import venues as async_venues
+from app.core.config import settings
+from app.db import session
+from app.services.interaction_buffer import interaction_buffer
+from app.services.learned_ranker import learned_ranker
+from app.services.mf_engine import mf_engine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.reco_engine == "mf":
+        mf_engine.load(settings.mf_model_path)
+    if settings.reco_ranker == "learned":
+        learned_ranker.load(settings.ranker_model_path)
+    if settings.interaction_write_behind:
+        interaction_buffer.start()
+    try:
+        yield
+    finally:
+        # Drain queued interactions before the process exits
+        interaction_buffer.stop()
+        if session.async_engine is not None:
+            await session.async_engine.dispose()
+
+
+def include_routers(app: FastAPI, async_database: bool) -> None:
+    """Mount the API, with the async users/venues/reco/plans routers if asked."""
+    if async_database:
+        users_, venues_, reco_, plans_ = async_users, async_venues, async_reco, async_plans
+    else:
+        users_, venues_, reco_, plans_ = users, venues, reco, plans
+    app.include_router(health.router, prefix="/health", tags=["health"])
+    app.include_router(users_.router, prefix="/users", tags=["users"])
+    app.include_router(venues_.router, prefix="/venues", tags=["venues"])
+    app.include_router(interactions.router, prefix="/interactions", tags=["interactions"])
+    app.include_router(reco_.router, prefix="/reco", tags=["recommendations"])
+    app.include_router(plans_.router, prefix="/plans", tags=["plans"])
+    app.include_router(export.router, prefix="/export", tags=["export"])
 
-app = FastAPI(title="Luna API Service")
 
-app.include_router(health.router, prefix="/health", tags=["health"])
-app.include_router(users.router, prefix="/users", tags=["users"])
-app.include_router(venues.router, prefix="/venues", tags=["venues"])
-app.include_router(reco.router, prefix="/reco", tags=["recommendations"])
-app.include_router(plans.router, prefix="/plans", tags=["plans"])
+app = FastAPI(title="Luna API Service", lifespan=lifespan)
+include_routers(app, settings.async_database)
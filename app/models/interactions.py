@@ -1,12 +1,20 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, BigInteger
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, ForeignKey, BigInteger, DateTime
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.session import Base
 
+# Interaction types that count as positive engagement with a venue
+POSITIVE_INTERACTIONS = ("like", "interest")
+
 class UserVenueInteraction(Base):
     __tablename__ = "user_venue_interactions"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     venue_id = Column(UUID(as_uuid=True), ForeignKey("venues.id"), nullable=False)
     interaction_type = Column(String, nullable=False)   # 'view', 'like', etc.
     dwell_time_seconds = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)   # NULL for legacy rows
+    # When the row was written (created_at is the event time, which may be
+    # older); the export watermark. NULL for legacy rows
+    recorded_at = Column(DateTime, default=datetime.utcnow, index=True)
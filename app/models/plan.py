@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, BigInteger
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, BigInteger
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from app.db.session import Base
@@ -15,7 +16,9 @@ class Plan(Base):
 class PlanParticipant(Base):
     __tablename__ = "plan_participants"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
     plan_id = Column(UUID(as_uuid=True), ForeignKey("plans.id"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     status = Column(String, default="invited")
+    # The export watermark: status changes re-export the row. NULL for legacy rows
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
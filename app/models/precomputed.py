@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime, JSON, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.db.session import Base
+
+class PrecomputedReco(Base):
+    """Top-K recommendations computed offline by `python -m app.precompute`."""
+    __tablename__ = "precomputed_recos"
+
+    # The primary key doubles as the serving index: newest generation first
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    kind = Column(String, primary_key=True)            # 'venues' | 'people'
+    generation = Column(Integer, primary_key=True)
+    recos = Column(JSON().with_variant(JSONB, "postgresql"), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PrecomputeGeneration(Base):
+    """One row per precompute run: inserting the key claims its generation number."""
+    __tablename__ = "precompute_generations"
+
+    generation = Column(Integer, primary_key=True, autoincrement=False)
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,40 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, BigInteger, ForeignKey, DateTime, Float
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.session import Base
+
+class VenueStats(Base):
+    """Per-venue engagement counters, maintained on every interaction write."""
+    __tablename__ = "venue_stats"
+
+    venue_id = Column(UUID(as_uuid=True), ForeignKey("venues.id"), primary_key=True)
+    positive_count = Column(Integer, nullable=False, default=0, index=True)   # 'like' + 'interest'
+    total_dwell_seconds = Column(BigInteger, nullable=False, default=0)
+    distinct_users = Column(Integer, nullable=False, default=0)
+    # Exponentially decayed counters, as of `decayed_at` (unix seconds)
+    decayed_positive = Column(Float, nullable=False, default=0.0)
+    decayed_dwell = Column(Float, nullable=False, default=0.0)
+    decayed_at = Column(Float, nullable=False, default=0.0)
+
+class UserVenueAffinity(Base):
+    """Per (user, venue) engagement totals, maintained on every interaction write."""
+    __tablename__ = "user_venue_affinity"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    venue_id = Column(UUID(as_uuid=True), ForeignKey("venues.id"), primary_key=True)
+    like_count = Column(Integer, nullable=False, default=0)       # 'like' + 'interest'
+    dwell_seconds = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Exponentially decayed counters, as of `decayed_at` (unix seconds)
+    decayed_likes = Column(Float, nullable=False, default=0.0)
+    decayed_dwell = Column(Float, nullable=False, default=0.0)
+    decayed_at = Column(Float, nullable=False, default=0.0)
+
+class UserCategoryAffinity(Base):
+    """Per (user, venue category) engagement totals, maintained on every interaction write."""
+    __tablename__ = "user_category_affinity"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    category = Column(String, primary_key=True)
+    like_count = Column(Integer, nullable=False, default=0)       # 'like' + 'interest'
+    dwell_seconds = Column(BigInteger, nullable=False, default=0)
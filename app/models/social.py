@@ -1,12 +1,15 @@
-from sqlalchemy import Column, String, ForeignKey, BigInteger, Numeric
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, ForeignKey, BigInteger, Numeric, DateTime
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.session import Base
 
 class UserSocialEdge(Base):
     __tablename__ = "user_social_edges"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    other_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    other_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     relationship_type = Column(String)
     strength = Column(Numeric(3, 2), default=0.5)   # 0..1
+    # NULL for edges created before the column existed
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
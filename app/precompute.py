@@ -0,0 +1,27 @@
+# app/precompute.py
+
+from app.core.config import settings
+from app.db.session import engine, SessionLocal, Base
+from app.models.precomputed import PrecomputedReco
+from app.services.precompute_service import precompute_recos
+
+
+# -------------------------
+# Offline top-K recommendations for every user
+# -------------------------
+if __name__ == "__main__":
+    print("Ensuring precomputed_recos table exists...")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        generation = precompute_recos(
+            db,
+            top_k=settings.precompute_top_k,
+            batch_size=settings.precompute_batch_size,
+        )
+        print(
+            f"Precomputed generation {generation}: "
+            f"{db.query(PrecomputedReco).count()} rows."
+        )
+    finally:
+        db.close()
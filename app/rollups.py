@@ -0,0 +1,23 @@
+# app/rollups.py
+
+from app.db.session import engine, SessionLocal, Base
+from app.models.rollups import UserCategoryAffinity, UserVenueAffinity, VenueStats
+from app.services.rollup_service import rebuild_rollups
+
+
+# -------------------------
+# Rebuild rollup tables from the raw interaction history
+# -------------------------
+if __name__ == "__main__":
+    print("Ensuring rollup tables exist...")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db)
+        print(
+            f"Rollups rebuilt: {db.query(VenueStats).count()} venue_stats rows, "
+            f"{db.query(UserVenueAffinity).count()} user_venue_affinity rows, "
+            f"{db.query(UserCategoryAffinity).count()} user_category_affinity rows."
+        )
+    finally:
+        db.close()
@@ -1,8 +1,22 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
 
 class InteractionCreate(BaseModel):
     user_id: UUID
     interaction_type: str
     dwell_time_seconds: Optional[int] = 0
+
+class InteractionBatchItem(InteractionCreate):
+    venue_id: UUID
+    # When the event happened on the client; defaults to the time of receipt
+    created_at: Optional[datetime] = None
+
+class InteractionBatchCreate(BaseModel):
+    interactions: List[InteractionBatchItem] = Field(max_length=10_000)
+
+class InteractionBatchResult(BaseModel):
+    inserted: int
+    # True when the events were queued for a background write
+    queued: bool = False
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
+from typing import List
 
 class VenueReco(BaseModel):
     venue_id: UUID
@@ -10,3 +11,11 @@ class VenueReco(BaseModel):
 class UserReco(BaseModel):
     user_id: UUID
     score: float
+
+class VenueRecoBatchRequest(BaseModel):
+    user_ids: List[UUID] = Field(max_length=100_000)
+    limit: int = Field(default=10, ge=1, le=100)
+
+class VenueRecoBatchItem(BaseModel):
+    user_id: UUID
+    recos: List[VenueReco]
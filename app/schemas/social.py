@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from uuid import UUID
+from typing import Optional
+
+class SocialEdgeCreate(BaseModel):
+    other_user_id: UUID
+    relationship_type: Optional[str] = None
+    strength: float = Field(default=0.5, ge=0.0, le=1.0)
+
+class SocialEdgeRead(SocialEdgeCreate):
+    id: int
+    user_id: UUID
+
+    class Config:
+        from_attributes = True
@@ -10,7 +10,9 @@ from app.models.user import User
 from app.models.venue import Venue
 from app.models.interactions import UserVenueInteraction
 from app.models.social import UserSocialEdge
+from app.models.rollups import UserCategoryAffinity, UserVenueAffinity, VenueStats
 from app.models.plan import Plan, PlanParticipant
+from app.services.rollup_service import rebuild_rollups
 
 
 # -------------------------
@@ -503,6 +505,9 @@ def seed(db: Session):
     db.add_all(participants)
     db.commit()
 
+    # Interactions above bypass the API, so build the rollups from history
+    rebuild_rollups(db)
+
     print(
         f"Seed data inserted: {len(users)} users, {len(venues)} venues, "
         f"{db.query(UserVenueInteraction).count()} interactions, "
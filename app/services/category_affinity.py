@@ -0,0 +1,146 @@
+import threading
+import time
+from typing import Iterable, Mapping, Sequence
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.rollups import UserCategoryAffinity
+from app.services.offload import offload
+
+
+class CategoryAffinityMatrix:
+    """
+    Dense in-memory (users x categories) like-count and dwell matrices.
+
+    Mirrors the `user_category_affinity` rollup so a category preference is an
+    array gather instead of an `IN (...)` scan over every venue in the
+    category. Rows and columns grow by doubling as new users and categories
+    appear; increments from committed writes are applied in place, and the
+    matrix is reloaded every `refresh_seconds` to pick up other workers'
+    writes.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        # Bumped by every load or reset; see `apply`
+        self.version = 0
+        self._clear()
+
+    def _clear(self) -> None:
+        self._users: dict[UUID, int] = {}
+        self._categories: dict[str, int] = {}
+        self._likes = np.zeros((0, 0), dtype=np.float32)
+        self._dwell = np.zeros((0, 0), dtype=np.float32)
+        self._loaded_at: float | None = None
+
+    def _slot(self, user_id: UUID, category: str) -> tuple[int, int]:
+        row = self._users.setdefault(user_id, len(self._users))
+        col = self._categories.setdefault(category, len(self._categories))
+        n_rows, n_cols = self._likes.shape
+        if row >= n_rows or col >= n_cols:
+            shape = (
+                max(n_rows, 2 * row + 1) if row >= n_rows else n_rows,
+                max(n_cols, 2 * col + 1) if col >= n_cols else n_cols,
+            )
+            for name in ("_likes", "_dwell"):
+                grown = np.zeros(shape, dtype=np.float32)
+                grown[:n_rows, :n_cols] = getattr(self, name)
+                setattr(self, name, grown)
+        return row, col
+
+    def _add(self, rows: Iterable[Mapping]) -> None:
+        for r in rows:
+            row, col = self._slot(r["user_id"], r["category"])
+            self._likes[row, col] += r["like_count"]
+            self._dwell[row, col] += r["dwell_seconds"]
+
+    def load(self, rows: Iterable[Mapping]) -> None:
+        """Replace the matrix with (user_id, category, like_count, dwell_seconds) rows."""
+        with self._lock:
+            self._clear()
+            self._add(rows)
+            self._loaded_at = time.monotonic()
+            self.version += 1
+
+    def ensure_loaded(self, db: Session) -> "CategoryAffinityMatrix":
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            rows = db.query(
+                UserCategoryAffinity.user_id,
+                UserCategoryAffinity.category,
+                UserCategoryAffinity.like_count,
+                UserCategoryAffinity.dwell_seconds,
+            ).all()
+            offload(self.load, [row._mapping for row in rows])
+        return self
+
+    def apply(self, deltas: Iterable[Mapping], version: int | None = None) -> None:
+        """
+        Apply committed rollup increments; a no-op until first loaded.
+
+        `version` is `self.version` read before the increments' transaction
+        committed. If the matrix has been reloaded since, the reload may
+        already include them, so they are skipped rather than counted twice
+        (at worst they are missing until the next refresh).
+        """
+        with self._lock:
+            if self._loaded_at is not None and version in (None, self.version):
+                self._add(deltas)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+            self.version += 1
+
+    def gather(
+        self,
+        user_ids: Sequence[UUID],
+        category: str,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Like counts and dwell seconds of `user_ids` in `category` (0 if unknown)."""
+        with self._lock:
+            col = self._categories.get(category)
+            if col is None:
+                zeros = np.zeros(len(user_ids), dtype=np.float32)
+                return zeros, zeros.copy()
+            rows = np.fromiter(
+                (self._users.get(u, -1) for u in user_ids),
+                dtype=np.int64,
+                count=len(user_ids),
+            )
+            known = rows >= 0
+            likes = np.zeros(len(user_ids), dtype=np.float32)
+            dwell = np.zeros(len(user_ids), dtype=np.float32)
+            likes[known] = self._likes[rows[known], col]
+            dwell[known] = self._dwell[rows[known], col]
+            return likes, dwell
+
+    def user_row(
+        self,
+        user_id: UUID,
+        categories: Sequence[str | None],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Like counts and dwell seconds of one user across `categories` (0 if unknown)."""
+        with self._lock:
+            likes = np.zeros(len(categories), dtype=np.float32)
+            dwell = np.zeros(len(categories), dtype=np.float32)
+            row = self._users.get(user_id)
+            if row is None:
+                return likes, dwell
+            cols = np.fromiter(
+                (self._categories.get(c, -1) for c in categories),
+                dtype=np.int64,
+                count=len(categories),
+            )
+            known = cols >= 0
+            likes[known] = self._likes[row, cols[known]]
+            dwell[known] = self._dwell[row, cols[known]]
+            return likes, dwell
+
+
+category_affinity = CategoryAffinityMatrix(
+    refresh_seconds=settings.category_affinity_refresh_seconds,
+)
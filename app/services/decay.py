@@ -0,0 +1,62 @@
+import calendar
+import math
+import time
+from datetime import datetime
+
+from sqlalchemy import case, func
+
+from app.core.config import settings
+from app.models.rollups import UserVenueAffinity, VenueStats
+
+# Exponential decay rate (per second) of the decayed rollup counters
+DECAY_RATE = math.log(2) / (settings.decay_half_life_days * 86400.0)
+
+# Floor of the SQL decay exponent: Postgres raises on float8 underflow
+# instead of returning 0, e.g. for counters stamped at the epoch
+MIN_EXPONENT = -700.0
+
+
+def epoch_seconds(dt: datetime | None) -> float:
+    """Unix time of a naive UTC datetime; None (unknown age) maps to the epoch."""
+    if dt is None:
+        return 0.0
+    return calendar.timegm(dt.utctimetuple()) + dt.microsecond / 1e6
+
+
+def decay_weight(age_seconds: float) -> float:
+    """How much an event `age_seconds` old still counts."""
+    return math.exp(-DECAY_RATE * max(age_seconds, 0.0))
+
+
+def decay_factor(elapsed):
+    """SQL expression for `decay_weight(elapsed)`, safe for any elapsed time."""
+    exponent = -DECAY_RATE * elapsed
+    return func.exp(case((exponent < MIN_EXPONENT, MIN_EXPONENT), else_=exponent))
+
+
+def decayed(value_column, at_column, now: float | None = None):
+    """
+    SQL expression for the current value of a decayed counter: the stored
+    value, decayed from its last update (`at_column`, unix seconds) to `now`.
+    """
+    now = time.time() if now is None else now
+    return value_column * decay_factor(now - at_column)
+
+
+def current_likes(now: float | None = None):
+    """Decayed `user_venue_affinity` like count, labelled like the lifetime column."""
+    return decayed(
+        UserVenueAffinity.decayed_likes, UserVenueAffinity.decayed_at, now
+    ).label("like_count")
+
+
+def current_dwell(now: float | None = None):
+    """Decayed `user_venue_affinity` dwell seconds, labelled like the lifetime column."""
+    return decayed(
+        UserVenueAffinity.decayed_dwell, UserVenueAffinity.decayed_at, now
+    ).label("dwell_seconds")
+
+
+def trending_positive(now: float | None = None):
+    """Decayed `venue_stats` positive count: the venue's recent engagement."""
+    return decayed(VenueStats.decayed_positive, VenueStats.decayed_at, now)
@@ -0,0 +1,218 @@
+import csv
+import gzip
+import io
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterator, Sequence
+from uuid import UUID
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.models.interactions import UserVenueInteraction
+from app.models.plan import Plan, PlanParticipant
+from app.models.social import UserSocialEdge
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: fall back to gzip CSV
+    pa = None
+    pq = None
+
+WATERMARK_FILE = "watermarks.json"
+
+
+@dataclass(frozen=True)
+class ExportSource:
+    model: type
+    # Write timestamp for incremental exports, set on insert (and update);
+    # None means always full
+    watermark_column: str | None
+
+
+EXPORT_SOURCES: dict[str, ExportSource] = {
+    "user_venue_interactions": ExportSource(UserVenueInteraction, "recorded_at"),
+    "user_social_edges": ExportSource(UserSocialEdge, "created_at"),
+    "plans": ExportSource(Plan, None),
+    "plan_participants": ExportSource(PlanParticipant, "updated_at"),
+}
+
+
+def export_cutoff(lag_seconds: float) -> datetime:
+    """
+    Upper bound of an incremental export. Rows are stamped before their
+    transaction commits, so only stamps older than the longest transaction
+    (`lag_seconds`) are final: nothing can still commit below the cutoff.
+    """
+    return datetime.utcnow() - timedelta(seconds=lag_seconds)
+
+
+def _plain(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def stream_rows(
+    db: Session,
+    table: str,
+    since: datetime | int | None = None,
+    until: datetime | None = None,
+    chunk_size: int = 10_000,
+) -> tuple[list[str], Iterator[list[tuple]]]:
+    """
+    Column names plus an iterator of row chunks for one export source.
+
+    Rows come off a server-side cursor (`stream_results` + `yield_per`), so at
+    most `chunk_size` rows are in memory at a time. With a watermark column,
+    only rows written after `since` and up to `until` are returned, in write
+    order; a row updated since the last export is returned again. An integer
+    `since` is an `id` watermark from older releases: rows above it, plus
+    every row stamped since the timestamp columns were added.
+    """
+    source = EXPORT_SOURCES[table]
+    table_ = source.model.__table__
+    columns = [c.name for c in table_.columns]
+
+    stmt = select(*table_.columns)
+    if source.watermark_column is not None:
+        key = table_.c[source.watermark_column]
+        if isinstance(since, int):
+            stmt = stmt.where(or_(table_.c.id > since, key.isnot(None)))
+        elif since is not None:
+            stmt = stmt.where(key > since)
+        if until is not None:
+            stmt = stmt.where(or_(key <= until, key.is_(None)))
+        stmt = stmt.order_by(key, table_.c.id)
+
+    result = db.execute(
+        stmt.execution_options(stream_results=True, yield_per=chunk_size)
+    )
+
+    def chunks() -> Iterator[list[tuple]]:
+        try:
+            for partition in result.partitions():
+                yield [tuple(_plain(v) for v in row) for row in partition]
+        finally:
+            result.close()
+
+    return columns, chunks()
+
+
+def csv_lines(columns: Sequence[str], chunks: Iterator[list[tuple]]) -> Iterator[str]:
+    """Render row chunks as CSV text, one chunk at a time, header first."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    yield buf.getvalue()
+    for rows in chunks:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(rows)
+        yield buf.getvalue()
+
+
+def _write_chunk(path: str, columns: Sequence[str], rows: list[tuple]) -> str:
+    if pq is not None:
+        path += ".parquet"
+        pq.write_table(
+            pa.table({c: [row[i] for row in rows] for i, c in enumerate(columns)}),
+            path,
+        )
+    else:
+        path += ".csv.gz"
+        with gzip.open(path, "wt", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(rows)
+    return path
+
+
+def _load_watermarks(out_dir: str) -> dict[str, datetime | int]:
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {
+            table: datetime.fromisoformat(mark) if isinstance(mark, str) else mark
+            for table, mark in json.load(f).items()
+        }
+
+
+def _save_watermarks(out_dir: str, watermarks: dict[str, datetime | int]) -> None:
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(
+            {
+                table: mark.isoformat() if isinstance(mark, datetime) else mark
+                for table, mark in watermarks.items()
+            },
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+    os.replace(path + ".tmp", path)
+
+
+def export_tables(
+    db: Session,
+    out_dir: str,
+    tables: Sequence[str] = tuple(EXPORT_SOURCES),
+    chunk_size: int = 100_000,
+    incremental: bool = True,
+    lag_seconds: float = 300.0,
+) -> dict[str, list[str]]:
+    """
+    Export tables into `out_dir/<table>/` as one file per `chunk_size` rows:
+    Parquet when pyarrow is installed, gzip CSV otherwise.
+
+    Incremental exports resume after the watermark recorded by the previous
+    run in `out_dir/watermarks.json` and stop at `export_cutoff(lag_seconds)`,
+    which becomes the next watermark once all of a table's chunks are
+    written. Updated rows are exported again; consumers keep the latest
+    version of each `id`. A full export ignores the selected tables'
+    watermarks and leaves every other table's in place. Returns the files
+    written per table.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    watermarks = _load_watermarks(out_dir)
+    until = export_cutoff(lag_seconds)
+    written: dict[str, list[str]] = {}
+
+    for table in tables:
+        source = EXPORT_SOURCES[table]
+        table_dir = os.path.join(out_dir, table)
+        os.makedirs(table_dir, exist_ok=True)
+        since = watermarks.get(table) if incremental else None
+        incremental_source = source.watermark_column is not None
+        columns, chunks = stream_rows(
+            db,
+            table,
+            since=since,
+            until=until if incremental_source else None,
+            chunk_size=chunk_size,
+        )
+
+        if not incremental_source:
+            # Full snapshots replace the previous one
+            for name in os.listdir(table_dir):
+                os.remove(os.path.join(table_dir, name))
+
+        files: list[str] = []
+        run = f"{until:%Y%m%dT%H%M%S%f}" if incremental_source else "full"
+        for rows in chunks:
+            name = f"{table}-{run}-{len(files):05d}"
+            files.append(_write_chunk(os.path.join(table_dir, name), columns, rows))
+
+        if incremental_source:
+            watermarks[table] = until
+        written[table] = files
+
+    _save_watermarks(out_dir, watermarks)
+    return written
@@ -0,0 +1,393 @@
+import glob
+import json
+import logging
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, Sequence
+from uuid import UUID
+
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.interaction_service import record_interactions
+
+logger = logging.getLogger(__name__)
+
+# Errors that condemn the rows being written rather than the database
+ROW_ERRORS = (IntegrityError, DataError)
+
+# Ceiling of the exponential backoff between failed flushes
+MAX_RETRY_SECONDS = 30.0
+
+
+class BufferFull(Exception):
+    """The write-behind queue is at capacity; the caller should retry later."""
+
+
+@dataclass
+class BufferStats:
+    accepted: int = 0
+    rejected: int = 0
+    flushed: int = 0
+    dropped: int = 0
+    replayed: int = 0
+    retries: int = 0
+
+
+@dataclass
+class _Segment:
+    """Drained events awaiting their commit, and the spool file holding them."""
+
+    path: str | None
+    rows: list[dict]
+    # Rows already committed (or dropped); a retry resumes after them
+    done: int = 0
+
+    @property
+    def remaining(self) -> int:
+        return len(self.rows) - self.done
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _fsync_dir(path: str) -> None:
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _encode(row: dict) -> dict:
+    return {
+        **row,
+        "user_id": str(row["user_id"]),
+        "venue_id": str(row["venue_id"]),
+        "created_at": row["created_at"].isoformat(),
+    }
+
+
+def _decode(row: dict) -> dict:
+    return {
+        **row,
+        "user_id": UUID(row["user_id"]),
+        "venue_id": UUID(row["venue_id"]),
+        # Spools written before events carried their time: treat as arriving now
+        "created_at": (
+            datetime.fromisoformat(row["created_at"])
+            if row.get("created_at")
+            else datetime.utcnow()
+        ),
+    }
+
+
+class InteractionBuffer:
+    """
+    Write-behind queue for interaction events.
+
+    `submit` appends events to this process's spool file (fsynced before it
+    returns) and a bounded in-memory queue, without touching the database.
+    The fsync is a group commit outside the queue lock: one fsync covers every
+    event written so far, and concurrent submitters wait on it rather than
+    each flushing the disk in turn. A
+    background thread drains the queue in micro-batches of `batch_size` once
+    that many are waiting, or every `flush_seconds`, through the same
+    `record_interactions` path as synchronous writes.
+
+    Durability: each process spools to `<spool_path>.<pid>`. On every flush
+    the spool is renamed to a `.flushing` segment holding exactly the drained
+    events, and deleted once they are all committed. Rows the database
+    rejects (integrity or data errors) are dropped one by one; any other
+    failure, such as a lost connection, keeps the segment and its remaining
+    rows and retries with exponential backoff. Segments whose process is gone
+    are replayed by the next process to start, so delivery is at-least-once.
+    A full queue raises `BufferFull` instead of blocking.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_seconds: float,
+        spool_path: str | None,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.spool_path = spool_path or None
+        self.session_factory = session_factory
+        self.stats = BufferStats()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._queue: deque[dict] = deque()
+        # Drained but not yet committed, oldest first; counts toward max_size
+        self._pending: list[_Segment] = []
+        self._pending_rows = 0
+        self._spool_fd: int | None = None
+        # Group commit: `_written_seq` counts spool writes, `_synced_seq` the
+        # writes known to be on disk. Taken before `_cond`, never after it.
+        self._sync_lock = threading.Lock()
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._segment = 0
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def _spool(self) -> str:
+        return f"{self.spool_path}.{os.getpid()}"
+
+    # ----- lifecycle -----
+
+    def start(self) -> None:
+        """Replay events spooled by dead processes, then start the flusher."""
+        if self.running:
+            return
+        if self.spool_path:
+            self._replay()
+            self._spool_fd = os.open(self._spool, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            _fsync_dir(self._spool)
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="interaction-buffer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush everything still queued and stop the flusher."""
+        if not self.running:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._thread = None
+        try:
+            self.flush()
+        except SQLAlchemyError:
+            # Still spooled: the next process to start replays them
+            logger.exception("Leaving %d unflushed interactions in the spool", len(self))
+        with self._sync_lock, self._cond:
+            if self._spool_fd is not None:
+                os.close(self._spool_fd)
+                self._spool_fd = None
+                if os.path.getsize(self._spool) == 0:
+                    os.remove(self._spool)
+
+    # ----- producers -----
+
+    def submit(self, rows: Sequence[dict]) -> None:
+        """Queue interaction rows (dicts shaped like `UserVenueInteraction` rows)."""
+        lines = "".join(json.dumps(_encode(row)) + "\n" for row in rows).encode()
+        written = None
+        with self._cond:
+            if len(self._queue) + self._pending_rows + len(rows) > self.max_size:
+                self.stats.rejected += len(rows)
+                raise BufferFull()
+            if self._spool_fd is not None:
+                os.write(self._spool_fd, lines)
+                self._written_seq += 1
+                written = self._written_seq
+            self._queue.extend(rows)
+            self.stats.accepted += len(rows)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        if written is not None:
+            # Acked events must survive a crash of the whole machine
+            self._sync(written)
+
+    def _sync(self, seq: int) -> None:
+        """Return once spool write `seq` is on disk, fsyncing if nobody has yet."""
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                return
+            with self._cond:
+                target, fd = self._written_seq, self._spool_fd
+            # Holding `_sync_lock` keeps `_rotate` from closing `fd` meanwhile
+            os.fsync(fd)
+            self._synced_seq = target
+
+    def __len__(self) -> int:
+        return len(self._queue) + self._pending_rows
+
+    # ----- flushing -----
+
+    def _run(self) -> None:
+        failures = 0
+        while True:
+            # Back off after failed flushes so an outage is not hammered
+            timeout = min(self.flush_seconds * 2 ** failures, MAX_RETRY_SECONDS)
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping
+                    or (not failures and len(self._queue) >= self.batch_size),
+                    timeout=timeout,
+                )
+                stopping = self._stopping
+            if stopping:
+                return
+            try:
+                self.flush()
+                failures = 0
+            except Exception:
+                failures += 1
+                self.stats.retries += 1
+                logger.exception("Interaction buffer flush failed, retrying in %.1fs",
+                                 min(self.flush_seconds * 2 ** failures, MAX_RETRY_SECONDS))
+
+    def _rotate(self) -> str | None:
+        """
+        Swap in an empty spool; the old one holds exactly the drained events.
+        Called with `_sync_lock` and `_cond` held.
+        """
+        if self._spool_fd is None:
+            return None
+        # Submitters waiting on the group commit are covered by this fsync
+        os.fsync(self._spool_fd)
+        self._synced_seq = self._written_seq
+        os.close(self._spool_fd)
+        self._segment += 1
+        segment = f"{self._spool}.{self._segment}.flushing"
+        os.replace(self._spool, segment)
+        self._spool_fd = os.open(self._spool, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        _fsync_dir(self._spool)
+        return segment
+
+    def flush(self) -> int:
+        """
+        Write every queued event to the database now; returns how many were
+        written. Raises (keeping the events for a retry) if the database is
+        unavailable.
+        """
+        with self._flush_lock:
+            with self._sync_lock, self._cond:
+                if self._queue:
+                    rows = list(self._queue)
+                    self._queue.clear()
+                    self._pending.append(_Segment(self._rotate(), rows))
+                    self._pending_rows += len(rows)
+            written = 0
+            while self._pending:
+                segment = self._pending[0]
+                before = segment.remaining
+                try:
+                    self._write(segment)
+                finally:
+                    progress = before - segment.remaining
+                    self.stats.flushed += progress
+                    with self._cond:
+                        self._pending_rows -= progress
+                written += before
+                self._pending.pop(0)
+                if segment.path is not None:
+                    os.remove(segment.path)
+            return written
+
+    def _write(self, segment: _Segment) -> None:
+        db = self.session_factory()
+        try:
+            while segment.remaining:
+                self._write_batch(db, segment)
+        finally:
+            db.close()
+
+    def _write_batch(self, db: Session, segment: _Segment) -> None:
+        """Commit the next batch of `segment`, advancing `segment.done`."""
+        rows = segment.rows[segment.done:segment.done + self.batch_size]
+        try:
+            record_interactions(db, rows)
+            segment.done += len(rows)
+            return
+        except ROW_ERRORS:
+            db.rollback()
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+        # One bad event (e.g. an unknown venue) must not sink its whole batch
+        for row in rows:
+            try:
+                record_interactions(db, [row])
+            except ROW_ERRORS:
+                db.rollback()
+                self.stats.dropped += 1
+                logger.warning("Dropping unwritable interaction %s", row, exc_info=True)
+            except SQLAlchemyError:
+                db.rollback()
+                raise
+            segment.done += 1
+
+    def _replay(self) -> None:
+        """Write and remove spool files left behind by processes that are gone."""
+        own = f"{self.spool_path}.{os.getpid()}"
+        paths = [self.spool_path]  # unsuffixed spool of older releases
+        for path in glob.glob(f"{glob.escape(self.spool_path)}.*"):
+            pid = path[len(self.spool_path) + 1:].split(".", 1)[0]
+            if not pid.isdigit():
+                continue
+            # Our own pid here means an earlier process that had it is gone
+            if path.startswith(own + ".") or path == own or not _pid_alive(int(pid)):
+                paths.append(path)
+
+        for path in sorted((p for p in paths if os.path.exists(p)), key=os.path.getmtime):
+            # Claim the file atomically, so two starting workers never both replay it
+            self._segment += 1
+            claimed = f"{own}.{self._segment}.flushing"
+            try:
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue
+            segment = _Segment(claimed, list(self._read(claimed)))
+            try:
+                self._write(segment)
+            except SQLAlchemyError:
+                # Keep retrying it with this process's own segments
+                logger.exception("Replay of %s failed, will retry", path)
+                self._pending.append(segment)
+                self._pending_rows += segment.remaining
+                continue
+            self.stats.replayed += len(segment.rows)
+            os.remove(claimed)
+
+    @staticmethod
+    def _read(path: str) -> Iterable[dict]:
+        with open(path) as f:
+            for line in f:
+                try:
+                    yield _decode(json.loads(line))
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    logger.warning("Skipping corrupt spool line in %s", path)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats.__dict__,
+            "queued": len(self._queue),
+            "pending": self._pending_rows,
+            "max_size": self.max_size,
+        }
+
+
+interaction_buffer = InteractionBuffer(
+    max_size=settings.interaction_buffer_max_size,
+    batch_size=settings.interaction_buffer_batch_size,
+    flush_seconds=settings.interaction_buffer_flush_seconds,
+    spool_path=settings.interaction_spool_path,
+)
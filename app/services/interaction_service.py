@@ -0,0 +1,69 @@
+import csv
+import io
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.interactions import UserVenueInteraction
+from app.services.category_affinity import category_affinity
+from app.services.reco_cache import reco_cache
+from app.services.rollup_service import apply_interactions
+
+_COLUMNS = ("user_id", "venue_id", "interaction_type", "dwell_time_seconds", "created_at")
+
+
+def _copy_interactions(db: Session, rows: Sequence[dict]) -> None:
+    """COPY rows into user_venue_interactions on the session's own connection."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    # COPY skips the column's Python-side default
+    recorded_at = datetime.utcnow()
+    for row in rows:
+        writer.writerow([*(row[col] for col in _COLUMNS), recorded_at])
+    buf.seek(0)
+
+    # Same DBAPI connection, so the COPY joins the session's transaction
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {UserVenueInteraction.__tablename__} ({', '.join(_COLUMNS)}, recorded_at) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
+    finally:
+        cursor.close()
+
+
+def insert_interactions(db: Session, rows: Sequence[dict]) -> None:
+    """
+    Bulk-insert raw interaction rows in the caller's transaction: COPY on
+    Postgres through psycopg2, one executemany INSERT elsewhere (including
+    asyncpg, which batches it natively).
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql" and dialect.driver == "psycopg2":
+        _copy_interactions(db, rows)
+    else:
+        db.execute(insert(UserVenueInteraction), list(rows))
+
+
+def record_interactions(db: Session, rows: Sequence[dict]) -> None:
+    """
+    Store interactions and their rollup increments in one transaction, then
+    update the in-memory state that depends on them.
+
+    `rows` are dicts shaped like `UserVenueInteraction` rows, including
+    `created_at`.
+    """
+    # Taken before the commit: a reload after this point may already hold the deltas
+    affinity_version = category_affinity.version
+    category_deltas = apply_interactions(db, rows)
+    insert_interactions(db, rows)
+    db.commit()
+    category_affinity.apply(category_deltas, affinity_version)
+    for user_id in {row["user_id"] for row in rows}:
+        reco_cache.invalidate_user(user_id)
@@ -0,0 +1,337 @@
+import threading
+from dataclasses import dataclass
+from uuid import UUID
+
+import joblib
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sqlalchemy.orm import Session
+
+from app.models.booking import Booking
+from app.models.plan import Plan, PlanParticipant
+from app.models.rollups import UserCategoryAffinity, UserVenueAffinity, VenueStats
+from app.models.social import UserSocialEdge
+from app.models.user import User
+from app.models.venue import Venue
+from app.services.category_affinity import category_affinity
+from app.services.decay import current_dwell, current_likes
+from app.services.social_graph import social_graph
+from app.services.venue_scoring import (
+    SCORE_DTYPE,
+    SPATIAL_DECAY_PER_KM,
+    VenueCatalog,
+    popularity_scores,
+    preference_scores,
+)
+
+# Column order of every feature matrix, saved with the model
+FEATURES = ("spatial", "preference", "popularity", "category", "social")
+
+# A plan that led to a booking counts this much more than one that did not
+BOOKED_WEIGHT = 2.0
+
+
+def spatial_scores(dist_km: np.ndarray) -> np.ndarray:
+    return np.exp(dist_km * SCORE_DTYPE(-SPATIAL_DECAY_PER_KM))
+
+
+def category_scores(like_counts: np.ndarray, dwell_seconds: np.ndarray) -> np.ndarray:
+    """Softer normalization than venue preference, as in people recos."""
+    return np.minimum(
+        SCORE_DTYPE(1.0),
+        like_counts * SCORE_DTYPE(0.3) + dwell_seconds / SCORE_DTYPE(600.0),
+    )
+
+
+def feature_matrix(
+    spatial: np.ndarray,
+    preference: np.ndarray,
+    popularity: np.ndarray,
+    category: np.ndarray,
+    social: np.ndarray,
+) -> np.ndarray:
+    """(n, len(FEATURES)) float32 matrix from aligned feature columns."""
+    return np.column_stack([spatial, preference, popularity, category, social]).astype(
+        SCORE_DTYPE, copy=False
+    )
+
+
+# ----- offline: bulk feature extraction -----
+
+
+def _gather(matrix: csr_matrix, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """matrix[rows[i], cols[i]] for every i, as a dense float32 array."""
+    if not rows.size:
+        return np.zeros(0, dtype=SCORE_DTYPE)
+    return np.asarray(matrix[rows, cols], dtype=SCORE_DTYPE).ravel()
+
+
+@dataclass
+class FeatureTables:
+    """
+    Column-oriented snapshot of everything the ranker features read.
+
+    Loaded with a few column queries (no ORM objects); the per-pair rollups
+    become sparse (users x venues) / (users x categories) matrices so that the
+    features of millions of (user, venue) pairs are array gathers.
+    """
+
+    user_positions: dict[UUID, int]
+    home_lat: np.ndarray
+    home_lng: np.ndarray
+    catalog: VenueCatalog
+    max_pop: float
+    preference: csr_matrix
+    category: csr_matrix
+    social: csr_matrix
+
+    @classmethod
+    def load(cls, db: Session) -> "FeatureTables":
+        users = db.query(User.id, User.home_lat, User.home_lng).all()
+        user_positions = {row.id: i for i, row in enumerate(users)}
+        home_lat = np.array([row.home_lat for row in users], dtype=np.float64)
+        home_lng = np.array([row.home_lng for row in users], dtype=np.float64)
+
+        catalog = VenueCatalog.from_rows(
+            db.query(Venue.id, Venue.name, Venue.lat, Venue.lng, Venue.category).all(),
+            dict(db.query(VenueStats.venue_id, VenueStats.positive_count).all()),
+        )
+        n_users, n_venues = len(users), len(catalog)
+
+        affinity = [
+            (user_positions.get(u), catalog.position(v), likes, dwell)
+            for u, v, likes, dwell in db.query(
+                UserVenueAffinity.user_id,
+                UserVenueAffinity.venue_id,
+                current_likes(),
+                current_dwell(),
+            )
+        ]
+        affinity = [row for row in affinity if row[0] is not None and row[1] is not None]
+        preference = csr_matrix(
+            (
+                preference_scores(
+                    np.array([row[2] for row in affinity], dtype=SCORE_DTYPE),
+                    np.array([row[3] for row in affinity], dtype=SCORE_DTYPE),
+                ),
+                ([row[0] for row in affinity], [row[1] for row in affinity]),
+            ),
+            shape=(n_users, n_venues),
+        )
+
+        category_codes = {category: i for i, category in enumerate(catalog.categories)}
+        by_category = [
+            (user_positions.get(u), category_codes.get(c), likes, dwell)
+            for u, c, likes, dwell in db.query(
+                UserCategoryAffinity.user_id,
+                UserCategoryAffinity.category,
+                UserCategoryAffinity.like_count,
+                UserCategoryAffinity.dwell_seconds,
+            )
+        ]
+        by_category = [row for row in by_category if row[0] is not None and row[1] is not None]
+        category = csr_matrix(
+            (
+                category_scores(
+                    np.array([row[2] for row in by_category], dtype=SCORE_DTYPE),
+                    np.array([row[3] for row in by_category], dtype=SCORE_DTYPE),
+                ),
+                ([row[0] for row in by_category], [row[1] for row in by_category]),
+            ),
+            shape=(n_users, len(catalog.categories)),
+        )
+
+        # social[u, v] = sum over u's friends f of strength(u, f) * preference[f, v]
+        edges = [
+            (user_positions.get(u), user_positions.get(f), strength or 0.0)
+            for u, f, strength in db.query(
+                UserSocialEdge.user_id,
+                UserSocialEdge.other_user_id,
+                UserSocialEdge.strength,
+            )
+        ]
+        # Duplicate edges keep their strongest strength, as in the social graph
+        # served online (csr_matrix would sum them)
+        strongest: dict[tuple[int, int], float] = {}
+        for u, f, strength in edges:
+            if u is not None and f is not None:
+                strongest[(u, f)] = max(strongest.get((u, f), 0.0), strength)
+        strengths = csr_matrix(
+            (
+                np.array(list(strongest.values()), dtype=SCORE_DTYPE),
+                ([u for u, _ in strongest], [f for _, f in strongest]),
+            ),
+            shape=(n_users, n_users),
+        )
+        social = (strengths @ preference).tocsr()
+        np.minimum(social.data, 1.0, out=social.data)
+
+        return cls(
+            user_positions=user_positions,
+            home_lat=home_lat,
+            home_lng=home_lng,
+            catalog=catalog,
+            max_pop=float(catalog.popularity.max(initial=0)),
+            preference=preference,
+            category=category,
+            social=social,
+        )
+
+    def features(self, user_rows: np.ndarray, venue_cols: np.ndarray) -> np.ndarray:
+        """Feature matrix of the (user_rows[i], venue_cols[i]) pairs."""
+        catalog = self.catalog
+        dist_km = catalog.pair_distances_km(
+            self.home_lat[user_rows], self.home_lng[user_rows], venue_cols
+        )
+        return feature_matrix(
+            spatial_scores(dist_km),
+            _gather(self.preference, user_rows, venue_cols),
+            popularity_scores(catalog.popularity[venue_cols], self.max_pop),
+            _gather(self.category, user_rows, catalog.category_codes[venue_cols]),
+            _gather(self.social, user_rows, venue_cols),
+        )
+
+
+def training_pairs(
+    db: Session,
+    tables: FeatureTables,
+    negatives_per_positive: int = 4,
+    seed: int = 0,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (user_rows, venue_cols, labels, sample_weights) from plan outcomes.
+
+    Organizers and participants who did not decline a plan are positives for
+    its venue, weighted up if the plan was booked; declines are negatives.
+    Each positive is matched with random venues as sampled negatives.
+    """
+    booked = {plan_id for (plan_id,) in db.query(Booking.plan_id).distinct()}
+    outcomes = (
+        db.query(Plan.id, Plan.venue_id, PlanParticipant.user_id, PlanParticipant.status)
+        .join(PlanParticipant, PlanParticipant.plan_id == Plan.id)
+        .all()
+    )
+
+    users, venues, labels, weights = [], [], [], []
+    for plan_id, venue_id, user_id, status in outcomes:
+        row, col = tables.user_positions.get(user_id), tables.catalog.position(venue_id)
+        if row is None or col is None or np.isnan(tables.home_lat[row]):
+            continue
+        positive = status != "declined"
+        users.append(row)
+        venues.append(col)
+        labels.append(int(positive))
+        weights.append(BOOKED_WEIGHT if positive and plan_id in booked else 1.0)
+
+    users = np.array(users, dtype=np.int64)
+    venues = np.array(venues, dtype=np.int64)
+    labels = np.array(labels, dtype=np.int64)
+    weights = np.array(weights, dtype=np.float64)
+
+    positives = users[labels == 1]
+    if positives.size and len(tables.catalog) and negatives_per_positive:
+        rng = np.random.default_rng(seed)
+        sampled_users = np.repeat(positives, negatives_per_positive)
+        users = np.concatenate([users, sampled_users])
+        venues = np.concatenate(
+            [venues, rng.integers(0, len(tables.catalog), size=sampled_users.size)]
+        )
+        labels = np.concatenate([labels, np.zeros(sampled_users.size, dtype=np.int64)])
+        weights = np.concatenate([weights, np.ones(sampled_users.size)])
+
+    return users, venues, labels, weights
+
+
+def train_ranker(
+    db: Session,
+    model: str = "logistic",
+    negatives_per_positive: int = 4,
+    seed: int = 0,
+):
+    """Fit a logistic regression ("logistic") or GBDT ("gbdt") on plan outcomes."""
+    tables = FeatureTables.load(db)
+    users, venues, labels, weights = training_pairs(db, tables, negatives_per_positive, seed)
+    if np.unique(labels).size < 2:
+        raise ValueError("Need both positive and negative plan outcomes to train a ranker")
+
+    if model == "gbdt":
+        estimator = HistGradientBoostingClassifier(random_state=seed)
+    else:
+        estimator = LogisticRegression(max_iter=1000)
+    estimator.fit(tables.features(users, venues), labels, sample_weight=weights)
+    return estimator
+
+
+# ----- online: batched inference -----
+
+
+def serving_features(
+    db: Session,
+    user_id: UUID,
+    catalog: VenueCatalog,
+    dist_km: np.ndarray,
+    preference: np.ndarray,
+    popularity: np.ndarray,
+) -> np.ndarray:
+    """
+    Feature matrix of one user's candidates, reusing the arrays the heuristic
+    already computed; category and social features come from the in-memory
+    affinity matrix and social graph plus one rollup query over the friends.
+    """
+    likes, dwell = category_affinity.ensure_loaded(db).user_row(user_id, catalog.categories)
+    category = category_scores(likes, dwell)[catalog.category_codes]
+
+    social = np.zeros(len(catalog), dtype=SCORE_DTYPE)
+    friends = social_graph.ensure_loaded(db).friends(user_id)
+    if friends:
+        for other_id, venue_id, like_count, dwell_seconds in (
+            db.query(
+                UserVenueAffinity.user_id,
+                UserVenueAffinity.venue_id,
+                current_likes(),
+                current_dwell(),
+            )
+            .filter(
+                UserVenueAffinity.user_id.in_(list(friends)),
+                UserVenueAffinity.venue_id.in_(catalog.ids),
+            )
+            .all()
+        ):
+            social[catalog.position(venue_id)] += friends[other_id] * min(
+                1.0, like_count * 0.5 + dwell_seconds / 300.0
+            )
+        np.minimum(social, 1.0, out=social)
+
+    return feature_matrix(spatial_scores(dist_km), preference, popularity, category, social)
+
+
+class LearnedRanker:
+    """Holds the ranker artifact loaded at startup; swapped atomically on reload."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.model = None
+
+    def load(self, path: str) -> None:
+        artifact = joblib.load(path)
+        if tuple(artifact["features"]) != FEATURES:
+            raise ValueError(f"Ranker at {path} was trained on {artifact['features']}, not {FEATURES}")
+        self.set_model(artifact["model"])
+
+    def set_model(self, model) -> None:
+        with self._lock:
+            self.model = model
+
+
+learned_ranker = LearnedRanker()
+
+
+def save_ranker(model, path: str) -> None:
+    joblib.dump({"features": FEATURES, "model": model}, path)
+
+
+def ranker_scores(model, features: np.ndarray) -> np.ndarray:
+    """P(positive outcome) for every row, in one batched predict_proba call."""
+    return model.predict_proba(features)[:, 1].astype(SCORE_DTYPE)
@@ -0,0 +1,264 @@
+import threading
+from uuid import UUID
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.neighbors import NearestNeighbors
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.rollups import UserVenueAffinity
+from app.models.user import User
+from app.schemas.reco import VenueReco
+from app.services.offload import offload
+from app.services.venue_index import venue_index
+from app.services.venue_scoring import (
+    SCORE_DTYPE,
+    SPATIAL_DECAY_PER_KM,
+    SPATIAL_WEIGHT,
+    haversine_km_many,
+)
+
+
+class MFUnavailable(Exception):
+    """The MF engine was asked for explicitly but cannot serve the user."""
+
+
+def interaction_strength(like_count: np.ndarray, dwell_seconds: np.ndarray) -> np.ndarray:
+    """Implicit feedback strength, on the heuristic's scale: 1 like ~0.5, 300s ~1.0."""
+    return like_count * 0.5 + dwell_seconds / 300.0
+
+
+def _als_step(confidence: csr_matrix, fixed: np.ndarray, reg: float) -> np.ndarray:
+    """
+    Solve every row's factors against the `fixed` side (Hu, Koren & Volinsky).
+
+    `confidence` holds c_ui - 1 for observed pairs; unobserved pairs have
+    confidence 1 and preference 0, which the shared `fixed.T @ fixed` covers.
+    """
+    n_factors = fixed.shape[1]
+    gram = fixed.T @ fixed + reg * np.eye(n_factors)
+    solved = np.zeros((confidence.shape[0], n_factors))
+    indptr, indices, data = confidence.indptr, confidence.indices, confidence.data
+    for row in range(confidence.shape[0]):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        observed = fixed[indices[start:end]]
+        conf = data[start:end]
+        a = gram + (observed.T * conf) @ observed
+        b = observed.T @ (1.0 + conf)
+        solved[row] = np.linalg.solve(a, b)
+    return solved
+
+
+def train_implicit_als(
+    confidence: csr_matrix,
+    factors: int = 32,
+    reg: float = 0.1,
+    iterations: int = 10,
+    seed: int = 0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Alternating least squares on a (users x venues) c_ui - 1 matrix."""
+    rng = np.random.default_rng(seed)
+    user_factors = rng.normal(scale=0.01, size=(confidence.shape[0], factors))
+    venue_factors = rng.normal(scale=0.01, size=(confidence.shape[1], factors))
+    by_venue = confidence.T.tocsr()
+    for _ in range(iterations):
+        user_factors = _als_step(confidence, venue_factors, reg)
+        venue_factors = _als_step(by_venue, user_factors, reg)
+    return user_factors.astype(np.float32), venue_factors.astype(np.float32)
+
+
+class MFModel:
+    """
+    User and venue embeddings with inner-product top-K retrieval.
+
+    Maximum inner product search is reduced to Euclidean nearest neighbours by
+    appending sqrt(M^2 - |v|^2) to every venue vector (M = max |v|) and 0 to
+    the query, so a scikit-learn ball tree returns venues in inner-product
+    order.
+    """
+
+    def __init__(
+        self,
+        user_ids: list[UUID],
+        venue_ids: list[UUID],
+        user_factors: np.ndarray,
+        venue_factors: np.ndarray,
+    ):
+        self.user_ids = user_ids
+        self.venue_ids = venue_ids
+        self.user_factors = user_factors
+        self.venue_factors = venue_factors
+        self._user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+
+        norms = np.linalg.norm(venue_factors, axis=1)
+        extra = np.sqrt(np.maximum(norms.max(initial=0.0) ** 2 - norms**2, 0.0))
+        self._nn = None
+        if len(venue_ids):
+            self._nn = NearestNeighbors(algorithm="ball_tree").fit(
+                np.hstack([venue_factors, extra[:, None]])
+            )
+
+    @classmethod
+    def train(cls, db: Session, alpha: float = 10.0, **als_kwargs) -> "MFModel":
+        """Fit embeddings on the `user_venue_affinity` rollup of the interaction log."""
+        rows = db.query(
+            UserVenueAffinity.user_id,
+            UserVenueAffinity.venue_id,
+            UserVenueAffinity.like_count,
+            UserVenueAffinity.dwell_seconds,
+        ).all()
+
+        user_ids = sorted({row.user_id for row in rows})
+        venue_ids = sorted({row.venue_id for row in rows})
+        user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+        venue_index_ = {venue_id: i for i, venue_id in enumerate(venue_ids)}
+
+        strength = interaction_strength(
+            np.array([row.like_count for row in rows], dtype=np.float64),
+            np.array([row.dwell_seconds for row in rows], dtype=np.float64),
+        )
+        confidence = csr_matrix(
+            (
+                alpha * strength,
+                (
+                    [user_index[row.user_id] for row in rows],
+                    [venue_index_[row.venue_id] for row in rows],
+                ),
+            ),
+            shape=(len(user_ids), len(venue_ids)),
+        )
+        confidence.eliminate_zeros()
+
+        user_factors, venue_factors = train_implicit_als(confidence, **als_kwargs)
+        return cls(user_ids, venue_ids, user_factors, venue_factors)
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            user_ids=np.array([str(u) for u in self.user_ids]),
+            venue_ids=np.array([str(v) for v in self.venue_ids]),
+            user_factors=self.user_factors,
+            venue_factors=self.venue_factors,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "MFModel":
+        with np.load(path) as artifact:
+            return cls(
+                [UUID(u) for u in artifact["user_ids"]],
+                [UUID(v) for v in artifact["venue_ids"]],
+                artifact["user_factors"],
+                artifact["venue_factors"],
+            )
+
+    def recommend(self, user_id: UUID, k: int) -> list[tuple[UUID, float]] | None:
+        """Top-K (venue_id, inner product) for a user, or None if the user is unknown."""
+        row = self._user_index.get(user_id)
+        if row is None or self._nn is None:
+            return None
+        query = np.append(self.user_factors[row], 0.0)[None, :]
+        _, neighbors = self._nn.kneighbors(query, n_neighbors=min(k, len(self.venue_ids)))
+        neighbors = neighbors[0]
+        scores = self.venue_factors[neighbors] @ self.user_factors[row]
+        return [(self.venue_ids[i], float(s)) for i, s in zip(neighbors, scores)]
+
+
+class MFEngine:
+    """Holds the model loaded at startup; swapped atomically on reload."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.model: MFModel | None = None
+
+    def load(self, path: str) -> None:
+        model = MFModel.load(path)
+        with self._lock:
+            self.model = model
+
+    def set_model(self, model: MFModel | None) -> None:
+        with self._lock:
+            self.model = model
+
+
+mf_engine = MFEngine()
+
+
+def recommend_venues_mf(
+    db: Session,
+    user_id: UUID,
+    limit: int = 10,
+) -> list[VenueReco] | None:
+    """
+    Venue recommendations from the matrix factorization model.
+
+    The model retrieves up to `settings.reco_candidate_budget` venues by
+    inner product; those are re-ranked on the heuristic's scale, the inner
+    product (relative to the best candidate's) taking the preference and
+    popularity weight and the spatial decay from the user's home the spatial
+    weight, so a venue the model likes on the other side of the city does not
+    beat a comparable one next door.
+
+    Returns None when no model is loaded or the user is not in it (cold
+    start), so the caller can fall back to the heuristic scorer.
+    """
+    model = mf_engine.model
+    if model is None:
+        return None
+
+    user = db.query(User).get(user_id)
+    if not user or user.home_lat is None or user.home_lng is None:
+        return []
+
+    # Over-fetch: venues deleted since training are skipped, and distance
+    # re-ranks the rest
+    hits = offload(model.recommend, user_id, max(limit + 10, settings.reco_candidate_budget))
+    if hits is None:
+        return None
+
+    index = venue_index.ensure_loaded(db)
+    rows = {row[0]: row for row in index.get(venue_id for venue_id, _ in hits)}
+    hits = [(venue_id, score) for venue_id, score in hits if venue_id in rows]
+    if not hits:
+        return []
+
+    def rank():
+        dist_km = haversine_km_many(
+            user.home_lat,
+            user.home_lng,
+            np.array([rows[venue_id][2] for venue_id, _ in hits]),
+            np.array([rows[venue_id][3] for venue_id, _ in hits]),
+        )
+        return dist_km, blend_mf_scores(np.array([score for _, score in hits]), dist_km)
+
+    dist_km, scores = offload(rank)
+    order = np.argsort(-scores, kind="stable")[:limit]
+    return [
+        VenueReco.model_construct(
+            venue_id=hits[i][0],
+            venue_name=rows[hits[i][0]][1],
+            score=float(scores[i]),
+            distance_km=float(dist_km[i]),
+        )
+        for i in order
+    ]
+
+
+def blend_mf_scores(inner_products: np.ndarray, dist_km: np.ndarray) -> np.ndarray:
+    """
+    Blend MF inner products with spatial proximity, on the heuristic's scale.
+
+    Inner products are scaled against the best candidate's into 0..1 and take
+    the non-spatial weight; negative ones count as no affinity.
+    """
+    best = inner_products.max(initial=0.0)
+    if best > 0:
+        relevance = np.clip(inner_products / best, 0.0, 1.0)
+    else:
+        relevance = np.zeros_like(inner_products)
+    scores = np.exp(dist_km * SCORE_DTYPE(-SPATIAL_DECAY_PER_KM))
+    scores *= SCORE_DTYPE(SPATIAL_WEIGHT)
+    scores += SCORE_DTYPE(1.0 - SPATIAL_WEIGHT) * relevance.astype(SCORE_DTYPE)
+    return scores
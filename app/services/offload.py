@@ -0,0 +1,24 @@
+from typing import Callable, TypeVar
+
+import anyio.to_thread
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+
+T = TypeVar("T")
+
+
+def offload(fn: Callable[..., T], *args) -> T:
+    """
+    `fn(*args)` for CPU-bound work inside code that also queries the database.
+
+    Under `AsyncSession.run_sync` (the async routers) the code runs in a
+    greenlet on the event loop: its queries are awaited, but plain CPU work
+    would block the loop. There `fn` runs in a worker thread while the loop
+    serves other requests. Everywhere else (sync routes, which already run in
+    the threadpool, and offline jobs) it is a plain call.
+
+    `fn` must not touch the session.
+    """
+    if in_greenlet():
+        return await_only(anyio.to_thread.run_sync(fn, *args))
+    return fn(*args)
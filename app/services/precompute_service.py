@@ -0,0 +1,134 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import delete, exists, func, insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.precomputed import PrecomputedReco, PrecomputeGeneration
+from app.models.rollups import UserVenueAffinity
+from app.models.social import UserSocialEdge
+from app.models.user import User
+from app.schemas.reco import UserReco, VenueReco
+from app.services.reco_service import (
+    recommend_people_for_user,
+    recommend_venues_for_users,
+)
+
+VENUES = "venues"
+PEOPLE = "people"
+
+
+def precompute_recos(db: Session, top_k: int, batch_size: int) -> int:
+    """
+    Compute top-K venue and people recommendations for every user.
+
+    Rows are written under a new generation number, one committed batch at a
+    time, so readers keep getting the previous generation for users the job
+    has not reached yet. Older generations are deleted once the job is done.
+    Returns the new generation.
+    """
+    generation = allocate_generation(db)
+
+    user_ids = [user_id for (user_id,) in db.query(User.id).order_by(User.id)]
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        now = datetime.utcnow()
+        rows = []
+
+        for user_id, recos in recommend_venues_for_users(db, batch, limit=top_k):
+            rows.append(
+                {
+                    "user_id": user_id,
+                    "kind": VENUES,
+                    "generation": generation,
+                    "recos": [r.model_dump(mode="json") for r in recos],
+                    "created_at": now,
+                }
+            )
+        for user_id in batch:
+            recos = recommend_people_for_user(db, user_id=user_id, venue_id=None, limit=top_k)
+            rows.append(
+                {
+                    "user_id": user_id,
+                    "kind": PEOPLE,
+                    "generation": generation,
+                    "recos": [r.model_dump(mode="json") for r in recos],
+                    "created_at": now,
+                }
+            )
+
+        if rows:
+            db.execute(insert(PrecomputedReco), rows)
+        db.commit()
+
+    db.execute(delete(PrecomputedReco).where(PrecomputedReco.generation < generation))
+    db.execute(delete(PrecomputeGeneration).where(PrecomputeGeneration.generation < generation))
+    db.commit()
+    return generation
+
+
+def allocate_generation(db: Session) -> int:
+    """
+    Claim the next generation number. Concurrent jobs may pick the same
+    number, but only one can insert it; the others retry with the next one.
+    """
+    while True:
+        generation = max(
+            db.query(func.max(PrecomputedReco.generation)).scalar() or 0,
+            db.query(func.max(PrecomputeGeneration.generation)).scalar() or 0,
+        ) + 1
+        db.add(PrecomputeGeneration(generation=generation))
+        try:
+            db.commit()
+            return generation
+        except IntegrityError:
+            db.rollback()
+
+
+def get_precomputed(
+    db: Session,
+    user_id: UUID,
+    kind: str,
+    limit: int,
+    top_k: int,
+) -> list[dict] | None:
+    """
+    Latest precomputed recos for a user, or None when the caller must fall
+    back to live scoring (user not covered yet, `limit` beyond `top_k`, or
+    the user has interacted or gained a social edge since they were computed).
+    """
+    if limit > top_k:
+        return None
+    computed_at = PrecomputedReco.created_at
+    recos = (
+        db.query(PrecomputedReco.recos)
+        .filter(
+            PrecomputedReco.user_id == user_id,
+            PrecomputedReco.kind == kind,
+            ~exists().where(
+                UserVenueAffinity.user_id == user_id,
+                UserVenueAffinity.updated_at >= computed_at,
+            ),
+            ~exists().where(
+                or_(UserSocialEdge.user_id == user_id, UserSocialEdge.other_user_id == user_id),
+                UserSocialEdge.created_at >= computed_at,
+            ),
+        )
+        .order_by(PrecomputedReco.generation.desc())
+        .limit(1)
+        .scalar()
+    )
+    if recos is None:
+        return None
+    return recos[:limit]
+
+
+def get_precomputed_venues(db: Session, user_id: UUID, limit: int, top_k: int) -> list[VenueReco] | None:
+    recos = get_precomputed(db, user_id, VENUES, limit, top_k)
+    return None if recos is None else [VenueReco(**r) for r in recos]
+
+
+def get_precomputed_people(db: Session, user_id: UUID, limit: int, top_k: int) -> list[UserReco] | None:
+    recos = get_precomputed(db, user_id, PEOPLE, limit, top_k)
+    return None if recos is None else [UserReco(**r) for r in recos]
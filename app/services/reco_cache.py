@@ -0,0 +1,213 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable, TypeVar
+from uuid import UUID
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Slots of the hashed per-user version table behind reco ETags
+USER_VERSION_SLOTS = 1 << 16
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+@dataclass
+class _Entry:
+    value: object
+    user_id: UUID
+    expires_at: float
+    size: int
+
+
+def _estimate_size(value: object) -> int:
+    """Rough, shallow size of a cached reco list in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, list):
+        for item in value:
+            size += sys.getsizeof(item)
+            size += sum(sys.getsizeof(v) for v in getattr(item, "__dict__", {}).values())
+    return size
+
+
+class RecoCache:
+    """
+    Bounded LRU + TTL cache for recommendation results.
+
+    Entries are bounded both by count and by an estimated memory footprint.
+    Each entry is indexed by the user it was computed for, so writes can drop
+    exactly that user's entries. Venue reco keys embed `catalog_version`;
+    bumping it on venue creation makes every older venue entry unreachable,
+    and LRU eviction reclaims them.
+
+    `catalog_version` and `user_version` only ever grow, so they also serve
+    as the versions behind the ETags of the venue and reco endpoints. User
+    versions live in a fixed table of hashed slots, so memory stays constant
+    however many users write; users sharing a slot only cost each other a
+    spurious ETag change, never a stale 304.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        user_version_slots: int = USER_VERSION_SLOTS,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self.catalog_version = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._keys_by_user: dict[UUID, set[Hashable]] = {}
+        self._bytes = 0
+        # Bumped by every invalidation, to give user versions fresh values
+        self._write_seq = 0
+        # Slot -> `_write_seq` of the latest invalidation of a user hashing there.
+        # A result computed across a change of its user's version or of
+        # `catalog_version` may already be stale, so it is returned but not
+        # stored; other users' writes do not affect it.
+        self._user_versions = [0] * user_version_slots
+
+    # ----- keys -----
+
+    def venue_key(
+        self, user_id: UUID, limit: int, engine: str = "heuristic", fallback: bool = True
+    ) -> Hashable:
+        return ("venues", user_id, limit, engine, fallback, self.catalog_version)
+
+    def people_key(self, user_id: UUID, venue_id: UUID | None, limit: int) -> Hashable:
+        return ("people", user_id, venue_id, limit)
+
+    # ----- lookups -----
+
+    def get_or_compute(self, key: Hashable, user_id: UUID, compute: Callable[[], T]) -> T:
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        hit, value = self._get(key)
+        if hit:
+            return value
+        versions = self._versions(user_id)
+        value = compute()
+        self._put(key, user_id, value, versions)
+        return value
+
+    async def get_or_compute_async(
+        self, key: Hashable, user_id: UUID, compute: Callable[[], Awaitable[T]]
+    ) -> T:
+        """`get_or_compute` for a coroutine computation."""
+        hit, value = self._get(key)
+        if hit:
+            return value
+        versions = self._versions(user_id)
+        value = await compute()
+        self._put(key, user_id, value, versions)
+        return value
+
+    def _versions(self, user_id: UUID) -> tuple[int, int]:
+        return self.catalog_version, self.user_version(user_id)
+
+    def _get(self, key: Hashable) -> tuple[bool, object]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return False, None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return True, entry.value
+
+    def _put(
+        self, key: Hashable, user_id: UUID, value: object, versions: tuple[int, int]
+    ) -> None:
+        size = _estimate_size(value)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if versions != self._versions(user_id):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(
+                value=value,
+                user_id=user_id,
+                expires_at=time.monotonic() + self.ttl_seconds,
+                size=size,
+            )
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        user_keys = self._keys_by_user.get(entry.user_id)
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[entry.user_id]
+
+    # ----- invalidation -----
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        """Drop every venue and people entry computed for `user_id`."""
+        with self._lock:
+            self._write_seq += 1
+            self._user_versions[hash(user_id) % len(self._user_versions)] = self._write_seq
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+                self.stats.invalidations += 1
+
+    def user_version(self, user_id: UUID) -> int:
+        """Changes whenever `user_id`'s recos are invalidated."""
+        return self._user_versions[hash(user_id) % len(self._user_versions)]
+
+    def bump_catalog_version(self) -> None:
+        with self._lock:
+            self.catalog_version += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self._bytes = 0
+            self.stats = CacheStats()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats.__dict__,
+                "entries": len(self._entries),
+                "estimated_bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "catalog_version": self.catalog_version,
+            }
+
+
+reco_cache = RecoCache(
+    max_entries=settings.reco_cache_max_entries,
+    max_bytes=settings.reco_cache_max_bytes,
+    ttl_seconds=settings.reco_cache_ttl_seconds,
+)
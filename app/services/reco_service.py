@@ -1,15 +1,39 @@
+import numpy as np
 from sqlalchemy.orm import Session
 from uuid import UUID
-from typing import List
-from math import exp, radians, sin, cos, atan2, sqrt
+from typing import Iterator, List, Sequence
+from math import radians, sin, cos, atan2, sqrt
 
+from app.core.config import settings
 from app.models.user import User
 from app.models.venue import Venue
-from app.models.interactions import UserVenueInteraction
-from app.models.social import UserSocialEdge
+from app.models.rollups import UserVenueAffinity, VenueStats
 from app.schemas.reco import VenueReco, UserReco
-
-EARTH_RADIUS_KM = 6371.0
+from app.services.venue_scoring import (
+    EARTH_RADIUS_KM,
+    SCORE_DTYPE,
+    VenueCatalog,
+    blend_scores,
+    popularity_scores,
+    preference_scores,
+    top_k,
+    top_k_rows,
+)
+from app.services.category_affinity import category_affinity
+from app.services.decay import current_dwell, current_likes
+from app.services.learned_ranker import learned_ranker, ranker_scores, serving_features
+from app.services.offload import offload
+from app.services.social_graph import social_graph
+from app.services.venue_index import venue_index
+from app.services.venue_pipeline import CandidateContext, venue_pipeline
+
+# Friend-of-friend candidates rank on their best 2-hop path strength, damped
+# so that they sit below comparable direct friends
+FRIEND_OF_FRIEND_DECAY = 0.5
+
+# Peak scratch bytes per (user, venue) cell of a batch scoring chunk: the
+# float32 feature, distance and score matrices plus argpartition's indices
+BATCH_BYTES_PER_CELL = 32
 
 
 def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -22,6 +46,18 @@ def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return EARTH_RADIUS_KM * c
 
 
+def geographic_centroid(lats: np.ndarray, lngs: np.ndarray) -> tuple[float, float]:
+    """
+    (lat, lng) of the mean of the points as unit vectors, so that a group
+    straddling the antimeridian centers near it rather than across the globe.
+    """
+    lat_rad, lng_rad = np.radians(lats), np.radians(lngs)
+    x = np.mean(np.cos(lat_rad) * np.cos(lng_rad))
+    y = np.mean(np.cos(lat_rad) * np.sin(lng_rad))
+    z = np.mean(np.sin(lat_rad))
+    return float(np.degrees(np.arctan2(z, np.hypot(x, y)))), float(np.degrees(np.arctan2(y, x)))
+
+
 def recommend_venues_for_user(
     db: Session,
     user_id: UUID,
@@ -30,76 +66,282 @@ def recommend_venues_for_user(
     """
     Recommend venues for a user, blending:
     - spatial proximity
-    - user-specific preferences (likes + dwell time)
+    - user-specific preferences (likes + dwell time, decayed by age)
     - global popularity
+
+    When a learned ranker is loaded, the candidates are instead ranked by its
+    predicted plan probability over the same features plus category affinity
+    and friends' engagement.
+
+    Only the candidates proposed by `venue_pipeline` (nearby, previously
+    engaged, popular and friends' favorite venues, capped at
+    `settings.reco_candidate_budget`) are scored.
     """
 
     user = db.query(User).get(user_id)
     if not user or user.home_lat is None or user.home_lng is None:
         return []
 
-    venues = db.query(Venue).all()
-    if not venues:
+    index = venue_index.ensure_loaded(db)
+    if not len(index):
         return []
 
-    # Global popularity: how many users liked/interested in each venue
-    popularity_counts: dict[UUID, int] = {}
-    for v in venues:
-        count = (
-            db.query(UserVenueInteraction)
-            .filter(
-                UserVenueInteraction.venue_id == v.id,
-                UserVenueInteraction.interaction_type.in_(["like", "interest"]),
-            )
-            .count()
+    # User-specific preferences, one user_venue_affinity row per venue, with
+    # older engagement decayed away
+    like_counts: dict[UUID, float] = {}
+    view_times: dict[UUID, float] = {}
+    for venue_id, like_count, view_time in (
+        db.query(
+            UserVenueAffinity.venue_id,
+            current_likes(),
+            current_dwell(),
         )
-        popularity_counts[v.id] = count
+        .filter(UserVenueAffinity.user_id == user_id)
+        .all()
+    ):
+        like_counts[venue_id] = like_count
+        view_times[venue_id] = view_time
+
+    ctx = CandidateContext(
+        db=db,
+        index=index,
+        lat=user.home_lat,
+        lng=user.home_lng,
+        user_ids=[user_id],
+        engaged={
+            venue_id: like_counts[venue_id] * 0.5 + view_times[venue_id] / 300.0
+            for venue_id in like_counts
+        },
+    )
+    candidates = venue_pipeline.catalog(ctx)
+    if candidates is None:
+        venue_pipeline.record(ctx)
+        return []
+    catalog, max_pop = candidates
+
+    ranker = learned_ranker.model
+
+    def score():
+        dist_km = catalog.distances_km(user.home_lat, user.home_lng)
+        preference = preference_scores(catalog.scatter(like_counts), catalog.scatter(view_times))
+        popularity = popularity_scores(catalog.popularity, max_pop)
+        if ranker is not None:
+            return dist_km, preference, popularity, None
+        scores = blend_scores(dist_km, preference, popularity)
+        return dist_km, preference, popularity, scores
+
+    # Score every candidate in one batched pass
+    with ctx.stage("score"):
+        dist_km, preference, popularity, scores = offload(score)
+
+    if ranker is not None:
+        with ctx.stage("rank"):
+            features = serving_features(db, user_id, catalog, dist_km, preference, popularity)
+            scores = offload(ranker_scores, ranker, features)
+
+    winners = top_k(scores, limit)
+    venue_pipeline.record(ctx)
+
+    # Only the winners are materialized as response objects, unvalidated:
+    # every field is already the right type
+    return [
+        VenueReco.model_construct(
+            venue_id=catalog.ids[i],
+            venue_name=catalog.names[i],
+            score=float(scores[i]),
+            distance_km=float(dist_km[i]),
+        )
+        for i in winners
+    ]
+
 
-    max_pop = max(popularity_counts.values(), default=1)
+def recommend_venues_for_users(
+    db: Session,
+    user_ids: Sequence[UUID],
+    limit: int = 10,
+    chunk_size: int | None = None,
+) -> Iterator[tuple[UUID, List[VenueReco]]]:
+    """
+    Batch version of `recommend_venues_for_user` for offline consumers.
+
+    The catalog and global popularity are loaded once; users are then scored
+    `chunk_size` at a time as a (users x venues) matrix, so peak memory is
+    bounded by `chunk_size * len(catalog)` scores. By default the chunk is
+    sized to fit `settings.reco_batch_memory_bytes` for the current catalog.
+    Every venue is scored, not just the spatial candidates. Yields
+    `(user_id, recos)` in input order; unknown users and users without a home
+    location get an empty list.
+    """
 
-    recos: list[VenueReco] = []
+    catalog = VenueCatalog.from_rows(
+        venue_index.ensure_loaded(db).all(),
+        dict(db.query(VenueStats.venue_id, VenueStats.positive_count).all()),
+    )
+    popularity = popularity_scores(catalog.popularity, catalog.popularity.max(initial=0))
+    if chunk_size is None:
+        chunk_size = batch_chunk_size(len(catalog))
 
-    for v in venues:
-        dist_km = haversine_km(user.home_lat, user.home_lng, v.lat, v.lng)
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = list(user_ids[start:start + chunk_size])
 
-        # User-specific preferences from past interactions
-        interactions = (
-            db.query(UserVenueInteraction)
+        homes = {
+            row.id: (row.home_lat, row.home_lng)
+            for row in db.query(User.id, User.home_lat, User.home_lng)
             .filter(
-                UserVenueInteraction.user_id == user_id,
-                UserVenueInteraction.venue_id == v.id,
+                User.id.in_(chunk),
+                User.home_lat.isnot(None),
+                User.home_lng.isnot(None),
+            )
+            .all()
+        }
+        scored = [user_id for user_id in chunk if user_id in homes]
+
+        if not scored or not len(catalog):
+            for user_id in chunk:
+                yield user_id, []
+            continue
+
+        rows = {user_id: r for r, user_id in enumerate(scored)}
+        like_counts = np.zeros((len(scored), len(catalog)), dtype=SCORE_DTYPE)
+        view_times = np.zeros_like(like_counts)
+        for user_id, venue_id, like_count, view_time in (
+            db.query(
+                UserVenueAffinity.user_id,
+                UserVenueAffinity.venue_id,
+                current_likes(),
+                current_dwell(),
             )
+            .filter(UserVenueAffinity.user_id.in_(scored))
             .all()
+        ):
+            col = catalog.position(venue_id)
+            if col is not None:
+                like_counts[rows[user_id], col] = like_count
+                view_times[rows[user_id], col] = view_time
+
+        dist_km = catalog.distance_matrix_km(
+            np.array([homes[user_id][0] for user_id in scored]),
+            np.array([homes[user_id][1] for user_id in scored]),
         )
+        scores = blend_scores(dist_km, preference_scores(like_counts, view_times), popularity)
+        winners = top_k_rows(scores, limit)
+
+        for user_id in chunk:
+            r = rows.get(user_id)
+            if r is None:
+                yield user_id, []
+                continue
+            yield user_id, [
+                VenueReco.model_construct(
+                    venue_id=catalog.ids[i],
+                    venue_name=catalog.names[i],
+                    score=float(scores[r, i]),
+                    distance_km=float(dist_km[r, i]),
+                )
+                for i in winners[r]
+            ]
 
-        like_count = sum(
-            1 for i in interactions if i.interaction_type in ("like", "interest")
-        )
-        view_time = sum(i.dwell_time_seconds for i in interactions)
-
-        # crude normalization: 1 like ~0.5, 300s view ~1.0
-        preference_score = min(1.0, like_count * 0.5 + view_time / 300.0)
-        spatial_score = exp(-0.3 * dist_km)
-        popularity_score = popularity_counts[v.id] / max_pop if max_pop else 0.0
-
-        # blended score
-        venue_score = (
-            0.4 * spatial_score
-            + 0.4 * preference_score
-            + 0.2 * popularity_score
+
+def batch_chunk_size(n_venues: int) -> int:
+    """Users per batch scoring chunk that fit the memory budget, at least one."""
+    return max(1, settings.reco_batch_memory_bytes // (max(n_venues, 1) * BATCH_BYTES_PER_CELL))
+
+
+def recommend_venues_for_group(
+    db: Session,
+    user_ids: Sequence[UUID],
+    limit: int = 10,
+) -> List[VenueReco]:
+    """
+    Recommend venues for a group going out together, blending:
+    - spatial proximity, using the farthest member's distance (min-max) so
+      nobody is left with a long trip
+    - the members' average preference
+    - global popularity
+
+    Candidates come from `venue_pipeline` around the members' centroid;
+    members without a home location are ignored. `distance_km` is the farthest member's distance.
+    """
+
+    members = (
+        db.query(User.id, User.home_lat, User.home_lng)
+        .filter(
+            User.id.in_(list(user_ids)),
+            User.home_lat.isnot(None),
+            User.home_lng.isnot(None),
         )
+        .all()
+    )
+    if not members:
+        return []
 
-        recos.append(
-            VenueReco(
-                venue_id=v.id,
-                venue_name=v.name,
-                score=float(venue_score),
-                distance_km=float(dist_km),
-            )
+    index = venue_index.ensure_loaded(db)
+    if not len(index):
+        return []
+
+    rows = {member.id: r for r, member in enumerate(members)}
+    lats = np.array([member.home_lat for member in members])
+    lngs = np.array([member.home_lng for member in members])
+    center_lat, center_lng = geographic_centroid(lats, lngs)
+
+    affinity = (
+        db.query(
+            UserVenueAffinity.user_id,
+            UserVenueAffinity.venue_id,
+            current_likes(),
+            current_dwell(),
         )
+        .filter(UserVenueAffinity.user_id.in_(list(rows)))
+        .all()
+    )
 
-    recos.sort(key=lambda r: r.score, reverse=True)
-    return recos[:limit]
+    engaged: dict[UUID, float] = {}
+    for _, venue_id, like_count, view_time in affinity:
+        engaged[venue_id] = engaged.get(venue_id, 0.0) + like_count * 0.5 + view_time / 300.0
+
+    ctx = CandidateContext(
+        db=db,
+        index=index,
+        lat=center_lat,
+        lng=center_lng,
+        user_ids=list(rows),
+        engaged=engaged,
+    )
+    candidates = venue_pipeline.catalog(ctx)
+    if candidates is None:
+        venue_pipeline.record(ctx)
+        return []
+    catalog, max_pop = candidates
+
+    like_counts = np.zeros((len(members), len(catalog)), dtype=SCORE_DTYPE)
+    view_times = np.zeros_like(like_counts)
+    for user_id, venue_id, like_count, view_time in affinity:
+        col = catalog.position(venue_id)
+        if col is not None:
+            like_counts[rows[user_id], col] = like_count
+            view_times[rows[user_id], col] = view_time
+
+    def score():
+        dist_km = catalog.distance_matrix_km(lats, lngs).max(axis=0)
+        preference = preference_scores(like_counts, view_times).mean(axis=0)
+        popularity = popularity_scores(catalog.popularity, max_pop)
+        scores = blend_scores(dist_km, preference, popularity)
+        return dist_km, scores, top_k(scores, limit)
+
+    # Score every candidate for the whole group in one batched pass
+    with ctx.stage("score"):
+        dist_km, scores, winners = offload(score)
+    venue_pipeline.record(ctx)
+
+    return [
+        VenueReco.model_construct(
+            venue_id=catalog.ids[i],
+            venue_name=catalog.names[i],
+            score=float(scores[i]),
+            distance_km=float(dist_km[i]),
+        )
+        for i in winners
+    ]
 
 
 def recommend_people_for_user(
@@ -112,89 +354,77 @@ def recommend_people_for_user(
     Recommend people to go with `user_id`.
 
     Logic:
-    - Always start from the existing social graph (UserSocialEdge).
+    - Always start from the social graph: direct edges, plus friends of
+      friends whose strength is the best 2-hop path, damped by
+      FRIEND_OF_FRIEND_DECAY.
     - If `venue_id` is provided:
         - Boost users who have interacted positively with that venue.
         - Boost users who like venues in the same category.
     """
 
-    # Start from social edges (friends/mutuals)
-    edges = (
-        db.query(UserSocialEdge)
-        .filter(UserSocialEdge.user_id == user_id)
-        .all()
-    )
-
-    if not edges:
+    # The graph part is served from memory, no database round trip
+    graph = social_graph.ensure_loaded(db)
+    friends_of_friends = offload(graph.friends_of_friends, user_id, settings.reco_fof_candidates)
+    candidates: dict[UUID, float] = {
+        other_id: strength * FRIEND_OF_FRIEND_DECAY
+        for other_id, strength in friends_of_friends.items()
+    }
+    candidates.update(graph.friends(user_id))
+    # Self-edges are rejected on write, but never recommend the user to themselves
+    candidates.pop(user_id, None)
+
+    if not candidates:
         return []
 
-    target_venue: Venue | None = None
-    same_category_venue_ids: set[UUID] = set()
+    other_ids = list(candidates)
+    direct_prefs: dict[UUID, tuple[float, float]] = {}
+    category_likes = np.zeros(len(other_ids), dtype=SCORE_DTYPE)
+    category_dwell = np.zeros(len(other_ids), dtype=SCORE_DTYPE)
 
+    target_venue: Venue | None = None
     if venue_id is not None:
         # The specific venue user is looking at
         target_venue = db.query(Venue).get(venue_id)
-        if target_venue is not None and target_venue.category:
-            # All venues in the same category
-            same_category_venue_ids = {
-                row.id
-                for row in db.query(Venue.id)
-                .filter(Venue.category == target_venue.category)
+
+    if target_venue is not None:
+        # The candidates' affinity with the target venue itself
+        direct_prefs = {
+            other_id: (like_count, dwell_seconds)
+            for other_id, like_count, dwell_seconds in (
+                db.query(
+                    UserVenueAffinity.user_id,
+                    current_likes(),
+                    current_dwell(),
+                )
+                .filter(
+                    UserVenueAffinity.venue_id == venue_id,
+                    UserVenueAffinity.user_id.in_(other_ids),
+                )
                 .all()
-            }
+            )
+        }
+        # ...and with its whole category: one gather from the in-memory matrix
+        if target_venue.category:
+            category_likes, category_dwell = (
+                category_affinity.ensure_loaded(db).gather(other_ids, target_venue.category)
+            )
 
     recos: list[UserReco] = []
 
-    for edge in edges:
-        base_strength = float(edge.strength or 0.0)
-
+    for i, (other_id, base_strength) in enumerate(candidates.items()):
         direct_pref = 0.0
         category_pref = 0.0
 
-        if venue_id is not None and target_venue is not None:
+        if target_venue is not None:
             # ----- Direct preference for this specific venue -----
-            direct_interactions = (
-                db.query(UserVenueInteraction)
-                .filter(
-                    UserVenueInteraction.user_id == edge.other_user_id,
-                    UserVenueInteraction.venue_id == venue_id,
-                )
-                .all()
-            )
-
-            direct_like_count = sum(
-                1
-                for i in direct_interactions
-                if i.interaction_type in ("like", "interest")
-            )
-            direct_view_time = sum(i.dwell_time_seconds for i in direct_interactions)
-
             # 1 like ~ 0.5, 300s ~ 1.0
+            direct_like_count, direct_view_time = direct_prefs.get(other_id, (0, 0))
             direct_pref = min(1.0, direct_like_count * 0.5 + direct_view_time / 300.0)
 
             # ----- Category-level preference (same category as target venue) -----
-            if same_category_venue_ids:
-                cat_interactions = (
-                    db.query(UserVenueInteraction)
-                    .filter(
-                        UserVenueInteraction.user_id == edge.other_user_id,
-                        UserVenueInteraction.venue_id.in_(same_category_venue_ids),
-                    )
-                    .all()
-                )
-
-                cat_like_count = sum(
-                    1
-                    for i in cat_interactions
-                    if i.interaction_type in ("like", "interest")
-                )
-                cat_view_time = sum(i.dwell_time_seconds for i in cat_interactions)
-
-                # Softer normalization; we don't want category to dominate
-                category_pref = min(
-                    1.0,
-                    cat_like_count * 0.3 + cat_view_time / 600.0,
-                )
+            # Softer normalization; we don't want category to dominate
+            cat_like_count, cat_view_time = float(category_likes[i]), float(category_dwell[i])
+            category_pref = min(1.0, cat_like_count * 0.3 + cat_view_time / 600.0)
 
         # Final score:
         # - social edge strength is still primary
@@ -208,7 +438,7 @@ def recommend_people_for_user(
 
         recos.append(
             UserReco(
-                user_id=edge.other_user_id,
+                user_id=other_id,
                 score=float(score),
             )
         )
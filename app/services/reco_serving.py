@@ -0,0 +1,79 @@
+from typing import List, Sequence
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.schemas.reco import UserReco, VenueReco
+from app.services.learned_ranker import learned_ranker
+from app.services.mf_engine import MFUnavailable, recommend_venues_mf
+from app.services.precompute_service import get_precomputed_people, get_precomputed_venues
+from app.services.reco_service import (
+    recommend_people_for_user,
+    recommend_venues_for_group,
+    recommend_venues_for_user,
+)
+
+
+def serve_venue_recos(
+    db: Session, user_id: UUID, limit: int, engine: str, fallback: bool = True
+) -> List[VenueReco]:
+    """
+    Venue recos as the API serves them: the MF engine if asked for, then the
+    precomputed top-K, then the heuristic scorer. The precomputed top-K is
+    heuristic-ranked, so it is skipped while a learned ranker is loaded.
+
+    Without `fallback`, an MF request the model cannot serve raises
+    `MFUnavailable` instead of quietly answering with the heuristic.
+    """
+    if engine == "mf":
+        # None: no model loaded or a cold-start user, use the heuristic
+        recos = recommend_venues_mf(db, user_id=user_id, limit=limit)
+        if recos is not None:
+            return recos
+        if not fallback:
+            raise MFUnavailable("The mf engine has no model for this user; try engine=heuristic")
+    if learned_ranker.model is None:
+        precomputed = get_precomputed_venues(db, user_id, limit, settings.precompute_top_k)
+        if precomputed is not None:
+            return precomputed
+    return recommend_venues_for_user(db, user_id=user_id, limit=limit)
+
+
+def serve_people_recos(
+    db: Session, user_id: UUID, venue_id: UUID | None, limit: int
+) -> List[UserReco]:
+    """People recos as the API serves them, precomputed when there is no venue."""
+    # Precomputed recos have no venue context
+    if venue_id is None:
+        precomputed = get_precomputed_people(db, user_id, limit, settings.precompute_top_k)
+        if precomputed is not None:
+            return precomputed
+    return recommend_people_for_user(db, user_id=user_id, venue_id=venue_id, limit=limit)
+
+
+# ----- async sessions -----
+#
+# The async versions run the same code through `AsyncSession.run_sync`: its
+# queries are awaited on the async connection, and its CPU-bound steps
+# (scoring, ranking, in-memory index reloads) go through `offload` to a
+# worker thread, so the event loop keeps serving other requests throughout.
+
+
+async def serve_venue_recos_async(
+    db: AsyncSession, user_id: UUID, limit: int, engine: str, fallback: bool = True
+) -> List[VenueReco]:
+    return await db.run_sync(serve_venue_recos, user_id, limit, engine, fallback)
+
+
+async def serve_people_recos_async(
+    db: AsyncSession, user_id: UUID, venue_id: UUID | None, limit: int
+) -> List[UserReco]:
+    return await db.run_sync(serve_people_recos, user_id, venue_id, limit)
+
+
+async def recommend_venues_for_group_async(
+    db: AsyncSession, user_ids: Sequence[UUID], limit: int = 10
+) -> List[VenueReco]:
+    return await db.run_sync(recommend_venues_for_group, user_ids, limit)
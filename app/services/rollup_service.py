@@ -0,0 +1,375 @@
+from collections import defaultdict
+import time
+from datetime import datetime
+from typing import Iterable, Mapping
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.interactions import POSITIVE_INTERACTIONS, UserVenueInteraction
+from app.models.rollups import UserCategoryAffinity, UserVenueAffinity, VenueStats
+from app.models.venue import Venue
+from app.services.decay import decay_factor, decay_weight, epoch_seconds
+
+_DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def _in_key_order(rows: list[dict], key_columns: list[str]) -> list[dict]:
+    return sorted(rows, key=lambda row: tuple(row[col] for col in key_columns))
+
+
+def upsert_increments(
+    db: Session,
+    model,
+    key_columns: list[str],
+    rows: list[dict],
+    increment_columns: list[str],
+    replace_columns: list[str] = (),
+    decay_columns: list[str] = (),
+    chunk_size: int = 1_000,
+) -> None:
+    """
+    Insert `rows` into `model`'s table, adding `increment_columns` onto the
+    existing values (and overwriting `replace_columns`) when a row with the
+    same key already exists.
+
+    `decay_columns` are exponentially decayed counters stored as of the row's
+    `decayed_at` (unix seconds). They merge in O(1): both the stored value and
+    the increment are decayed to the later of the two timestamps and added.
+
+    Runs as multi-row INSERT ... ON CONFLICT DO UPDATE statements of up to
+    `chunk_size` rows (keeping under bind-parameter limits), so concurrent
+    writers never lose increments. Rows are written in key order, so two
+    writers touching the same rows lock them in the same order and cannot
+    deadlock each other.
+    """
+    if not rows:
+        return
+
+    rows = _in_key_order(rows, key_columns)
+    dialect_insert = _DIALECT_INSERTS[db.get_bind().dialect.name]
+    table = model.__table__
+    for start in range(0, len(rows), chunk_size):
+        stmt = dialect_insert(table).values(rows[start:start + chunk_size])
+        set_ = {col: table.c[col] + stmt.excluded[col] for col in increment_columns}
+        set_.update({col: stmt.excluded[col] for col in replace_columns})
+        if decay_columns:
+            stored_at, new_at = table.c["decayed_at"], stmt.excluded["decayed_at"]
+            merged_at = case((new_at > stored_at, new_at), else_=stored_at)
+            for col in decay_columns:
+                set_[col] = (
+                    table.c[col] * decay_factor(merged_at - stored_at)
+                    + stmt.excluded[col] * decay_factor(merged_at - new_at)
+                )
+            set_["decayed_at"] = merged_at
+        stmt = stmt.on_conflict_do_update(index_elements=key_columns, set_=set_)
+        db.execute(stmt)
+
+
+def insert_missing(
+    db: Session,
+    model,
+    key_columns: list[str],
+    rows: list[dict],
+    chunk_size: int = 1_000,
+) -> set[tuple]:
+    """
+    Insert the `rows` whose key is not in `model`'s table yet, leaving existing
+    rows alone, and return the keys this call inserted.
+
+    The check and the insert are one INSERT ... ON CONFLICT DO NOTHING
+    RETURNING: of two concurrent transactions inserting the same key, the
+    second waits for the first and only the first gets the key back. Rows
+    are inserted in key order, as in `upsert_increments`.
+    """
+    if not rows:
+        return set()
+
+    rows = _in_key_order(rows, key_columns)
+    dialect_insert = _DIALECT_INSERTS[db.get_bind().dialect.name]
+    table = model.__table__
+    keys = [table.c[col] for col in key_columns]
+    inserted: set[tuple] = set()
+    for start in range(0, len(rows), chunk_size):
+        stmt = (
+            dialect_insert(table)
+            .values(rows[start:start + chunk_size])
+            .on_conflict_do_nothing(index_elements=key_columns)
+            .returning(*keys)
+        )
+        inserted.update(tuple(row) for row in db.execute(stmt))
+    return inserted
+
+
+def apply_interactions(db: Session, interactions: Iterable[Mapping]) -> list[dict]:
+    """
+    Fold new interactions into the rollup tables, in the caller's transaction.
+
+    `interactions` are dicts shaped like `UserVenueInteraction` rows. Returns
+    the `user_category_affinity` increments, for the caller to apply to the
+    in-memory category matrix once the transaction has committed.
+    """
+    interactions = list(interactions)
+    if not interactions:
+        return []
+
+    now = datetime.utcnow()
+    # Decayed increments are all stated as of the newest event in the batch
+    event_times = [
+        epoch_seconds(i["created_at"]) if i.get("created_at") else time.time()
+        for i in interactions
+    ]
+    decayed_at = max(event_times)
+
+    venue_rows: dict[UUID, dict] = defaultdict(
+        lambda: {
+            "positive_count": 0,
+            "total_dwell_seconds": 0,
+            "distinct_users": 0,
+            "decayed_positive": 0.0,
+            "decayed_dwell": 0.0,
+            "decayed_at": decayed_at,
+        }
+    )
+    affinity_rows: dict[tuple[UUID, UUID], dict] = defaultdict(
+        lambda: {
+            "like_count": 0,
+            "dwell_seconds": 0,
+            "decayed_likes": 0.0,
+            "decayed_dwell": 0.0,
+            "decayed_at": decayed_at,
+        }
+    )
+    category_rows: dict[tuple[UUID, str], dict] = defaultdict(
+        lambda: {"like_count": 0, "dwell_seconds": 0}
+    )
+    for i, event_time in zip(interactions, event_times):
+        is_positive = int(i["interaction_type"] in POSITIVE_INTERACTIONS)
+        dwell = i.get("dwell_time_seconds") or 0
+        weight = decay_weight(decayed_at - event_time)
+
+        venue_row = venue_rows[i["venue_id"]]
+        venue_row["positive_count"] += is_positive
+        venue_row["total_dwell_seconds"] += dwell
+        venue_row["decayed_positive"] += is_positive * weight
+        venue_row["decayed_dwell"] += dwell * weight
+
+        affinity_row = affinity_rows[(i["user_id"], i["venue_id"])]
+        affinity_row["like_count"] += is_positive
+        affinity_row["dwell_seconds"] += dwell
+        affinity_row["decayed_likes"] += is_positive * weight
+        affinity_row["decayed_dwell"] += dwell * weight
+
+    # A (user, venue) pair without an affinity row is a new distinct user.
+    # Creating the empty rows first makes "new" race-free: the pair counts for
+    # whichever writer inserted it, even when two first writes are concurrent
+    new_pairs = insert_missing(
+        db,
+        UserVenueAffinity,
+        ["user_id", "venue_id"],
+        [
+            {"user_id": user_id, "venue_id": venue_id, "updated_at": now, "decayed_at": decayed_at}
+            for user_id, venue_id in affinity_rows
+        ],
+    )
+    for user_id, venue_id in new_pairs:
+        venue_rows[venue_id]["distinct_users"] += 1
+
+    categories = dict(
+        db.query(Venue.id, Venue.category)
+        .filter(Venue.id.in_(list(venue_rows)), Venue.category.isnot(None))
+        .all()
+    )
+    for (user_id, venue_id), row in affinity_rows.items():
+        category = categories.get(venue_id)
+        if category is not None:
+            category_row = category_rows[(user_id, category)]
+            category_row["like_count"] += row["like_count"]
+            category_row["dwell_seconds"] += row["dwell_seconds"]
+    category_deltas = [
+        {"user_id": user_id, "category": category, **row}
+        for (user_id, category), row in category_rows.items()
+    ]
+
+    upsert_increments(
+        db,
+        VenueStats,
+        ["venue_id"],
+        [{"venue_id": venue_id, **row} for venue_id, row in venue_rows.items()],
+        ["positive_count", "total_dwell_seconds", "distinct_users"],
+        decay_columns=["decayed_positive", "decayed_dwell"],
+    )
+    upsert_increments(
+        db,
+        UserVenueAffinity,
+        ["user_id", "venue_id"],
+        [
+            {"user_id": user_id, "venue_id": venue_id, "updated_at": now, **row}
+            for (user_id, venue_id), row in affinity_rows.items()
+        ],
+        ["like_count", "dwell_seconds"],
+        replace_columns=["updated_at"],
+        decay_columns=["decayed_likes", "decayed_dwell"],
+    )
+    upsert_increments(
+        db,
+        UserCategoryAffinity,
+        ["user_id", "category"],
+        category_deltas,
+        ["like_count", "dwell_seconds"],
+    )
+    return category_deltas
+
+
+def rebuild_rollups(db: Session) -> None:
+    """Recompute every rollup table from the raw interaction history."""
+    rebuild_venue_stats(db)
+    rebuild_user_venue_affinity(db)
+    rebuild_decayed_counters(db)
+    rebuild_user_category_affinity(db)
+    db.commit()
+
+
+def rebuild_decayed_counters(
+    db: Session,
+    chunk_size: int = 10_000,
+) -> None:
+    """
+    Recompute the decayed counters of the (already rebuilt) `venue_stats` and
+    `user_venue_affinity` rows by streaming the interaction history through
+    the same O(1) merge as live writes, `chunk_size` events at a time.
+    """
+    for model in (VenueStats, UserVenueAffinity):
+        db.execute(
+            model.__table__.update().values(
+                {col: 0.0 for col in model.__table__.c.keys() if col.startswith("decayed_")}
+            )
+        )
+
+    history = db.execute(
+        select(
+            UserVenueInteraction.venue_id,
+            UserVenueInteraction.user_id,
+            UserVenueInteraction.interaction_type,
+            UserVenueInteraction.dwell_time_seconds,
+            UserVenueInteraction.created_at,
+        ).execution_options(stream_results=True, yield_per=chunk_size)
+    )
+    for partition in history.partitions():
+        event_times = [epoch_seconds(row.created_at) for row in partition]
+        decayed_at = max(event_times)
+        venue_rows: dict[UUID, dict] = defaultdict(
+            lambda: {"decayed_positive": 0.0, "decayed_dwell": 0.0}
+        )
+        affinity_rows: dict[tuple[UUID, UUID], dict] = defaultdict(
+            lambda: {"decayed_likes": 0.0, "decayed_dwell": 0.0}
+        )
+        for row, event_time in zip(partition, event_times):
+            is_positive = int(row.interaction_type in POSITIVE_INTERACTIONS)
+            dwell = row.dwell_time_seconds or 0
+            weight = decay_weight(decayed_at - event_time)
+            venue_row = venue_rows[row.venue_id]
+            venue_row["decayed_positive"] += is_positive * weight
+            venue_row["decayed_dwell"] += dwell * weight
+            affinity_row = affinity_rows[(row.user_id, row.venue_id)]
+            affinity_row["decayed_likes"] += is_positive * weight
+            affinity_row["decayed_dwell"] += dwell * weight
+
+        # Every key already has its rollup row, so these always take the
+        # ON CONFLICT merge path
+        upsert_increments(
+            db,
+            VenueStats,
+            ["venue_id"],
+            [
+                {"venue_id": venue_id, "positive_count": 0, "total_dwell_seconds": 0,
+                 "distinct_users": 0, "decayed_at": decayed_at, **row}
+                for venue_id, row in venue_rows.items()
+            ],
+            [],
+            decay_columns=["decayed_positive", "decayed_dwell"],
+        )
+        upsert_increments(
+            db,
+            UserVenueAffinity,
+            ["user_id", "venue_id"],
+            [
+                {"user_id": user_id, "venue_id": venue_id, "like_count": 0, "dwell_seconds": 0,
+                 "updated_at": datetime.utcnow(), "decayed_at": decayed_at, **row}
+                for (user_id, venue_id), row in affinity_rows.items()
+            ],
+            [],
+            decay_columns=["decayed_likes", "decayed_dwell"],
+        )
+
+
+def rebuild_venue_stats(db: Session) -> None:
+    """Recompute `venue_stats` from the full interaction history."""
+    db.execute(delete(VenueStats))
+    db.execute(
+        insert(VenueStats).from_select(
+            ["venue_id", "positive_count", "total_dwell_seconds", "distinct_users"],
+            select(
+                UserVenueInteraction.venue_id,
+                func.sum(
+                    case(
+                        (UserVenueInteraction.interaction_type.in_(POSITIVE_INTERACTIONS), 1),
+                        else_=0,
+                    )
+                ),
+                func.coalesce(func.sum(UserVenueInteraction.dwell_time_seconds), 0),
+                func.count(func.distinct(UserVenueInteraction.user_id)),
+            ).group_by(UserVenueInteraction.venue_id),
+        )
+    )
+
+
+def rebuild_user_venue_affinity(db: Session) -> None:
+    """Recompute `user_venue_affinity` from the full interaction history."""
+    db.execute(delete(UserVenueAffinity))
+    db.execute(
+        insert(UserVenueAffinity).from_select(
+            ["user_id", "venue_id", "like_count", "dwell_seconds", "updated_at"],
+            select(
+                UserVenueInteraction.user_id,
+                UserVenueInteraction.venue_id,
+                func.sum(
+                    case(
+                        (UserVenueInteraction.interaction_type.in_(POSITIVE_INTERACTIONS), 1),
+                        else_=0,
+                    )
+                ),
+                func.coalesce(func.sum(UserVenueInteraction.dwell_time_seconds), 0),
+                literal(datetime.utcnow()),
+            ).group_by(UserVenueInteraction.user_id, UserVenueInteraction.venue_id),
+        )
+    )
+
+
+def rebuild_user_category_affinity(db: Session) -> None:
+    """Recompute `user_category_affinity` from the full interaction history."""
+    db.execute(delete(UserCategoryAffinity))
+    db.execute(
+        insert(UserCategoryAffinity).from_select(
+            ["user_id", "category", "like_count", "dwell_seconds"],
+            select(
+                UserVenueInteraction.user_id,
+                Venue.category,
+                func.sum(
+                    case(
+                        (UserVenueInteraction.interaction_type.in_(POSITIVE_INTERACTIONS), 1),
+                        else_=0,
+                    )
+                ),
+                func.coalesce(func.sum(UserVenueInteraction.dwell_time_seconds), 0),
+            )
+            .join(Venue, Venue.id == UserVenueInteraction.venue_id)
+            .where(Venue.category.isnot(None))
+            .group_by(UserVenueInteraction.user_id, Venue.category),
+        )
+    )
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to callers that gave up waiting on another caller's computation."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: object = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one computation.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is in flight block until it finishes and receive the same
+    result, or the same exception. Nothing is kept once the call completes,
+    so this flattens bursts without acting as a cache.
+    """
+
+    def __init__(self, timeout_seconds: float):
+        self.timeout_seconds = timeout_seconds
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], T],
+        timeout: float | None = None,
+    ) -> T:
+        """
+        Run `fn` once for all concurrent callers of `key`.
+
+        Followers wait at most `timeout` seconds (default `timeout_seconds`)
+        and then raise `SingleFlightTimeout`; the leader is never interrupted.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if is_leader:
+            try:
+                call.result = fn()
+            except BaseException as exc:
+                call.error = exc
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result
+
+        if not call.done.wait(self.timeout_seconds if timeout is None else timeout):
+            raise SingleFlightTimeout(f"timed out waiting for in-flight call {key!r}")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    `SingleFlight` for coroutines on one event loop.
+
+    Followers await the leader's computation instead of blocking a thread
+    (which, on the loop's own thread, would stall the leader as well). The
+    computation runs as its own task, so neither a follower timing out nor
+    the leader's client going away cancels it.
+    """
+
+    def __init__(self, timeout_seconds: float):
+        self.timeout_seconds = timeout_seconds
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        timeout: float | None = None,
+    ) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._finish(key, done))
+            return await asyncio.shield(task)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(task),
+                self.timeout_seconds if timeout is None else timeout,
+            )
+        except asyncio.TimeoutError:
+            raise SingleFlightTimeout(f"timed out waiting for in-flight call {key!r}")
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Every awaiter re-raises it; don't also log it as never retrieved
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+reco_flight = SingleFlight(timeout_seconds=settings.reco_singleflight_timeout_seconds)
+reco_flight_async = AsyncSingleFlight(timeout_seconds=settings.reco_singleflight_timeout_seconds)
@@ -0,0 +1,200 @@
+import threading
+import time
+from typing import Iterable, Sequence
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.social import UserSocialEdge
+from app.services.offload import offload
+
+
+class SocialGraph:
+    """
+    In-memory CSR adjacency over `user_social_edges`.
+
+    Users are mapped to a dense index; the out-edges of user `i` are
+    `neighbors[offsets[i]:offsets[i + 1]]` with matching `strengths`. Edges
+    added after the last load go to a small overlay that is folded back into
+    the arrays once it grows past `compact_ratio` of the graph, and the whole
+    graph is reloaded every `refresh_seconds` to pick up other workers' writes.
+    Duplicate (user, other_user) edges keep their strongest strength.
+    """
+
+    def __init__(self, refresh_seconds: float, compact_ratio: float = 0.1):
+        self.refresh_seconds = refresh_seconds
+        self.compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._ids: list[UUID] = []
+        self._index: dict[UUID, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._neighbors = np.empty(0, dtype=np.int32)
+        self._strengths = np.empty(0, dtype=np.float32)
+        self._overlay: dict[int, dict[int, float]] = {}
+        self._overlay_edges = 0
+        self._loaded_at: float | None = None
+
+    def _node(self, user_id: UUID) -> int:
+        node = self._index.get(user_id)
+        if node is None:
+            node = self._index[user_id] = len(self._ids)
+            self._ids.append(user_id)
+        return node
+
+    # ----- loading -----
+
+    def _build(self, src: np.ndarray, dst: np.ndarray, strength: np.ndarray) -> None:
+        n = len(self._ids)
+        if src.size:
+            order = np.lexsort((dst, src))
+            src, dst, strength = src[order], dst[order], strength[order]
+            first = np.flatnonzero(
+                np.r_[True, (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])]
+            )
+            strength = np.maximum.reduceat(strength, first)
+            src, dst = src[first], dst[first]
+        self._offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self._offsets[1:])
+        self._neighbors = dst.astype(np.int32)
+        self._strengths = strength.astype(np.float32)
+        self._overlay = {}
+        self._overlay_edges = 0
+
+    def load(self, rows: Iterable[Sequence]) -> None:
+        """Replace the graph with (user_id, other_user_id, strength) rows."""
+        with self._lock:
+            self._clear()
+            src: list[int] = []
+            dst: list[int] = []
+            strength: list[float] = []
+            for user_id, other_user_id, edge_strength in rows:
+                src.append(self._node(user_id))
+                dst.append(self._node(other_user_id))
+                strength.append(float(edge_strength or 0.0))
+            self._build(
+                np.asarray(src, dtype=np.int64),
+                np.asarray(dst, dtype=np.int64),
+                np.asarray(strength, dtype=np.float32),
+            )
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session) -> "SocialGraph":
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            rows = db.query(
+                UserSocialEdge.user_id,
+                UserSocialEdge.other_user_id,
+                UserSocialEdge.strength,
+            ).all()
+            offload(self.load, rows)
+        return self
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+
+    # ----- incremental updates -----
+
+    def add_edge(self, user_id: UUID, other_user_id: UUID, strength: float) -> None:
+        """Record a new edge; a no-op until the graph is first loaded."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            src, dst = self._node(user_id), self._node(other_user_id)
+            edges = self._overlay.setdefault(src, {})
+            if dst not in edges:
+                self._overlay_edges += 1
+            edges[dst] = max(edges.get(dst, 0.0), float(strength or 0.0))
+            if self._overlay_edges > self.compact_ratio * max(len(self._neighbors), 100):
+                self._compact()
+
+    def _compact(self) -> None:
+        n = len(self._offsets) - 1
+        src = np.repeat(np.arange(n, dtype=np.int64), np.diff(self._offsets))
+        extra = [(s, d, w) for s, edges in self._overlay.items() for d, w in edges.items()]
+        self._build(
+            np.concatenate([src, np.array([e[0] for e in extra], dtype=np.int64)]),
+            np.concatenate([self._neighbors, np.array([e[1] for e in extra], dtype=np.int32)]),
+            np.concatenate([self._strengths, np.array([e[2] for e in extra], dtype=np.float32)]),
+        )
+
+    # ----- queries -----
+
+    def _out_edges(self, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Flattened out-edges of `nodes`: (position in `nodes`, neighbor, strength).
+        """
+        in_csr = nodes[nodes < len(self._offsets) - 1]
+        starts = self._offsets[in_csr]
+        counts = self._offsets[in_csr + 1] - starts
+        # Gather every CSR slice at once: position k of slice j is starts[j] + k
+        pos = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        owner = np.repeat(np.flatnonzero(nodes < len(self._offsets) - 1), counts)
+        neighbors = self._neighbors[pos].astype(np.int64)
+        strengths = self._strengths[pos]
+
+        extra = [
+            (j, d, w)
+            for j, node in enumerate(nodes.tolist())
+            for d, w in self._overlay.get(node, {}).items()
+        ]
+        if extra:
+            owner = np.concatenate([owner, np.array([e[0] for e in extra], dtype=np.int64)])
+            neighbors = np.concatenate([neighbors, np.array([e[1] for e in extra], dtype=np.int64)])
+            strengths = np.concatenate([strengths, np.array([e[2] for e in extra], dtype=np.float32)])
+        return owner, neighbors, strengths
+
+    def friends(self, user_id: UUID) -> dict[UUID, float]:
+        """Direct edges of `user_id` mapped to their strength."""
+        with self._lock:
+            node = self._index.get(user_id)
+            if node is None:
+                return {}
+            _, neighbors, strengths = self._out_edges(np.array([node], dtype=np.int64))
+            result: dict[UUID, float] = {}
+            for d, w in zip(neighbors.tolist(), strengths.tolist()):
+                other = self._ids[d]
+                result[other] = max(result.get(other, 0.0), w)
+            return result
+
+    def friends_of_friends(self, user_id: UUID, limit: int) -> dict[UUID, float]:
+        """
+        2-hop candidates that are not already direct friends, mapped to the
+        strongest path strength (product of the two edge strengths).
+        """
+        with self._lock:
+            node = self._index.get(user_id)
+            if node is None:
+                return {}
+            _, first_hop, first_strength = self._out_edges(np.array([node], dtype=np.int64))
+            if not first_hop.size:
+                return {}
+
+            owner, second_hop, second_strength = self._out_edges(first_hop)
+            path_strength = first_strength[owner] * second_strength
+
+            keep = ~np.isin(second_hop, first_hop) & (second_hop != node)
+            second_hop, path_strength = second_hop[keep], path_strength[keep]
+            if not second_hop.size:
+                return {}
+
+            # Strongest path per candidate, then the `limit` strongest candidates
+            order = np.lexsort((-path_strength, second_hop))
+            second_hop, path_strength = second_hop[order], path_strength[order]
+            first = np.flatnonzero(np.r_[True, second_hop[1:] != second_hop[:-1]])
+            second_hop, path_strength = second_hop[first], path_strength[first]
+            if limit < second_hop.size:
+                best = np.argpartition(-path_strength, limit - 1)[:limit]
+                second_hop, path_strength = second_hop[best], path_strength[best]
+
+            return {
+                self._ids[d]: w
+                for d, w in zip(second_hop.tolist(), path_strength.tolist())
+            }
+
+
+social_graph = SocialGraph(refresh_seconds=settings.social_graph_refresh_seconds)
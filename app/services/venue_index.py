@@ -0,0 +1,137 @@
+import threading
+import time
+from math import cos, floor, radians
+from typing import Iterable, Sequence
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.venue import Venue
+from app.services.offload import offload
+
+KM_PER_DEGREE_LAT = 111.32
+
+# (id, name, lat, lng, category), the same row shape VenueCatalog.from_rows takes
+VenueRow = tuple[UUID, str, float, float, str | None]
+
+
+class VenueIndex:
+    """
+    In-memory grid index over venue coordinates.
+
+    Venues are bucketed into fixed-size lat/lng cells, so a radius query only
+    visits the handful of cells around the user and its cost grows with local
+    density rather than with the size of the catalog. New venues are added to
+    their cell in O(1); the whole index is reloaded from the database every
+    `refresh_seconds` to pick up venues created by other workers.
+    """
+
+    def __init__(self, cell_deg: float, refresh_seconds: float):
+        self.cell_deg = cell_deg
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._rows: dict[UUID, VenueRow] = {}
+        self._cells: dict[tuple[int, int], list[UUID]] = {}
+        self._loaded_at: float | None = None
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return floor(lat / self.cell_deg), floor(lng / self.cell_deg)
+
+    def _insert(self, row: VenueRow) -> None:
+        venue_id, _, lat, lng, _ = row
+        if venue_id in self._rows:
+            return
+        self._rows[venue_id] = row
+        self._cells.setdefault(self._cell(lat, lng), []).append(venue_id)
+
+    def _is_stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.refresh_seconds
+        )
+
+    def load(self, rows: Iterable[Sequence]) -> None:
+        """Replace the index contents with (id, name, lat, lng, category) rows."""
+        with self._lock:
+            self._rows = {}
+            self._cells = {}
+            for row in rows:
+                self._insert(tuple(row))
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session) -> "VenueIndex":
+        if self._is_stale():
+            rows = db.query(Venue.id, Venue.name, Venue.lat, Venue.lng, Venue.category).all()
+            offload(self.load, rows)
+        return self
+
+    def add(self, venue: Venue) -> None:
+        """Index a newly created venue; a no-op until the index is first loaded."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._insert((venue.id, venue.name, venue.lat, venue.lng, venue.category))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rows = {}
+            self._cells = {}
+            self._loaded_at = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def all(self) -> list[VenueRow]:
+        return list(self._rows.values())
+
+    def get(self, venue_ids: Iterable[UUID]) -> list[VenueRow]:
+        """Rows for the given venue ids, skipping ids that are not indexed."""
+        rows = self._rows
+        return [rows[venue_id] for venue_id in venue_ids if venue_id in rows]
+
+    def nearby(self, lat: float, lng: float, radius_km: float) -> list[VenueRow]:
+        """
+        Venues in the cells overlapping a `radius_km` box around (lat, lng).
+
+        This is a superset of the venues within the radius; callers compute
+        exact distances on the (small) result. A box crossing ±180° also
+        covers the cells on the other side of the antimeridian.
+        """
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        # Longitude degrees shrink towards the poles; clamp to avoid blowing up
+        dlng = radius_km / (KM_PER_DEGREE_LAT * max(cos(radians(lat)), 0.01))
+
+        lo, hi = lng - dlng, lng + dlng
+        if hi - lo >= 360.0:
+            spans = [(-180.0, 180.0)]
+        else:
+            spans = [(max(lo, -180.0), min(hi, 180.0))]
+            if lo < -180.0:
+                spans.append((lo + 360.0, 180.0))
+            if hi > 180.0:
+                spans.append((-180.0, hi - 360.0))
+
+        lat_lo = self._cell(lat - dlat, 0.0)[0]
+        lat_hi = self._cell(lat + dlat, 0.0)[0]
+        # A set: near the poles the wrapped spans can share edge cells
+        lng_cells = {
+            j
+            for span_lo, span_hi in spans
+            for j in range(self._cell(0.0, span_lo)[1], self._cell(0.0, span_hi)[1] + 1)
+        }
+
+        rows = self._rows
+        cells = self._cells
+        found: list[VenueRow] = []
+        for i in range(lat_lo, lat_hi + 1):
+            for j in lng_cells:
+                for venue_id in cells.get((i, j), ()):
+                    found.append(rows[venue_id])
+        return found
+
+
+venue_index = VenueIndex(
+    cell_deg=settings.venue_index_cell_deg,
+    refresh_seconds=settings.venue_index_refresh_seconds,
+)
@@ -0,0 +1,260 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import zip_longest
+from typing import Callable, Iterable, Iterator, Mapping, Sequence
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.rollups import UserVenueAffinity, VenueStats
+from app.services.decay import current_likes, trending_positive
+from app.services.social_graph import social_graph
+from app.services.venue_index import VenueIndex, VenueRow
+from app.services.venue_scoring import VenueCatalog, haversine_km_many, top_k
+
+
+@dataclass
+class CandidateContext:
+    """Inputs shared by the candidate generators of one recommendation request."""
+
+    db: Session
+    index: VenueIndex
+    lat: float
+    lng: float
+    user_ids: Sequence[UUID]
+    # venue_id -> how strongly the user(s) engaged with it, best kept first
+    engaged: Mapping[UUID, float]
+    timings: dict[str, float] = field(default_factory=dict)
+    _popular: list[tuple[UUID, int]] | None = None
+
+    def popular(self) -> list[tuple[UUID, int]]:
+        """The globally most popular (venue_id, positive_count), queried once."""
+        if self._popular is None:
+            self._popular = [
+                (venue_id, count)
+                for venue_id, count in self.db.query(VenueStats.venue_id, VenueStats.positive_count)
+                .filter(VenueStats.positive_count > 0)
+                .order_by(VenueStats.positive_count.desc())
+                .limit(settings.reco_popular_backfill)
+            ]
+        return self._popular
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (time.perf_counter() - started) * 1000.0
+
+
+# A generator returns up to `limit` venue ids, best first
+CandidateGenerator = Callable[[CandidateContext, int], list[UUID]]
+
+
+def nearby_candidates(ctx: CandidateContext, limit: int) -> list[UUID]:
+    """Venues around (lat, lng), closest first."""
+    rows = ctx.index.nearby(ctx.lat, ctx.lng, settings.reco_radius_km)
+    if len(rows) <= limit:
+        return [row[0] for row in rows]
+    dist_km = haversine_km_many(
+        ctx.lat,
+        ctx.lng,
+        np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows)),
+        np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows)),
+    )
+    return [rows[i][0] for i in top_k(-dist_km, limit)]
+
+
+def engaged_candidates(ctx: CandidateContext, limit: int) -> list[UUID]:
+    """Venues the user(s) already interacted with, strongest engagement first."""
+    return sorted(ctx.engaged, key=ctx.engaged.__getitem__, reverse=True)[:limit]
+
+
+def popular_candidates(ctx: CandidateContext, limit: int) -> list[UUID]:
+    """The globally most popular venues."""
+    return [venue_id for venue_id, _ in ctx.popular()[:limit]]
+
+
+class TrendingVenues:
+    """
+    In-memory list of the venues with the most recent positive engagement,
+    ranked by their decayed `venue_stats` counts.
+
+    The ranking is the same for every user and only moves as engagement
+    accrues, so instead of a scan and sort of `venue_stats` on every cache
+    miss it is recomputed every `refresh_seconds`.
+    """
+
+    def __init__(self, size: int, refresh_seconds: float):
+        self.size = size
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._venue_ids: list[UUID] = []
+        self._loaded_at: float | None = None
+
+    def load(self, venue_ids: Iterable[UUID]) -> None:
+        """Replace the ranking with `venue_ids`, most trending first."""
+        with self._lock:
+            self._venue_ids = list(venue_ids)
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session) -> "TrendingVenues":
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self.load(
+                venue_id
+                for (venue_id,) in db.query(VenueStats.venue_id)
+                .filter(VenueStats.decayed_positive > 0)
+                .order_by(trending_positive().desc())
+                .limit(self.size)
+            )
+        return self
+
+    def top(self, limit: int) -> list[UUID]:
+        return self._venue_ids[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._venue_ids = []
+            self._loaded_at = None
+
+
+trending_venues = TrendingVenues(
+    size=settings.reco_popular_backfill,
+    refresh_seconds=settings.reco_trending_refresh_seconds,
+)
+
+
+def trending_candidates(ctx: CandidateContext, limit: int) -> list[UUID]:
+    """Venues with the most recent positive engagement (decayed `venue_stats` counts)."""
+    return trending_venues.ensure_loaded(ctx.db).top(limit)
+
+
+def friends_favorite_candidates(ctx: CandidateContext, limit: int) -> list[UUID]:
+    """Venues the user(s)' direct friends like, weighted by edge strength and recency."""
+    graph = social_graph.ensure_loaded(ctx.db)
+    friends: dict[UUID, float] = {}
+    for user_id in ctx.user_ids:
+        for other_id, strength in graph.friends(user_id).items():
+            friends[other_id] = max(friends.get(other_id, 0.0), strength)
+    for user_id in ctx.user_ids:
+        friends.pop(user_id, None)
+    if not friends:
+        return []
+
+    # Weighted and ranked in the database, so only the top `limit` come back
+    strength = case(friends, value=UserVenueAffinity.user_id, else_=0.0)
+    votes = func.sum(strength * current_likes())
+    return [
+        venue_id
+        for (venue_id,) in ctx.db.query(UserVenueAffinity.venue_id)
+        .filter(
+            UserVenueAffinity.user_id.in_(list(friends)),
+            UserVenueAffinity.like_count > 0,
+        )
+        .group_by(UserVenueAffinity.venue_id)
+        .order_by(votes.desc(), UserVenueAffinity.venue_id)
+        .limit(limit)
+    ]
+
+
+class StageTimings:
+    """Running per-stage latency totals across requests, in milliseconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: dict[str, dict[str, float]] = {}
+
+    def record(self, timings: Mapping[str, float]) -> None:
+        with self._lock:
+            for name, ms in timings.items():
+                stage = self._stages.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+                stage["count"] += 1
+                stage["total_ms"] += ms
+                stage["max_ms"] = max(stage["max_ms"], ms)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages = {}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                name: {**stage, "mean_ms": stage["total_ms"] / stage["count"]}
+                for name, stage in self._stages.items()
+            }
+
+
+class VenuePipeline:
+    """
+    Candidate generation stage of venue recommendations.
+
+    Each registered generator proposes its best venues; the proposals are
+    interleaved round-robin (so every source is represented) and cut at
+    `budget`, so the blended scorer downstream sees a bounded candidate set
+    however large the catalog is. Stage timings land in `ctx.timings` and are
+    aggregated into `timings` by `record`.
+    """
+
+    def __init__(self, generators: Mapping[str, CandidateGenerator], budget: int):
+        self.generators = dict(generators)
+        self.budget = budget
+        self.timings = StageTimings()
+
+    def register(self, name: str, generator: CandidateGenerator) -> None:
+        self.generators[name] = generator
+
+    def candidates(self, ctx: CandidateContext) -> list[VenueRow]:
+        proposals = []
+        for name, generator in self.generators.items():
+            with ctx.stage(f"candidates.{name}"):
+                proposals.append(generator(ctx, self.budget))
+
+        with ctx.stage("candidates.merge"):
+            chosen: dict[UUID, None] = {}
+            for venue_ids in zip_longest(*proposals):
+                for venue_id in venue_ids:
+                    if venue_id is not None:
+                        chosen.setdefault(venue_id)
+                if len(chosen) >= self.budget:
+                    break
+            return ctx.index.get(list(chosen)[:self.budget])
+
+    def catalog(self, ctx: CandidateContext) -> tuple[VenueCatalog, int] | None:
+        """
+        Scorable catalog of the candidates plus the global max popularity, or
+        None when there is nothing to score.
+        """
+        rows = self.candidates(ctx)
+        if not rows:
+            return None
+
+        with ctx.stage("features"):
+            popular = ctx.popular()
+            max_pop = popular[0][1] if popular else 0
+            popularity_counts: dict[UUID, int] = dict(
+                ctx.db.query(VenueStats.venue_id, VenueStats.positive_count)
+                .filter(VenueStats.venue_id.in_([row[0] for row in rows]))
+                .all()
+            )
+            return VenueCatalog.from_rows(rows, popularity_counts), max_pop
+
+    def record(self, ctx: CandidateContext) -> None:
+        self.timings.record(ctx.timings)
+
+
+venue_pipeline = VenuePipeline(
+    {
+        "nearby": nearby_candidates,
+        "engaged": engaged_candidates,
+        "popular": popular_candidates,
+        "trending": trending_candidates,
+        "friends": friends_favorite_candidates,
+    },
+    budget=settings.reco_candidate_budget,
+)
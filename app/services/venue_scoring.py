@@ -0,0 +1,230 @@
+from dataclasses import dataclass, field
+from typing import Iterable, Sequence
+from uuid import UUID
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Blend weights, mirrored from the scalar heuristic in reco_service
+SPATIAL_WEIGHT = 0.4
+PREFERENCE_WEIGHT = 0.4
+POPULARITY_WEIGHT = 0.2
+SPATIAL_DECAY_PER_KM = 0.3
+
+# Scoring runs in single precision: ~0.6 m of positional resolution is plenty
+# for ranking, and it halves the memory bandwidth of every batched pass.
+SCORE_DTYPE = np.float32
+
+
+@dataclass
+class VenueCatalog:
+    """
+    Column-oriented snapshot of the venue table.
+
+    Every per-venue attribute lives in its own contiguous array, aligned by
+    position, so the whole catalog can be scored with a handful of NumPy ops.
+    Radians and cos(lat) are precomputed once so a distance pass only needs
+    the user's coordinates.
+    """
+
+    ids: list[UUID]
+    names: list[str]
+    lat: np.ndarray
+    lng: np.ndarray
+    category_codes: np.ndarray
+    categories: list[str | None]
+    popularity: np.ndarray
+    _positions: dict[UUID, int] = field(default_factory=dict, repr=False)
+    _lat_rad: np.ndarray = field(init=False, repr=False)
+    _lng_rad: np.ndarray = field(init=False, repr=False)
+    _cos_lat: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._lat_rad = np.radians(self.lat).astype(SCORE_DTYPE)
+        self._lng_rad = np.radians(self.lng).astype(SCORE_DTYPE)
+        self._cos_lat = np.cos(self._lat_rad)
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Sequence],
+        popularity_counts: dict[UUID, int] | None = None,
+    ) -> "VenueCatalog":
+        """Build a catalog from (id, name, lat, lng, category) rows."""
+        popularity_counts = popularity_counts or {}
+        ids: list[UUID] = []
+        names: list[str] = []
+        lats: list[float] = []
+        lngs: list[float] = []
+        codes: list[int] = []
+        category_index: dict[str | None, int] = {}
+
+        for venue_id, name, lat, lng, category in rows:
+            ids.append(venue_id)
+            names.append(name)
+            lats.append(lat)
+            lngs.append(lng)
+            codes.append(category_index.setdefault(category, len(category_index)))
+
+        return cls(
+            ids=ids,
+            names=names,
+            lat=np.asarray(lats, dtype=np.float64),
+            lng=np.asarray(lngs, dtype=np.float64),
+            category_codes=np.asarray(codes, dtype=np.int32),
+            categories=list(category_index),
+            popularity=np.asarray(
+                [popularity_counts.get(venue_id, 0) for venue_id in ids],
+                dtype=SCORE_DTYPE,
+            ),
+            _positions={venue_id: i for i, venue_id in enumerate(ids)},
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def position(self, venue_id: UUID) -> int | None:
+        return self._positions.get(venue_id)
+
+    def scatter(self, values: dict[UUID, float]) -> np.ndarray:
+        """Turn a sparse {venue_id: value} mapping into a dense catalog-aligned array."""
+        dense = np.zeros(len(self.ids), dtype=SCORE_DTYPE)
+        for venue_id, value in values.items():
+            i = self._positions.get(venue_id)
+            if i is not None:
+                dense[i] = value
+        return dense
+
+    def distances_km(self, lat: float, lng: float) -> np.ndarray:
+        """Haversine distance from (lat, lng) to every venue in the catalog."""
+        return _haversine_from_radians(
+            lat, lng, self._lat_rad, self._lng_rad, self._cos_lat
+        )
+
+    def pair_distances_km(
+        self,
+        lats: np.ndarray,
+        lngs: np.ndarray,
+        positions: np.ndarray,
+    ) -> np.ndarray:
+        """Distance from (lats[i], lngs[i]) to the venue at positions[i], for every i."""
+        return _haversine_from_radians(
+            np.asarray(lats, dtype=SCORE_DTYPE),
+            np.asarray(lngs, dtype=SCORE_DTYPE),
+            self._lat_rad[positions],
+            self._lng_rad[positions],
+            self._cos_lat[positions],
+        )
+
+    def distance_matrix_km(self, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+        """(len(lats), len(catalog)) matrix of distances from many points at once."""
+        return _haversine_from_radians(
+            np.asarray(lats, dtype=SCORE_DTYPE)[:, None],
+            np.asarray(lngs, dtype=SCORE_DTYPE)[:, None],
+            self._lat_rad,
+            self._lng_rad,
+            self._cos_lat,
+        )
+
+
+def haversine_km_many(
+    lat: float,
+    lng: float,
+    lats: np.ndarray,
+    lngs: np.ndarray,
+) -> np.ndarray:
+    """Vectorized Haversine distance from one point to many points."""
+    lat_rad = np.radians(np.asarray(lats, dtype=SCORE_DTYPE))
+    lng_rad = np.radians(np.asarray(lngs, dtype=SCORE_DTYPE))
+    return _haversine_from_radians(lat, lng, lat_rad, lng_rad, np.cos(lat_rad))
+
+
+def _haversine_from_radians(
+    lat: float | np.ndarray,
+    lng: float | np.ndarray,
+    lat_rad: np.ndarray,
+    lng_rad: np.ndarray,
+    cos_lat: np.ndarray,
+) -> np.ndarray:
+    # Same formula as the scalar version, written with in-place ops so a
+    # pass over the catalog allocates only two temporaries. `lat`/`lng` may
+    # be (n, 1) columns, which broadcasts into an (n, len(catalog)) matrix.
+    lat1 = np.radians(np.asarray(lat, dtype=SCORE_DTYPE))
+    lng1 = np.radians(np.asarray(lng, dtype=SCORE_DTYPE))
+
+    a = np.sin((lat_rad - lat1) * SCORE_DTYPE(0.5))
+    a *= a
+    b = np.sin((lng_rad - lng1) * SCORE_DTYPE(0.5))
+    b *= b
+    b *= cos_lat
+    b *= np.cos(lat1)
+    a += b
+
+    # 2 * atan2(sqrt(a), sqrt(1 - a)) == 2 * asin(sqrt(a)) for a in [0, 1]
+    np.clip(a, 0.0, 1.0, out=a)
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    a *= SCORE_DTYPE(2 * EARTH_RADIUS_KM)
+    return a
+
+
+def preference_scores(like_counts: np.ndarray, view_times: np.ndarray) -> np.ndarray:
+    """crude normalization: 1 like ~0.5, 300s view ~1.0"""
+    return np.minimum(
+        SCORE_DTYPE(1.0),
+        like_counts * SCORE_DTYPE(0.5) + view_times / SCORE_DTYPE(300.0),
+    )
+
+
+def popularity_scores(popularity: np.ndarray, max_pop: float) -> np.ndarray:
+    """Scale raw popularity counts into 0..1 against the catalog-wide maximum."""
+    if not max_pop:
+        return np.zeros_like(popularity)
+    return popularity / SCORE_DTYPE(max_pop)
+
+
+def blend_scores(
+    dist_km: np.ndarray,
+    preference: np.ndarray,
+    popularity_score: np.ndarray,
+) -> np.ndarray:
+    """Blend spatial, preference and popularity arrays into final scores."""
+    scores = np.exp(dist_km * SCORE_DTYPE(-SPATIAL_DECAY_PER_KM))
+    scores *= SCORE_DTYPE(SPATIAL_WEIGHT)
+    scores += SCORE_DTYPE(PREFERENCE_WEIGHT) * preference
+    scores += SCORE_DTYPE(POPULARITY_WEIGHT) * popularity_score
+    return scores
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the `k` highest scores, best first.
+
+    Uses `argpartition` so only the winners are fully sorted; winners with
+    equal scores stay in catalog order.
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        candidates = np.sort(np.argpartition(-scores, k - 1)[:k])
+    else:
+        candidates = np.arange(n)
+    order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise `top_k` over a (users, venues) score matrix, best first per row."""
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    if k < n:
+        candidates = np.sort(np.argpartition(-scores, k - 1, axis=1)[:, :k], axis=1)
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    winners = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-winners, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
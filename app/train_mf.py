@@ -0,0 +1,27 @@
+# app/train_mf.py
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.mf_engine import MFModel
+
+
+# -------------------------
+# Offline implicit-ALS training for the "mf" venue reco engine
+# -------------------------
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        model = MFModel.train(
+            db,
+            alpha=settings.mf_alpha,
+            factors=settings.mf_factors,
+            reg=settings.mf_regularization,
+            iterations=settings.mf_iterations,
+        )
+    finally:
+        db.close()
+    model.save(settings.mf_model_path)
+    print(
+        f"Trained {len(model.user_ids)} users x {len(model.venue_ids)} venues, "
+        f"saved to {settings.mf_model_path}."
+    )
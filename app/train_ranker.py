@@ -0,0 +1,22 @@
+# app/train_ranker.py
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.learned_ranker import save_ranker, train_ranker
+
+
+# -------------------------
+# Offline training of the learned venue ranker on plan/booking outcomes
+# -------------------------
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        model = train_ranker(
+            db,
+            model=settings.ranker_model,
+            negatives_per_positive=settings.ranker_negatives_per_positive,
+        )
+    finally:
+        db.close()
+    save_ranker(model, settings.ranker_model_path)
+    print(f"Trained {settings.ranker_model} ranker, saved to {settings.ranker_model_path}.")
@@ -3,7 +3,7 @@ Test configuration and fixtures for pytest.
 """
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -17,7 +17,16 @@ from app.models.venue import Venue
 from app.models.interactions import UserVenueInteraction
 from app.models.plan import Plan
 from app.models.social import UserSocialEdge
+from app.models.rollups import UserCategoryAffinity, UserVenueAffinity, VenueStats
+from app.models.precomputed import PrecomputedReco
 from app.models.booking import Booking
+from app.services.reco_cache import reco_cache
+from app.services.category_affinity import category_affinity
+from app.services.learned_ranker import learned_ranker
+from app.services.mf_engine import mf_engine
+from app.services.social_graph import social_graph
+from app.services.venue_index import venue_index
+from app.services.venue_pipeline import trending_venues
 
 
 # Create an in-memory SQLite database for testing
@@ -60,8 +69,33 @@ def client(db_session):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    # In-memory indexes must not outlive the per-test database
+    venue_index.reset()
+    social_graph.reset()
+    category_affinity.reset()
+    trending_venues.reset()
+    reco_cache.clear()
+    mf_engine.set_model(None)
+    learned_ranker.set_model(None)
     
     with TestClient(app) as test_client:
         yield test_client
     
     app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="function")
+def query_counter():
+    """
+    Count SQL statements executed against the test engine.
+    """
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,197 @@
+"""
+Tests for the async users/venues/reco/plans routers on an async engine.
+
+They run against aiosqlite and compare every read with the sync routers
+over the same database file.
+"""
+import asyncio
+import inspect
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.api.aio import plans as async_plans
+from app.api.aio import reco as async_reco
+from app.api.aio import users as async_users
+from app.api.aio import venues as async_venues
+from app.api.deps import get_async_db, get_db
+from app.db.session import Base
+from app.main import include_routers
+from app.services import reco_service
+from app.services.category_affinity import category_affinity
+from app.services.reco_cache import reco_cache
+from app.services.social_graph import social_graph
+from app.services.venue_index import venue_index
+from app.services.venue_pipeline import trending_venues
+from tests.test_reco import create_user, create_venue, interact
+
+
+def assert_same_recos(actual, expected):
+    assert [{k: v for k, v in r.items() if k != "score"} for r in actual] == [
+        {k: v for k, v in r.items() if k != "score"} for r in expected
+    ]
+    assert [r["score"] for r in actual] == pytest.approx([r["score"] for r in expected])
+
+
+@pytest.fixture
+def clients(tmp_path):
+    """(async_client, sync_client): the async and sync routers over one SQLite file."""
+    path = tmp_path / "luna.db"
+    sync_engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=sync_engine)
+    SyncSession = sessionmaker(bind=sync_engine, autoflush=False, autocommit=False)
+    # NullPool: TestClient runs each client's requests on its own event loop
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    AsyncSession = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    def override_get_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    apps = []
+    for async_database in (True, False):
+        app = FastAPI()
+        include_routers(app, async_database)
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        apps.append(app)
+
+    venue_index.reset()
+    social_graph.reset()
+    category_affinity.reset()
+    trending_venues.reset()
+    reco_cache.clear()
+    with TestClient(apps[0]) as async_client, TestClient(apps[1]) as sync_client:
+        yield async_client, sync_client
+    sync_engine.dispose()
+
+
+def test_async_routes_are_coroutines():
+    """Test that the async routers serve everything but bulk/stats endpoints with coroutines."""
+    sync_routes = {"/venues/batch", "/cache/stats", "/pipeline/stats"}
+    for router in (async_users.router, async_venues.router, async_reco.router, async_plans.router):
+        for route in router.routes:
+            assert inspect.iscoroutinefunction(route.endpoint) != (route.path in sync_routes), route.path
+
+
+def test_async_openapi_matches_sync():
+    """Test that switching stacks leaves the API surface unchanged."""
+    schemas = []
+    for async_database in (True, False):
+        app = FastAPI()
+        include_routers(app, async_database)
+        schemas.append(app.openapi())
+    assert schemas[0] == schemas[1]
+
+
+def test_async_stack_serves_the_same_responses(clients):
+    """Test writes through the async routes and compare reads with the sync routes."""
+    async_client, sync_client = clients
+
+    alice = create_user(async_client, "alice")
+    bob = create_user(async_client, "bob", lat=40.74)
+    assert async_client.post("/users/", json={"handle": "alice", "name": "A"}).status_code == 400
+    edge = async_client.post(f"/users/{alice}/edges", json={"other_user_id": bob, "strength": 0.8})
+    assert edge.status_code == 200
+    venue_ids = [create_venue(async_client, f"Venue {i}", lat=40.73 + i * 0.001) for i in range(4)]
+    for venue_id in venue_ids:
+        interact(async_client, bob, venue_id, "like", 60)
+    interact(async_client, alice, venue_ids[0], "view", 120)
+
+    for path in [
+        "/users/",
+        "/users/?limit=1",
+        "/venues/?fields=name,lat",
+        "/venues/?stream=ndjson",
+        f"/reco/venues/{alice}",
+        f"/reco/venues/group?user_ids={alice}&user_ids={bob}",
+        f"/reco/people/{alice}?venue_id={venue_ids[0]}",
+    ]:
+        # Computed by each stack, not served from the other's cached result
+        actual = async_client.get(path)
+        reco_cache.clear()
+        expected = sync_client.get(path)
+        reco_cache.clear()
+        assert actual.status_code == expected.status_code == 200, path
+        if path.startswith("/reco/"):
+            # Decayed preferences move with the clock between the two requests
+            assert_same_recos(actual.json(), expected.json())
+        else:
+            assert actual.content == expected.content, path
+        assert actual.headers.get("X-Next-Cursor") == expected.headers.get("X-Next-Cursor"), path
+    assert async_client.get(f"/reco/venues/{alice}").json()
+
+    etag = async_client.get("/venues/").headers["ETag"]
+    assert async_client.get("/venues/", headers={"If-None-Match": etag}).status_code == 304
+    assert async_client.get("/venues/", params={"cursor": "bogus"}).status_code == 400
+
+
+def test_async_scoring_runs_off_the_event_loop(clients, monkeypatch):
+    """Test that index reloads and scoring run in worker threads, not on the event loop."""
+    async_client, sync_client = clients
+    alice = create_user(async_client, "alice")
+    venue_id = create_venue(async_client, "Bar")
+    interact(async_client, alice, venue_id, "like", 60)
+
+    on_loop = {}
+    load, blend = venue_index.load, reco_service.blend_scores
+
+    def running_loop() -> bool:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    def recording_load(rows):
+        on_loop["load"] = running_loop()
+        return load(rows)
+
+    def recording_blend(*args):
+        on_loop["score"] = running_loop()
+        return blend(*args)
+
+    monkeypatch.setattr(venue_index, "load", recording_load)
+    monkeypatch.setattr(reco_service, "blend_scores", recording_blend)
+    venue_index.reset()
+    reco_cache.clear()
+
+    assert async_client.get(f"/reco/venues/{alice}").json()
+    assert on_loop == {"load": False, "score": False}
+
+
+def test_async_plans(clients):
+    """Test creating, confirming and getting venue recos for a plan via the async routes."""
+    async_client, sync_client = clients
+    organizer = create_user(async_client, "alice")
+    venue_id = create_venue(async_client, "Bar")
+
+    response = async_client.post(
+        "/plans/",
+        json={"organizer_id": organizer, "venue_id": venue_id, "start_time": "2030-01-01T20:00:00"},
+    )
+    assert response.status_code == 200
+    plan_id = response.json()["id"]
+
+    confirmed = async_client.post(f"/plans/{plan_id}/confirm")
+    assert confirmed.status_code == 200
+    assert confirmed.json()["plan_id"] == plan_id
+
+    recos = async_client.get(f"/plans/{plan_id}/venue-recos")
+    assert recos.status_code == 200
+    assert_same_recos(recos.json(), sync_client.get(f"/plans/{plan_id}/venue-recos").json())
+    assert async_client.post(
+        "/plans/00000000-0000-0000-0000-000000000000/confirm"
+    ).status_code == 404
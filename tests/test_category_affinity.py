@@ -0,0 +1,53 @@
+"""
+Tests for the in-memory user x category affinity matrix.
+"""
+from uuid import uuid4
+
+from app.services.category_affinity import CategoryAffinityMatrix
+
+
+def row(user_id, category, like_count, dwell_seconds):
+    return {
+        "user_id": user_id,
+        "category": category,
+        "like_count": like_count,
+        "dwell_seconds": dwell_seconds,
+    }
+
+
+def test_gather_and_incremental_growth():
+    """Test gathers over loaded rows and increments that add users and categories."""
+    a, b, c = uuid4(), uuid4(), uuid4()
+    matrix = CategoryAffinityMatrix(refresh_seconds=60)
+
+    matrix.apply([row(a, "bar", 5, 50)])   # ignored until loaded
+    matrix.load([row(a, "bar", 1, 100), row(b, "cafe", 2, 30)])
+
+    likes, dwell = matrix.gather([a, b, c], "bar")
+    assert likes.tolist() == [1, 0, 0]
+    assert dwell.tolist() == [100, 0, 0]
+
+    matrix.apply([row(a, "bar", 1, 20), row(c, "bar", 3, 0)] + [
+        row(uuid4(), f"cat{i}", 1, 1) for i in range(10)
+    ])
+
+    likes, dwell = matrix.gather([a, b, c], "bar")
+    assert likes.tolist() == [2, 0, 3]
+    assert dwell.tolist() == [120, 0, 0]
+    assert matrix.gather([a], "unknown")[0].tolist() == [0]
+
+
+def test_increments_skipped_after_a_reload():
+    """Test that increments committed before a reload are not counted twice."""
+    a = uuid4()
+    matrix = CategoryAffinityMatrix(refresh_seconds=60)
+    matrix.load([row(a, "bar", 1, 10)])
+    version = matrix.version
+
+    # The writer committed +1 like; a reload read the table after the commit
+    matrix.load([row(a, "bar", 2, 10)])
+    matrix.apply([row(a, "bar", 1, 0)], version)
+    assert matrix.gather([a], "bar")[0].tolist() == [2]
+
+    matrix.apply([row(a, "bar", 1, 0)], matrix.version)
+    assert matrix.gather([a], "bar")[0].tolist() == [3]
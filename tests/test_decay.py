@@ -0,0 +1,98 @@
+"""
+Tests for the exponentially decayed rollup counters.
+"""
+from datetime import datetime, timedelta
+from uuid import UUID
+
+import math
+
+import pytest
+from sqlalchemy import literal, select
+
+from app.models.rollups import UserVenueAffinity, VenueStats
+from app.services.decay import MIN_EXPONENT, current_likes, decay_factor, trending_positive
+from app.services.rollup_service import rebuild_rollups
+from tests.test_reco import create_user, create_venue
+
+HALF_LIFE = timedelta(days=14)
+
+
+def post_events(client, *events):
+    response = client.post(
+        "/interactions/batch",
+        json={
+            "interactions": [
+                {
+                    "user_id": user_id,
+                    "venue_id": venue_id,
+                    "interaction_type": "like",
+                    "created_at": created_at.isoformat(),
+                }
+                for user_id, venue_id, created_at in events
+            ]
+        },
+    )
+    assert response.status_code == 200
+
+
+def decayed_values(db_session, user_id, venue_id):
+    db_session.expire_all()
+    likes = (
+        db_session.query(current_likes())
+        .filter(
+            UserVenueAffinity.user_id == UUID(user_id),
+            UserVenueAffinity.venue_id == UUID(venue_id),
+        )
+        .scalar()
+    )
+    trending = (
+        db_session.query(trending_positive())
+        .filter(VenueStats.venue_id == UUID(venue_id))
+        .scalar()
+    )
+    return likes, trending
+
+
+def test_decayed_counters_merge_out_of_order_and_match_rebuild(client, db_session):
+    """Test O(1) decayed merges, including late events, against a rebuild."""
+    alice = create_user(client, "alice")
+    bar = create_venue(client, "Bar")
+    now = datetime.utcnow()
+
+    post_events(client, (alice, bar, now))
+    # A late-arriving event from two half-lives ago counts a quarter
+    post_events(client, (alice, bar, now - 2 * HALF_LIFE))
+    # Two events in one batch, one of them a half-life old
+    post_events(client, (alice, bar, now), (alice, bar, now - HALF_LIFE))
+
+    expected = 1 + 0.25 + 1 + 0.5
+    assert decayed_values(db_session, alice, bar) == pytest.approx((expected, expected), rel=1e-4)
+    affinity = db_session.get(UserVenueAffinity, (UUID(alice), UUID(bar)))
+    assert affinity.like_count == 4
+
+    rebuild_rollups(db_session)
+
+    assert decayed_values(db_session, alice, bar) == pytest.approx((expected, expected), rel=1e-4)
+
+
+def test_sql_decay_never_underflows(db_session):
+    """Test that the SQL decay exponent is floored, as Postgres raises on exp underflow."""
+    # Counters stamped at the epoch, now
+    factor = db_session.execute(select(decay_factor(literal(1.8e9)))).scalar()
+    assert factor == pytest.approx(math.exp(MIN_EXPONENT))
+    assert db_session.execute(select(decay_factor(literal(0.0)))).scalar() == 1
+
+
+def test_venue_recommendations_prefer_recent_engagement(client):
+    """Test that a recent like outweighs an identical but old one."""
+    alice = create_user(client, "alice")
+    old_bar = create_venue(client, "Old Favorite")
+    new_bar = create_venue(client, "New Favorite")
+    now = datetime.utcnow()
+    post_events(client, (alice, old_bar, now - 8 * HALF_LIFE), (alice, new_bar, now))
+
+    data = client.get(f"/reco/venues/{alice}").json()
+
+    assert [r["venue_id"] for r in data] == [new_bar, old_bar]
+    # Both share distance and (lifetime) popularity: only preference differs
+    assert data[0]["score"] - data[1]["score"] == pytest.approx(0.4 * 0.5 * (1 - 2**-8), rel=1e-3)
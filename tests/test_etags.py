@@ -0,0 +1,135 @@
+"""
+Tests for conditional GETs on the venue catalog and venue recommendations.
+"""
+from uuid import uuid4
+
+import pytest
+
+from app.api import conditional
+from app.core.config import settings
+from app.services.reco_cache import RecoCache
+from tests.test_reco import create_user, create_venue, interact, seed_catalog
+
+
+@pytest.fixture(autouse=True)
+def no_epoch_rollover(monkeypatch):
+    """Keep ETags from rolling over mid-test."""
+    monkeypatch.setattr(settings, "etag_epoch_seconds", 1e9)
+
+
+def test_venue_list_not_modified_without_queries(client, query_counter):
+    """Test that a matching If-None-Match gets a 304 without touching the database."""
+    create_venue(client, "Bar")
+    first = client.get("/venues/")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    query_counter.clear()
+    response = client.get("/venues/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert query_counter == []
+
+
+def test_venue_list_etag_changes_with_catalog(client):
+    """Test that creating a venue invalidates the catalog ETag."""
+    create_venue(client, "Bar")
+    etag = client.get("/venues/").headers["ETag"]
+
+    create_venue(client, "Cafe", category="cafe")
+    response = client.get("/venues/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers["ETag"] != etag
+
+
+def test_reco_not_modified_until_user_writes(client, query_counter):
+    """Test that reco ETags change on the user's interactions and social edges only."""
+    user_id, venue_ids = seed_catalog(client, 3)
+    other_id = create_user(client, "dave")
+    first = client.get(f"/reco/venues/{user_id}")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    query_counter.clear()
+    cached = client.get(f"/reco/venues/{user_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert query_counter == []
+
+    # Someone else's write leaves this user's tag alone
+    interact(client, other_id, venue_ids[0], "like")
+    assert client.get(
+        f"/reco/venues/{user_id}", headers={"If-None-Match": etag}
+    ).status_code == 304
+
+    interact(client, user_id, venue_ids[0], "like")
+    after_interaction = client.get(f"/reco/venues/{user_id}", headers={"If-None-Match": etag})
+    assert after_interaction.status_code == 200
+    assert after_interaction.json()
+    etag = after_interaction.headers["ETag"]
+
+    other_etag = client.get(f"/reco/venues/{other_id}").headers["ETag"]
+    client.post(f"/users/{user_id}/edges", json={"other_user_id": other_id, "strength": 0.9})
+    after_edge = client.get(f"/reco/venues/{user_id}", headers={"If-None-Match": etag})
+    assert after_edge.status_code == 200
+    assert after_edge.headers["ETag"] != etag
+    # The other end of the edge is invalidated too
+    assert client.get(
+        f"/reco/venues/{other_id}", headers={"If-None-Match": other_etag}
+    ).status_code == 200
+
+
+def test_if_none_match_lists_weak_tags_and_other_processes(client, monkeypatch):
+    """Test If-None-Match lists and weak tags, and that another process's tags never match."""
+    create_venue(client, "Bar")
+    etag = client.get("/venues/").headers["ETag"]
+
+    assert client.get(
+        "/venues/", headers={"If-None-Match": f'"stale", W/{etag}'}
+    ).status_code == 304
+    assert client.get("/venues/", headers={"If-None-Match": "*"}).status_code == 304
+
+    monkeypatch.setattr(conditional, "PROCESS_NONCE", "restarted")
+    assert client.get("/venues/", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_user_versions_stay_bounded():
+    """Test that per-user versions use a fixed table and still change on every write."""
+    cache = RecoCache(max_entries=10, max_bytes=1 << 20, ttl_seconds=60, user_version_slots=8)
+    users = [uuid4() for _ in range(1000)]
+    for user_id in users:
+        before = cache.user_version(user_id)
+        cache.invalidate_user(user_id)
+        assert cache.user_version(user_id) > before
+
+    assert len(cache._user_versions) == 8
+    # Clearing entries never moves a version back, so old ETags cannot match again
+    versions = [cache.user_version(user_id) for user_id in users]
+    cache.clear()
+    assert [cache.user_version(user_id) for user_id in users] == versions
+
+
+def test_results_are_stored_unless_their_own_user_or_catalog_changed():
+    """Test that other users' writes mid-compute don't keep a result out of the cache."""
+    cache = RecoCache(max_entries=10, max_bytes=1 << 20, ttl_seconds=60)
+    alice, bob = uuid4(), uuid4()
+
+    def compute_while(write):
+        def compute():
+            write()
+            return ["reco"]
+
+        return compute
+
+    cache.get_or_compute(("a", 1), alice, compute_while(lambda: cache.invalidate_user(bob)))
+    assert cache.snapshot()["entries"] == 1
+
+    cache.get_or_compute(("b", 1), bob, compute_while(cache.bump_catalog_version))
+    assert cache.snapshot()["entries"] == 1
+
+    # Invalidating alice drops her entry, and the result computed across it
+    cache.get_or_compute(("a", 2), alice, compute_while(lambda: cache.invalidate_user(alice)))
+    assert cache.snapshot()["entries"] == 0
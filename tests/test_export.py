@@ -0,0 +1,171 @@
+"""
+Tests for the training-data export.
+"""
+import csv
+import gzip
+import json
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from app.core.config import settings
+from app.models.interactions import UserVenueInteraction
+from app.models.plan import PlanParticipant
+from app.services.export_service import export_tables
+from tests.test_reco import add_edge, create_user, create_venue, interact
+
+
+def read_chunks(files):
+    rows = []
+    for path in files:
+        assert path.endswith(".csv.gz") or path.endswith(".parquet")
+        if path.endswith(".csv.gz"):
+            with gzip.open(path, "rt", newline="") as f:
+                rows.extend(csv.DictReader(f))
+        else:
+            import pyarrow.parquet as pq
+
+            rows.extend(
+                {k: str(v) for k, v in row.items()}
+                for row in pq.read_table(path).to_pylist()
+            )
+    return rows
+
+
+def test_incremental_export_resumes_from_watermark(client, db_session, tmp_path):
+    """Test chunked export files and that a second run only picks up new or updated rows."""
+    alice = create_user(client, "alice")
+    bob = create_user(client, "bob")
+    bar = create_venue(client, "Bar")
+    for dwell in range(5):
+        interact(client, alice, bar, "view", dwell)
+    add_edge(client, alice, bob, 0.7)
+    plan_id = client.post(
+        "/plans/",
+        json={"organizer_id": alice, "venue_id": bar, "start_time": "2030-01-01T20:00:00"},
+    ).json()["id"]
+
+    written = export_tables(db_session, str(tmp_path), chunk_size=2, lag_seconds=0)
+
+    assert len(written["user_venue_interactions"]) == 3
+    assert [r["dwell_time_seconds"] for r in read_chunks(written["user_venue_interactions"])] == [
+        "0", "1", "2", "3", "4"
+    ]
+    assert read_chunks(written["user_social_edges"])[0]["other_user_id"] == bob
+    watermark = json.loads((tmp_path / "watermarks.json").read_text())["user_venue_interactions"]
+    assert datetime.fromisoformat(watermark) <= datetime.utcnow()
+
+    interact(client, bob, bar, "like", 9)
+    participant = db_session.query(PlanParticipant).filter_by(plan_id=UUID(plan_id)).one()
+    participant.status = "declined"
+    db_session.commit()
+    written = export_tables(db_session, str(tmp_path), chunk_size=2, lag_seconds=0)
+
+    assert [r["user_id"] for r in read_chunks(written["user_venue_interactions"])] == [bob]
+    assert written["user_social_edges"] == []
+    # Updated rows are exported again
+    assert [r["status"] for r in read_chunks(written["plan_participants"])] == ["declined"]
+
+
+def test_incremental_export_lags_behind_open_transactions(client, db_session, tmp_path):
+    """Test that a row stamped before a run but committed after it is not skipped."""
+    alice = create_user(client, "alice")
+    bar = create_venue(client, "Bar")
+
+    written = export_tables(db_session, str(tmp_path), lag_seconds=60)
+    assert written["user_venue_interactions"] == []
+
+    # Stamped 30s ago by a transaction that only commits now
+    db_session.add(
+        UserVenueInteraction(
+            user_id=UUID(alice),
+            venue_id=UUID(bar),
+            interaction_type="like",
+            recorded_at=datetime.utcnow() - timedelta(seconds=30),
+        )
+    )
+    db_session.commit()
+    written = export_tables(db_session, str(tmp_path), lag_seconds=0)
+
+    assert [r["interaction_type"] for r in read_chunks(written["user_venue_interactions"])] == ["like"]
+
+
+def test_full_export_keeps_other_tables_watermarks(client, db_session, tmp_path):
+    """Test that a full run of some tables leaves every other table's watermark alone."""
+    alice = create_user(client, "alice")
+    bob = create_user(client, "bob")
+    bar = create_venue(client, "Bar")
+    interact(client, alice, bar, "view", 10)
+    add_edge(client, alice, bob, 0.7)
+    export_tables(db_session, str(tmp_path), lag_seconds=0)
+    before = json.loads((tmp_path / "watermarks.json").read_text())
+
+    export_tables(db_session, str(tmp_path), tables=["plans"], incremental=False, lag_seconds=0)
+    assert json.loads((tmp_path / "watermarks.json").read_text()) == before
+
+    written = export_tables(
+        db_session,
+        str(tmp_path),
+        tables=["user_venue_interactions"],
+        incremental=False,
+        lag_seconds=0,
+    )
+    # The full run re-exports everything and advances only its own watermark
+    assert [r["dwell_time_seconds"] for r in read_chunks(written["user_venue_interactions"])] == ["10"]
+    after = json.loads((tmp_path / "watermarks.json").read_text())
+    assert after["user_venue_interactions"] >= before["user_venue_interactions"]
+    assert {k: v for k, v in after.items() if k != "user_venue_interactions"} == {
+        k: v for k, v in before.items() if k != "user_venue_interactions"
+    }
+    assert export_tables(db_session, str(tmp_path), lag_seconds=0)["user_social_edges"] == []
+
+
+def test_legacy_id_watermarks_resume(client, db_session, tmp_path):
+    """Test that an id watermark from older releases resumes after that id."""
+    alice = create_user(client, "alice")
+    bar = create_venue(client, "Bar")
+    interact(client, alice, bar, "view", 10)
+    interact(client, alice, bar, "like", 20)
+    # Legacy rows carry no write stamp
+    db_session.query(UserVenueInteraction).update({"recorded_at": None})
+    db_session.commit()
+    (tmp_path / "watermarks.json").write_text(json.dumps({"user_venue_interactions": 1}))
+
+    written = export_tables(
+        db_session, str(tmp_path), tables=["user_venue_interactions"], lag_seconds=0
+    )
+
+    assert [r["id"] for r in read_chunks(written["user_venue_interactions"])] == ["2"]
+    watermark = json.loads((tmp_path / "watermarks.json").read_text())["user_venue_interactions"]
+    assert isinstance(watermark, str)
+
+
+def test_export_endpoint_requires_token_and_streams_csv(client, monkeypatch):
+    """Test bearer-token auth and `since` filtering on the export endpoint."""
+    alice = create_user(client, "alice")
+    bar = create_venue(client, "Bar")
+    interact(client, alice, bar, "view", 10)
+
+    assert client.get("/export/user_venue_interactions").status_code == 404
+
+    monkeypatch.setattr(settings, "export_token", "s3cret")
+    monkeypatch.setattr(settings, "export_watermark_lag_seconds", 0)
+    for token in [b"Bearer nope", "Bearer sécret".encode()]:
+        response = client.get("/export/user_venue_interactions", headers={"Authorization": token})
+        assert response.status_code == 401
+
+    response = client.get(
+        "/export/user_venue_interactions", headers={"Authorization": "Bearer s3cret"}
+    )
+    assert [r["interaction_type"] for r in csv.DictReader(response.text.splitlines())] == ["view"]
+    since = response.headers["X-Next-Since"]
+
+    interact(client, alice, bar, "like", 20)
+    response = client.get(
+        "/export/user_venue_interactions",
+        params={"since": since},
+        headers={"Authorization": "Bearer s3cret"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert [(r["id"], r["interaction_type"]) for r in rows] == [("2", "like")]
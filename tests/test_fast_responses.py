@@ -0,0 +1,89 @@
+"""
+Tests for the fast (pre-encoded) response path.
+"""
+import json
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from app.core.config import settings
+from app.core.encoding import dumps
+from app.services.reco_cache import reco_cache
+from tests.test_reco import create_user, seed_catalog
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        0.1 + 0.2,
+        1e-05,
+        -2.5e-9,
+        1e16,
+        1.2345678901234568e17,
+        -0.0,
+        2**53,
+        "Café   \"quoted\" \\ \x01",
+        "looks like ,0.00001",
+        None,
+        [],
+        {},
+    ],
+)
+def test_dumps_matches_default_json_response(value):
+    """Test that dumps renders exactly what Starlette's JSONResponse would."""
+    document = {"value": value, "items": [value, {"nested": value}]}
+    expected = json.dumps(
+        document, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+    assert dumps(document) == expected
+
+
+def test_dumps_encodes_uuid_and_decimal_like_pydantic():
+    """Test UUIDs as strings and Decimals as floats, as the response models produce."""
+    venue_id = uuid4()
+    assert dumps({"id": venue_id, "rating": Decimal("4.5")}) == (
+        f'{{"id":"{venue_id}","rating":4.5}}'.encode()
+    )
+
+
+def test_dumps_rejects_non_finite_floats():
+    """Test that NaN fails loudly, as with the default encoder, instead of becoming null."""
+    with pytest.raises(ValueError):
+        dumps({"score": float("nan")})
+
+
+def test_fast_responses_are_byte_identical(client, monkeypatch):
+    """Test /venues/ and /reco/venues bodies with and without fast responses."""
+    user_id, _ = seed_catalog(client, 5)
+    friend_id = create_user(client, "carol", lat=40.74)
+    client.post(
+        "/venues/",
+        json={"name": "Café Noir", "description": "Ünïcode", "lat": 40.7, "lng": -73.9, "rating": 4.5},
+    )
+    paths = [
+        "/venues/",
+        "/venues/?limit=2",
+        f"/reco/venues/{user_id}",
+        f"/reco/venues/group?user_ids={user_id}&user_ids={friend_id}",
+    ]
+
+    monkeypatch.setattr(settings, "fast_responses", False)
+    standard = [client.get(path) for path in paths]
+    openapi = client.get("/openapi.json").json()
+    reco_cache.clear()
+
+    monkeypatch.setattr(settings, "fast_responses", True)
+    fast = [client.get(path) for path in paths]
+    # Second request is served from the cached, already-encoded body
+    cached = client.get(f"/reco/venues/{user_id}")
+
+    for path, expected, actual in zip(paths, standard, fast):
+        assert actual.status_code == expected.status_code == 200, path
+        assert actual.headers["content-type"] == expected.headers["content-type"], path
+        assert actual.headers.get("X-Next-Cursor") == expected.headers.get("X-Next-Cursor"), path
+        assert actual.content == expected.content, path
+    assert standard[2].json()
+    assert cached.content == standard[2].content
+    assert reco_cache.snapshot()["hits"] == 1
+    assert client.get("/openapi.json").json() == openapi
@@ -0,0 +1,216 @@
+"""
+Tests for the write-behind interaction buffer.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from uuid import UUID
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.models.interactions import UserVenueInteraction
+from app.models.rollups import VenueStats
+from app.services import interaction_buffer as buffer_module
+from app.services.interaction_buffer import BufferFull, InteractionBuffer, interaction_buffer
+from tests.conftest import TestingSessionLocal
+from tests.test_reco import create_user, create_venue
+
+
+def event(user_id, venue_id, interaction_type="like", dwell=0):
+    return {
+        "user_id": UUID(user_id),
+        "venue_id": UUID(venue_id),
+        "interaction_type": interaction_type,
+        "dwell_time_seconds": dwell,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def test_background_flush_and_spool_cleanup(client, db_session, tmp_path):
+    """Test that queued events are committed by the flusher and unspooled."""
+    user_id = create_user(client, "alice")
+    venue_id = create_venue(client, "Bar")
+    spool = tmp_path / "interactions.spool"
+    buffer = InteractionBuffer(
+        max_size=100,
+        batch_size=2,
+        flush_seconds=60,
+        spool_path=str(spool),
+        session_factory=TestingSessionLocal,
+    )
+    buffer.start()
+    try:
+        buffer.submit([event(user_id, venue_id)])
+        # Each process spools to its own file
+        (own_spool,) = tmp_path.iterdir()
+        assert own_spool.name == f"interactions.spool.{os.getpid()}"
+        assert len(own_spool.read_text().splitlines()) == 1
+        # Reaching batch_size wakes the flusher without waiting for the timer
+        buffer.submit([event(user_id, venue_id, "view", 30)])
+        deadline = time.monotonic() + 5
+        while buffer.stats.flushed < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        buffer.stop()
+
+    assert buffer.stats.flushed == 2
+    assert db_session.query(UserVenueInteraction).count() == 2
+    assert not list(tmp_path.iterdir())
+
+
+def test_spooled_events_are_replayed_on_start(client, db_session, tmp_path):
+    """Test that events left in a spool by a crashed process are written on start."""
+    user_id = create_user(client, "alice")
+    venue_id = create_venue(client, "Bar")
+    spool = tmp_path / "interactions.spool"
+    row = {
+        "user_id": user_id,
+        "venue_id": venue_id,
+        "interaction_type": "like",
+        "dwell_time_seconds": 5,
+        "created_at": "2026-01-01T12:00:00",
+    }
+    line = json.dumps(row) + "\n"
+    # A dead process's segment, an unsuffixed spool from an older release
+    # (without event times, and a torn last line), and a live worker's spool
+    (tmp_path / "interactions.spool.999999.1.flushing").write_text(line)
+    legacy = {k: v for k, v in row.items() if k != "created_at"}
+    spool.write_text(json.dumps(legacy) + "\n" + '{"user_id": "torn')
+    live = tmp_path / f"interactions.spool.{os.getppid()}"
+    live.write_text(line)
+
+    buffer = InteractionBuffer(100, 10, 60, str(spool), session_factory=TestingSessionLocal)
+    buffer.start()
+    buffer.stop()
+
+    assert buffer.stats.replayed == 2
+    db_session.expire_all()
+    assert db_session.get(VenueStats, UUID(venue_id)).positive_count == 2
+    assert [path.name for path in tmp_path.iterdir()] == [live.name]
+
+
+def test_spool_fsync_is_a_group_commit_outside_the_queue_lock(tmp_path, monkeypatch):
+    """Test that concurrent submits share fsyncs and keep queueing while one runs."""
+    buffer = InteractionBuffer(1000, 1000, 60, str(tmp_path / "interactions.spool"))
+    buffer.start()
+    fsyncs = []
+    release = threading.Event()
+    fsync = os.fsync
+
+    def slow_fsync(fd):
+        fsyncs.append(fd)
+        # The first fsync blocks until every other submit has been queued
+        if len(fsyncs) == 1:
+            release.wait(5)
+        fsync(fd)
+
+    monkeypatch.setattr(buffer_module.os, "fsync", slow_fsync)
+    row = {
+        "user_id": UUID(int=1),
+        "venue_id": UUID(int=2),
+        "interaction_type": "like",
+        "dwell_time_seconds": 0,
+        "created_at": datetime.utcnow(),
+    }
+    try:
+        threads = [threading.Thread(target=buffer.submit, args=([row],)) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while len(buffer) < 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # All 20 were queued while the first fsync was still running
+        assert len(buffer) == 20
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        # The first fsync covered the writes before it; one more covers the rest
+        assert len(fsyncs) <= 2
+        (spool,) = tmp_path.iterdir()
+        assert len(spool.read_text().splitlines()) == 20
+    finally:
+        monkeypatch.setattr(buffer_module.os, "fsync", fsync)
+        release.set()
+        buffer._queue.clear()
+        buffer.stop()
+
+
+def test_outage_keeps_events_and_retries(client, db_session, tmp_path, monkeypatch):
+    """Test that a database outage keeps the drained events spooled until a retry succeeds."""
+    user_id = create_user(client, "alice")
+    venue_id = create_venue(client, "Bar")
+    spool = tmp_path / "interactions.spool"
+    buffer = InteractionBuffer(3, 10, 60, str(spool), session_factory=TestingSessionLocal)
+    buffer.start()
+    try:
+        buffer.submit([event(user_id, venue_id), event(user_id, venue_id, "view", 30)])
+
+        record_interactions = buffer_module.record_interactions
+
+        def outage(db, rows):
+            raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+        monkeypatch.setattr(buffer_module, "record_interactions", outage)
+        with pytest.raises(OperationalError):
+            buffer.flush()
+        assert buffer.stats.dropped == 0
+        assert buffer.snapshot()["pending"] == 2
+        assert len(list(tmp_path.glob("*.flushing"))) == 1
+        # Pending events still count toward the capacity
+        with pytest.raises(BufferFull):
+            buffer.submit([event(user_id, venue_id)] * 2)
+
+        monkeypatch.setattr(buffer_module, "record_interactions", record_interactions)
+        assert buffer.flush() == 2
+    finally:
+        buffer.stop()
+
+    assert db_session.query(UserVenueInteraction).count() == 2
+    assert not list(tmp_path.iterdir())
+
+
+def test_bad_events_are_dropped_without_losing_the_batch(client, db_session):
+    """Test that one unwritable event does not sink the rest of its batch."""
+    user_id = create_user(client, "alice")
+    venue_id = create_venue(client, "Bar")
+    buffer = InteractionBuffer(100, 10, 60, None, session_factory=TestingSessionLocal)
+    good = event(user_id, venue_id)
+
+    buffer.submit([good, {**good, "interaction_type": None}, good])
+    assert buffer.flush() == 3
+
+    assert buffer.stats.dropped == 1
+    assert db_session.query(UserVenueInteraction).count() == 2
+
+
+def test_write_behind_endpoints_queue_and_apply_backpressure(client, db_session, monkeypatch):
+    """Test that write-behind mode queues events and answers 503 when full."""
+    user_id = create_user(client, "alice")
+    venue_id = create_venue(client, "Bar")
+    monkeypatch.setattr(settings, "interaction_write_behind", True)
+    monkeypatch.setattr(interaction_buffer, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(interaction_buffer, "max_size", 3)
+    payload = {"user_id": user_id, "interaction_type": "like"}
+
+    response = client.post(f"/venues/{venue_id}/interact", json=payload)
+    assert response.status_code == 200
+    response = client.post(
+        "/interactions/batch",
+        json={"interactions": [{**payload, "venue_id": venue_id}] * 2},
+    )
+    assert response.json() == {"inserted": 2, "queued": True}
+    assert db_session.query(UserVenueInteraction).count() == 0
+
+    response = client.post(f"/venues/{venue_id}/interact", json=payload)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    with pytest.raises(BufferFull):
+        interaction_buffer.submit([event(user_id, venue_id)])
+
+    assert interaction_buffer.flush() == 3
+    assert db_session.query(UserVenueInteraction).count() == 3
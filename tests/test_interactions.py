@@ -0,0 +1,128 @@
+"""
+Tests for the bulk interaction ingest endpoint.
+"""
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import event
+
+from app.models.interactions import UserVenueInteraction
+from app.models.rollups import UserCategoryAffinity, UserVenueAffinity, VenueStats
+from app.services.rollup_service import apply_interactions, insert_missing, rebuild_rollups
+from tests.conftest import engine
+from tests.test_reco import create_user, create_venue
+
+
+def test_batch_interactions_insert_events_and_rollups(client, db_session):
+    """Test that a batch across venues stores every event and matches a rebuild."""
+    alice = create_user(client, "alice")
+    bob = create_user(client, "bob")
+    bar = create_venue(client, "Bar")
+    cafe = create_venue(client, "Cafe", category="cafe")
+    events = [
+        {"user_id": alice, "venue_id": bar, "interaction_type": "view", "dwell_time_seconds": 30},
+        {"user_id": alice, "venue_id": bar, "interaction_type": "like", "dwell_time_seconds": 120},
+        {"user_id": bob, "venue_id": bar, "interaction_type": "interest"},
+        {"user_id": bob, "venue_id": cafe, "interaction_type": "view", "dwell_time_seconds": 600},
+    ] * 500
+
+    response = client.post("/interactions/batch", json={"interactions": events})
+
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 2000, "queued": False}
+    assert db_session.query(UserVenueInteraction).count() == 2000
+
+    def rollups():
+        db_session.expire_all()
+        stats = db_session.get(VenueStats, UUID(bar))
+        affinity = db_session.get(UserVenueAffinity, (UUID(bob), UUID(cafe)))
+        category = db_session.get(UserCategoryAffinity, (UUID(alice), "bar"))
+        return (
+            (stats.positive_count, stats.total_dwell_seconds, stats.distinct_users),
+            (affinity.like_count, affinity.dwell_seconds),
+            (category.like_count, category.dwell_seconds),
+        )
+
+    assert rollups() == ((1000, 75_000, 2), (0, 300_000), (500, 75_000))
+    rebuild_rollups(db_session)
+    assert rollups() == ((1000, 75_000, 2), (0, 300_000), (500, 75_000))
+
+
+def test_distinct_users_counted_by_whoever_inserts_the_pair(client, db_session):
+    """Test that a (user, venue) pair counts as new only for the write that created it."""
+    alice = create_user(client, "alice")
+    bob = create_user(client, "bob")
+    bar = create_venue(client, "Bar")
+    pairs = [{"user_id": UUID(alice), "venue_id": UUID(bar), "decayed_at": 0.0}]
+
+    # A concurrent first write that committed in between owns the pair...
+    assert insert_missing(db_session, UserVenueAffinity, ["user_id", "venue_id"], pairs) == {
+        (UUID(alice), UUID(bar))
+    }
+    assert insert_missing(db_session, UserVenueAffinity, ["user_id", "venue_id"], pairs) == set()
+
+    # ...so this write counts only bob as a new distinct user
+    now = datetime.utcnow()
+    apply_interactions(
+        db_session,
+        [
+            {"user_id": UUID(user), "venue_id": UUID(bar), "interaction_type": "like", "created_at": now}
+            for user in (alice, bob)
+        ],
+    )
+    db_session.commit()
+    assert db_session.get(VenueStats, UUID(bar)).distinct_users == 1
+
+
+def test_rollup_rows_are_written_in_key_order(client, db_session):
+    """Test that rollup upserts lock rows in key order, whatever the event order."""
+    users = [UUID(create_user(client, f"user{i}")) for i in range(3)]
+    venues = [UUID(create_venue(client, f"Bar {i}")) for i in range(4)]
+    events = [
+        {"user_id": user_id, "venue_id": venue_id, "interaction_type": "like"}
+        for venue_id in sorted(venues, reverse=True)
+        for user_id in sorted(users, reverse=True)
+    ]
+    written: dict[str, list[list[UUID]]] = {}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO venue_stats") or statement.startswith(
+            "INSERT INTO user_venue_affinity"
+        ):
+            ids = {uuid.hex: uuid for uuid in users + venues}
+            table = statement.split()[2]
+            written.setdefault(table, []).append(
+                [ids[value] for value in parameters if value in ids]
+            )
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        apply_interactions(db_session, events)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert written["venue_stats"] == [sorted(venues)]
+    # Claiming the pairs, then the increments: (user_id, venue_id) order both times
+    pairs = sorted((user_id, venue_id) for user_id in users for venue_id in venues)
+    assert written["user_venue_affinity"] == [[uuid for pair in pairs for uuid in pair]] * 2
+
+
+def test_batch_interactions_reject_unknown_ids(client, db_session):
+    """Test that a batch referencing unknown users or venues is rejected whole."""
+    alice = create_user(client, "alice")
+    bar = create_venue(client, "Bar")
+    missing = "00000000-0000-0000-0000-000000000000"
+
+    response = client.post(
+        "/interactions/batch",
+        json={
+            "interactions": [
+                {"user_id": alice, "venue_id": bar, "interaction_type": "like"},
+                {"user_id": alice, "venue_id": missing, "interaction_type": "like"},
+            ]
+        },
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == {"unknown_user_ids": [], "unknown_venue_ids": [missing]}
+    assert db_session.query(UserVenueInteraction).count() == 0
@@ -0,0 +1,104 @@
+"""
+Tests for the learned venue ranker.
+"""
+from uuid import UUID
+
+import numpy as np
+import pytest
+
+from app.models.plan import PlanParticipant
+from app.services.learned_ranker import (
+    FEATURES,
+    FeatureTables,
+    learned_ranker,
+    save_ranker,
+    serving_features,
+    train_ranker,
+)
+from app.services.precompute_service import precompute_recos
+from app.services.venue_scoring import popularity_scores
+from tests.test_reco import add_edge, create_user, create_venue, interact
+
+
+def create_plan(client, organizer_id, venue_id):
+    response = client.post(
+        "/plans/",
+        json={
+            "organizer_id": organizer_id,
+            "venue_id": venue_id,
+            "start_time": "2030-01-01T20:00:00",
+        },
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def test_bulk_features_match_serving_features(client, db_session):
+    """Test that offline pair features equal the features scored online."""
+    alice = create_user(client, "alice")
+    bob = create_user(client, "bob", lat=40.80)
+    bar = create_venue(client, "Bar", lat=40.75)
+    cafe = create_venue(client, "Cafe", lat=40.70, category="cafe")
+    interact(client, alice, bar, "like", 120)
+    interact(client, bob, bar, "like", 300)
+    interact(client, bob, cafe, "view", 90)
+    add_edge(client, alice, bob, 0.5)
+    # A duplicate, weaker edge counts once, online and offline
+    add_edge(client, alice, bob, 0.3)
+
+    tables = FeatureTables.load(db_session)
+    catalog = tables.catalog
+    row = tables.user_positions[UUID(alice)]
+    cols = np.arange(len(catalog))
+    offline = tables.features(np.full(len(catalog), row), cols)
+
+    dist_km = catalog.distances_km(40.73, -73.93)
+    online = serving_features(
+        db_session,
+        UUID(alice),
+        catalog,
+        dist_km,
+        tables.preference[row].toarray().ravel(),
+        popularity_scores(catalog.popularity, tables.max_pop),
+    )
+
+    assert offline.shape == (2, len(FEATURES))
+    np.testing.assert_allclose(offline, online, rtol=1e-5)
+    # Alice's friend Bob engaged with both venues
+    assert (offline[:, FEATURES.index("social")] > 0).all()
+
+
+def test_learned_ranker_serves_plan_probabilities(client, db_session, tmp_path):
+    """Test training on plan outcomes and ranking candidates by P(plan)."""
+    users = [create_user(client, f"user{i}") for i in range(6)]
+    liked = create_venue(client, "Liked Bar")
+    other = create_venue(client, "Other Bar", lat=40.74)
+    for user_id in users:
+        interact(client, user_id, liked, "like", 300)
+    # Everyone plans at the venue they like; one invitee declines the other
+    for user_id in users:
+        create_plan(client, user_id, liked)
+    plan_id = create_plan(client, users[0], other)
+    db_session.add(PlanParticipant(plan_id=UUID(plan_id), user_id=UUID(users[1]), status="declined"))
+    db_session.commit()
+
+    model = train_ranker(db_session, negatives_per_positive=2)
+    path = tmp_path / "ranker.joblib"
+    save_ranker(model, str(path))
+    learned_ranker.load(str(path))
+    # Heuristic-ranked precomputed recos must not shadow the ranker
+    precompute_recos(db_session, top_k=5, batch_size=10)
+
+    response = client.get(f"/reco/venues/{users[2]}")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["venue_id"] for r in data] == [liked, other]
+    assert all(0.0 <= r["score"] <= 1.0 for r in data)
+    assert client.get("/reco/pipeline/stats").json()["rank"]["count"] >= 1
+
+
+def test_train_ranker_needs_both_outcomes(client, db_session):
+    """Test that training without any negative outcome is rejected."""
+    with pytest.raises(ValueError):
+        train_ranker(db_session, negatives_per_positive=0)
@@ -0,0 +1,75 @@
+"""
+Tests for the plans API endpoints.
+"""
+from uuid import UUID
+
+from app.models.plan import PlanParticipant
+
+
+def test_plan_venue_recommendations(client, db_session):
+    """Test group venue recommendations for a plan's participants."""
+    alice = client.post(
+        "/users/", json={"handle": "alice", "name": "Alice", "home_lat": 40.70, "home_lng": -73.93}
+    ).json()
+    bob = client.post(
+        "/users/", json={"handle": "bob", "name": "Bob", "home_lat": 40.76, "home_lng": -73.93}
+    ).json()
+    carol = client.post(
+        "/users/", json={"handle": "carol", "name": "Carol", "home_lat": 41.70, "home_lng": -73.93}
+    ).json()
+    venue = client.post("/venues/", json={"name": "Bar", "lat": 40.73, "lng": -73.93}).json()
+
+    plan = client.post(
+        "/plans/",
+        json={"organizer_id": alice["id"], "venue_id": venue["id"], "start_time": "2030-01-01T20:00:00"},
+    ).json()
+    db_session.add_all([
+        PlanParticipant(plan_id=UUID(plan["id"]), user_id=UUID(bob["id"]), status="accepted"),
+        PlanParticipant(plan_id=UUID(plan["id"]), user_id=UUID(carol["id"]), status="declined"),
+    ])
+    db_session.commit()
+
+    response = client.get(f"/plans/{plan['id']}/venue-recos")
+
+    assert response.status_code == 200
+
+    data = response.json()
+    assert [r["venue_id"] for r in data] == [venue["id"]]
+    # Carol declined, so her far-away home does not stretch the distance
+    assert data[0]["distance_km"] < 5
+
+
+def test_plan_venue_recommendations_without_declined_organizer(client, db_session):
+    """Test that an organizer who declined their own plan is left out of the group."""
+    alice = client.post(
+        "/users/", json={"handle": "alice", "name": "Alice", "home_lat": 41.70, "home_lng": -73.93}
+    ).json()
+    bob = client.post(
+        "/users/", json={"handle": "bob", "name": "Bob", "home_lat": 40.73, "home_lng": -73.93}
+    ).json()
+    venue = client.post("/venues/", json={"name": "Bar", "lat": 40.73, "lng": -73.93}).json()
+
+    plan = client.post(
+        "/plans/",
+        json={"organizer_id": alice["id"], "venue_id": venue["id"], "start_time": "2030-01-01T20:00:00"},
+    ).json()
+    db_session.query(PlanParticipant).filter(
+        PlanParticipant.plan_id == UUID(plan["id"])
+    ).update({"status": "declined"})
+    db_session.add(
+        PlanParticipant(plan_id=UUID(plan["id"]), user_id=UUID(bob["id"]), status="accepted")
+    )
+    db_session.commit()
+
+    data = client.get(f"/plans/{plan['id']}/venue-recos").json()
+
+    assert [r["venue_id"] for r in data] == [venue["id"]]
+    # Alice's far-away home no longer sets the farthest member's distance
+    assert data[0]["distance_km"] < 1
+
+
+def test_plan_venue_recommendations_unknown_plan(client):
+    """Test that an unknown plan returns 404."""
+    response = client.get("/plans/00000000-0000-0000-0000-000000000000/venue-recos")
+
+    assert response.status_code == 404
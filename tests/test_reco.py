@@ -0,0 +1,382 @@
+"""
+Tests for the recommendation API endpoints.
+"""
+import json
+import math
+
+import pytest
+
+from app.core.config import settings
+from app.models.precomputed import PrecomputedReco, PrecomputeGeneration
+from app.services.precompute_service import precompute_recos
+from app.services.reco_cache import reco_cache
+from app.services.reco_service import batch_chunk_size
+from app.services.venue_pipeline import venue_pipeline
+
+
+def create_user(client, handle, lat=40.73, lng=-73.93):
+    response = client.post(
+        "/users/",
+        json={"handle": handle, "name": handle.title(), "home_lat": lat, "home_lng": lng},
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def create_venue(client, name, lat=40.73, lng=-73.93, category="bar"):
+    response = client.post(
+        "/venues/",
+        json={"name": name, "lat": lat, "lng": lng, "category": category},
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def interact(client, user_id, venue_id, interaction_type="like", dwell=0):
+    response = client.post(
+        f"/venues/{venue_id}/interact",
+        json={
+            "user_id": user_id,
+            "interaction_type": interaction_type,
+            "dwell_time_seconds": dwell,
+        },
+    )
+    assert response.status_code == 200
+
+
+def seed_catalog(client, n_venues, prefix=""):
+    """Create two users plus `n_venues` venues, each with a few interactions."""
+    user_id = create_user(client, f"{prefix}alice")
+    other_id = create_user(client, f"{prefix}bob")
+    venue_ids = []
+    for i in range(n_venues):
+        venue_id = create_venue(client, f"{prefix}Venue {i}", lat=40.73 + i * 0.001)
+        interact(client, other_id, venue_id, "like", 60)
+        interact(client, user_id, venue_id, "view", 30 * i)
+        venue_ids.append(venue_id)
+    return user_id, venue_ids
+
+
+def test_venue_recommendations_unknown_user(client):
+    """Test that an unknown user gets no recommendations."""
+    response = client.get("/reco/venues/00000000-0000-0000-0000-000000000000")
+
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_venue_recommendations_ranking(client):
+    """Test that liked, nearby venues outrank far-away, unliked ones."""
+    user_id = create_user(client, "alice")
+    bob_id = create_user(client, "bob")
+    near_id = create_venue(client, "Near Bar")
+    far_id = create_venue(client, "Far Bar", lat=41.73)
+    interact(client, user_id, near_id, "like", 300)
+    # The far venue is only a candidate through the popularity backfill
+    interact(client, bob_id, far_id, "like", 0)
+
+    response = client.get(f"/reco/venues/{user_id}")
+
+    assert response.status_code == 200
+
+    data = response.json()
+    assert [r["venue_id"] for r in data] == [near_id, far_id]
+    # 0.4 * spatial(1.0) + 0.4 * preference(1.0) + 0.2 * popularity(1.0)
+    assert data[0]["score"] == pytest.approx(1.0)
+    assert data[0]["distance_km"] == pytest.approx(0.0)
+    assert data[1]["distance_km"] > 100
+
+
+def test_venue_recommendations_skip_distant_venues(client):
+    """Test that far-away venues without engagement are not scored."""
+    user_id = create_user(client, "alice")
+    near_id = create_venue(client, "Near Bar")
+    create_venue(client, "Far Bar", lat=41.73)
+
+    response = client.get(f"/reco/venues/{user_id}")
+
+    assert [r["venue_id"] for r in response.json()] == [near_id]
+
+    # Venues created after the index is loaded are picked up incrementally
+    new_id = create_venue(client, "New Bar", lat=40.731)
+
+    response = client.get(f"/reco/venues/{user_id}")
+
+    assert [r["venue_id"] for r in response.json()] == [near_id, new_id]
+
+
+def test_venue_recommendations_limit(client):
+    """Test that the limit parameter caps the number of results."""
+    user_id, _ = seed_catalog(client, 5)
+
+    response = client.get(f"/reco/venues/{user_id}?limit=2")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+
+def test_venue_recommendations_query_count_is_constant(client, query_counter):
+    """Test that scoring does not issue per-venue queries."""
+    counts = []
+    for prefix, n_venues in (("small", 2), ("large", 25)):
+        user_id, _ = seed_catalog(client, n_venues, prefix=prefix)
+        # Warm up in-memory indexes so only per-request queries are counted
+        client.get(f"/reco/venues/{user_id}")
+        reco_cache.clear()
+
+        query_counter.clear()
+        response = client.get(f"/reco/venues/{user_id}?limit=100")
+        assert response.status_code == 200
+        counts.append(len(query_counter))
+
+    assert counts[0] == counts[1]
+
+
+def add_edge(client, user_id, other_user_id, strength):
+    response = client.post(
+        f"/users/{user_id}/edges",
+        json={"other_user_id": other_user_id, "relationship_type": "friend", "strength": strength},
+    )
+    assert response.status_code == 200
+
+
+def test_people_recommendations_no_edges(client):
+    """Test that a user without social edges gets no people recommendations."""
+    user_id = create_user(client, "alice")
+
+    response = client.get(f"/reco/people/{user_id}")
+
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_people_recommendations_scoring(client):
+    """Test the social, direct and same-category preference blend."""
+    user_id = create_user(client, "alice")
+    bob_id = create_user(client, "bob")
+    carol_id = create_user(client, "carol")
+    target_id = create_venue(client, "Target Bar", category="bar")
+    other_bar_id = create_venue(client, "Other Bar", category="bar")
+    cafe_id = create_venue(client, "Cafe", category="cafe")
+
+    add_edge(client, user_id, bob_id, 0.5)
+    add_edge(client, user_id, carol_id, 0.6)
+
+    # Bob: one like on the target (direct + category), 120s at another bar
+    interact(client, bob_id, target_id, "like", 0)
+    interact(client, bob_id, other_bar_id, "view", 120)
+    # Carol only engages with a different category
+    interact(client, carol_id, cafe_id, "like", 600)
+
+    response = client.get(f"/reco/people/{user_id}?venue_id={target_id}")
+
+    assert response.status_code == 200
+
+    scores = {r["user_id"]: r["score"] for r in response.json()}
+    bob_direct = min(1.0, 1 * 0.5)
+    bob_category = min(1.0, 1 * 0.3 + 120 / 600.0)
+    assert scores[bob_id] == pytest.approx(0.6 * 0.5 + 0.25 * bob_direct + 0.15 * bob_category)
+    assert scores[carol_id] == pytest.approx(0.6 * 0.6)
+
+    # Without a venue the ranking falls back to edge strength alone
+    response = client.get(f"/reco/people/{user_id}")
+    assert [r["user_id"] for r in response.json()] == [carol_id, bob_id]
+
+
+def test_people_recommendations_friends_of_friends(client):
+    """Test that 2-hop candidates are ranked on their damped path strength."""
+    user_id = create_user(client, "alice")
+    bob_id = create_user(client, "bob")
+    carol_id = create_user(client, "carol")
+    dave_id = create_user(client, "dave")
+
+    add_edge(client, user_id, bob_id, 0.8)
+    add_edge(client, bob_id, carol_id, 0.5)
+    add_edge(client, bob_id, user_id, 0.9)
+    # Dave is both a direct friend and reachable through Bob
+    add_edge(client, bob_id, dave_id, 0.9)
+    add_edge(client, user_id, dave_id, 0.3)
+
+    response = client.get(f"/reco/people/{user_id}")
+
+    scores = {r["user_id"]: r["score"] for r in response.json()}
+    assert set(scores) == {bob_id, carol_id, dave_id}
+    assert scores[bob_id] == pytest.approx(0.6 * 0.8)
+    assert scores[dave_id] == pytest.approx(0.6 * 0.3)
+    assert scores[carol_id] == pytest.approx(0.6 * 0.8 * 0.5 * 0.5)
+
+
+def test_people_recommendations_query_count_is_constant(client, query_counter):
+    """Test that scoring does not issue per-friend queries."""
+    counts = []
+    for prefix, n_friends in (("small", 1), ("large", 15)):
+        user_id = create_user(client, f"{prefix}alice")
+        venue_id = create_venue(client, f"{prefix}Bar")
+        for i in range(n_friends):
+            friend_id = create_user(client, f"{prefix}friend{i}")
+            add_edge(client, user_id, friend_id, 0.5)
+            interact(client, friend_id, venue_id, "like", 60)
+        # Warm up in-memory indexes so only per-request queries are counted
+        client.get(f"/reco/people/{user_id}?venue_id={venue_id}")
+        reco_cache.clear()
+
+        query_counter.clear()
+        response = client.get(f"/reco/people/{user_id}?venue_id={venue_id}&limit=50")
+        assert response.status_code == 200
+        assert len(response.json()) == n_friends
+        counts.append(len(query_counter))
+
+    assert counts[0] == counts[1]
+
+
+def test_reco_cache_hits_and_invalidation(client, query_counter):
+    """Test that repeated requests are served from cache until a write invalidates them."""
+    user_id = create_user(client, "alice")
+    bob_id = create_user(client, "bob")
+    venue_id = create_venue(client, "Bar")
+
+    first = client.get(f"/reco/venues/{user_id}").json()
+    query_counter.clear()
+    assert client.get(f"/reco/venues/{user_id}").json() == first
+    assert query_counter == []
+
+    # A new interaction drops this user's entries
+    interact(client, user_id, venue_id, "like", 300)
+    assert client.get(f"/reco/venues/{user_id}").json()[0]["score"] > first[0]["score"]
+
+    # A new venue bumps the catalog version
+    create_venue(client, "New Bar")
+    assert len(client.get(f"/reco/venues/{user_id}").json()) == 2
+
+    # A new social edge invalidates people recos
+    assert client.get(f"/reco/people/{user_id}").json() == []
+    response = client.post(f"/users/{user_id}/edges", json={"other_user_id": bob_id, "strength": 0.9})
+    assert response.status_code == 200
+    assert [r["user_id"] for r in client.get(f"/reco/people/{user_id}").json()] == [bob_id]
+
+    stats = client.get("/reco/cache/stats").json()
+    assert stats["hits"] == 1
+    assert stats["invalidations"] >= 2
+    assert stats["catalog_version"] >= 1
+
+
+def test_batch_venue_recommendations_match_single_user(client):
+    """Test that the batch endpoint streams the same top-K as per-user calls."""
+    user_ids, _ = zip(*(seed_catalog(client, 4, prefix=f"u{i}") for i in range(3)))
+    homeless_id = client.post("/users/", json={"handle": "nomad", "name": "Nomad"}).json()["id"]
+    unknown_id = "00000000-0000-0000-0000-000000000000"
+    requested = [*user_ids, homeless_id, unknown_id]
+
+    response = client.post("/reco/venues/batch", json={"user_ids": requested, "limit": 3})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["user_id"] for item in items] == requested
+    for item in items[:3]:
+        single = client.get(f"/reco/venues/{item['user_id']}?limit=3").json()
+        assert [r["venue_id"] for r in item["recos"]] == [r["venue_id"] for r in single]
+        assert [r["score"] for r in item["recos"]] == pytest.approx([r["score"] for r in single])
+    assert items[3]["recos"] == []
+    assert items[4]["recos"] == []
+
+
+def test_precomputed_recos_served_with_live_fallback(client, db_session):
+    """Test that endpoints serve the latest precomputed generation, else score live."""
+    user_id = create_user(client, "alice")
+    bob_id = create_user(client, "bob")
+    venue_id = create_venue(client, "Bar")
+    add_edge(client, user_id, bob_id, 0.7)
+
+    assert precompute_recos(db_session, top_k=5, batch_size=1) == 1
+    assert precompute_recos(db_session, top_k=5, batch_size=1) == 2
+    assert {row.generation for row in db_session.query(PrecomputedReco)} == {2}
+
+    # Catalog changes are not visible until the next generation...
+    new_venue_id = create_venue(client, "New Bar")
+    reco_cache.clear()
+    venues = client.get(f"/reco/venues/{user_id}").json()
+    assert [r["venue_id"] for r in venues] == [venue_id]
+
+    # ...unless the request falls back to live scoring
+    assert len(client.get(f"/reco/venues/{user_id}?limit=100").json()) == 2
+
+    people = client.get(f"/reco/people/{user_id}").json()
+    assert [r["user_id"] for r in people] == [bob_id]
+    assert people[0]["score"] == pytest.approx(0.6 * 0.7)
+
+    # The user's own writes are never hidden behind an older generation
+    interact(client, user_id, new_venue_id, "like", 300)
+    venues = client.get(f"/reco/venues/{user_id}").json()
+    assert venues[0]["venue_id"] == new_venue_id
+    dave_id = create_user(client, "dave")
+    add_edge(client, user_id, dave_id, 0.9)
+    people = client.get(f"/reco/people/{user_id}").json()
+    assert people[0]["user_id"] == dave_id
+
+    # Users missing from the table are scored live
+    carol_id = create_user(client, "carol")
+    assert len(client.get(f"/reco/venues/{carol_id}").json()) == 2
+
+    # A generation claimed by a job still running is never reused
+    db_session.add(PrecomputeGeneration(generation=3))
+    db_session.commit()
+    assert precompute_recos(db_session, top_k=5, batch_size=1) == 4
+
+
+def test_group_venue_recommendations(client):
+    """Test min-max distance and averaged preferences for a group."""
+    alice_id = create_user(client, "alice", lat=40.70)
+    bob_id = create_user(client, "bob", lat=40.76)
+    # Midway between the two homes vs. right next to Alice
+    middle_id = create_venue(client, "Middle Bar", lat=40.73)
+    near_alice_id = create_venue(client, "Alice's Corner", lat=40.70)
+    interact(client, bob_id, middle_id, "view", 150)
+
+    response = client.get(
+        f"/reco/venues/group?user_ids={alice_id}&user_ids={bob_id}&user_ids=00000000-0000-0000-0000-000000000000"
+    )
+
+    assert response.status_code == 200
+
+    data = response.json()
+    assert [r["venue_id"] for r in data] == [middle_id, near_alice_id]
+    # distance_km is the farthest member's trip
+    assert data[0]["distance_km"] == pytest.approx(3.34, abs=0.01)
+    assert data[1]["distance_km"] == pytest.approx(6.67, abs=0.01)
+    # Bob's preference (0.5) is averaged with Alice's (0)
+    spatial = math.exp(-0.3 * data[0]["distance_km"])
+    assert data[0]["score"] == pytest.approx(0.4 * spatial + 0.4 * 0.25, rel=1e-4)
+
+
+def test_venue_recommendations_friends_favorites_and_stage_timings(client, monkeypatch):
+    """Test that friends' favorites are candidates and stage timings are recorded."""
+    user_id = create_user(client, "alice")
+    bob_id = create_user(client, "bob")
+    create_venue(client, "Local Bar")
+    # Far outside the radius, and with the popular generator off only Bob's
+    # like can surface it
+    far_id = create_venue(client, "Bob's Favorite", lat=41.73)
+    interact(client, bob_id, far_id, "like", 0)
+    add_edge(client, user_id, bob_id, 0.8)
+
+    monkeypatch.setitem(venue_pipeline.generators, "popular", lambda ctx, limit: [])
+    response = client.get(f"/reco/venues/{user_id}")
+
+    assert response.status_code == 200
+    assert far_id in [r["venue_id"] for r in response.json()]
+
+    stats = client.get("/reco/pipeline/stats").json()
+    for stage in ("candidates.nearby", "candidates.friends", "candidates.merge", "features", "score"):
+        assert stats[stage]["count"] >= 1
+
+
+def test_batch_chunk_size_follows_catalog_size(monkeypatch):
+    """Test that batch scoring chunks shrink with the catalog to fit the memory budget."""
+    monkeypatch.setattr(settings, "reco_batch_memory_bytes", 32 * 1_000_000)
+    assert batch_chunk_size(1_000) == 1_000
+    assert batch_chunk_size(100_000) == 10
+    # Never below one user, even when a single row is over budget
+    assert batch_chunk_size(10_000_000) == 1
+    assert batch_chunk_size(0) == 1_000_000
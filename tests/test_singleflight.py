@@ -0,0 +1,128 @@
+"""
+Tests for single-flight request coalescing.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.singleflight import AsyncSingleFlight, SingleFlight, SingleFlightTimeout
+
+
+def wait_for_waiters(flight, key, waiters):
+    """Block until `waiters` callers have joined the in-flight call for `key`."""
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        call = flight._calls.get(key)
+        if call is not None and call.waiters >= waiters:
+            return
+        time.sleep(0.001)
+    raise AssertionError("callers never joined the in-flight call")
+
+
+def test_concurrent_calls_share_one_computation():
+    """Test that identical concurrent calls run the function once."""
+    flight = SingleFlight(timeout_seconds=5)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return ["result"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, "key", compute) for _ in range(8)]
+        # Let every caller join the in-flight call before it completes
+        wait_for_waiters(flight, "key", 7)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.in_flight() == 0
+
+
+def test_errors_propagate_to_all_callers():
+    """Test that the leader's exception is raised to every waiting caller."""
+    flight = SingleFlight(timeout_seconds=5)
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flight.do, "key", compute) for _ in range(4)]
+        wait_for_waiters(flight, "key", 3)
+        release.set()
+        for f in futures:
+            with pytest.raises(ValueError, match="boom"):
+                f.result()
+
+    # A failed call is not remembered
+    assert flight.do("key", lambda: "ok") == "ok"
+
+
+def test_followers_time_out():
+    """Test that followers give up after the per-key timeout."""
+    flight = SingleFlight(timeout_seconds=5)
+    release = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(flight.do, "key", lambda: release.wait(5))
+        wait_for_waiters(flight, "key", 0)
+        with pytest.raises(SingleFlightTimeout):
+            flight.do("key", lambda: "unused", timeout=0.01)
+        release.set()
+        assert leader.result() is True
+
+
+def test_async_calls_share_one_computation():
+    """Test that concurrent coroutines on one loop await a single computation."""
+    flight = AsyncSingleFlight(timeout_seconds=5)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["result"]
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", compute) for _ in range(8)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.in_flight() == 0
+
+
+def test_async_errors_and_timeouts():
+    """Test that async followers share the leader's error, or give up without cancelling it."""
+    flight = AsyncSingleFlight(timeout_seconds=5)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        failures = await asyncio.gather(
+            *(flight.do("fail", fail) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(f, ValueError) for f in failures)
+
+        leader = asyncio.ensure_future(flight.do("slow", slow))
+        await asyncio.sleep(0)
+        with pytest.raises(SingleFlightTimeout):
+            await flight.do("slow", slow, timeout=0.001)
+        assert await leader == "done"
+
+    asyncio.run(main())
+    assert flight.in_flight() == 0
@@ -0,0 +1,59 @@
+"""
+Tests for the in-memory CSR social graph.
+"""
+import pytest
+from uuid import uuid4
+
+from app.services.social_graph import SocialGraph
+
+
+def test_load_and_friends():
+    """Test CSR loading, including duplicate edges keeping the strongest one."""
+    a, b, c = uuid4(), uuid4(), uuid4()
+    graph = SocialGraph(refresh_seconds=60)
+
+    graph.load([(a, b, 0.4), (a, c, 0.7), (a, b, 0.6), (b, c, 0.2)])
+
+    assert graph.friends(a) == pytest.approx({b: 0.6, c: 0.7})
+    assert graph.friends(c) == {}
+    assert graph.friends(uuid4()) == {}
+
+
+def test_friends_of_friends_strength_propagation():
+    """Test 2-hop candidates use the strongest path and skip direct friends."""
+    a, b, c, d, e = (uuid4() for _ in range(5))
+    graph = SocialGraph(refresh_seconds=60)
+    graph.load([
+        (a, b, 0.9),
+        (a, c, 0.5),
+        (b, d, 0.5),
+        (c, d, 0.8),
+        (b, c, 1.0),   # c is already a direct friend of a
+        (c, a, 1.0),   # back to a itself
+        (c, e, 0.1),
+    ])
+
+    fof = graph.friends_of_friends(a, limit=10)
+
+    assert fof == pytest.approx({d: 0.45, e: 0.05})
+    assert list(graph.friends_of_friends(a, limit=1)) == [d]
+
+
+@pytest.mark.parametrize("compact_ratio, overlay_edges", [(0.0, 0), (1.0, 4)])
+def test_incremental_edges(compact_ratio, overlay_edges):
+    """Test that edges added after loading are visible with and without compaction."""
+    a, b = uuid4(), uuid4()
+    graph = SocialGraph(refresh_seconds=60, compact_ratio=compact_ratio)
+
+    graph.add_edge(a, b, 0.5)
+    assert graph.friends(a) == {}   # not loaded yet
+
+    graph.load([])
+    new_users = [uuid4() for _ in range(3)]
+    graph.add_edge(a, b, 0.5)
+    for other in new_users:
+        graph.add_edge(b, other, 0.4)
+
+    assert graph.friends(a) == pytest.approx({b: 0.5})
+    assert graph.friends_of_friends(a, limit=10) == pytest.approx({u: 0.2 for u in new_users})
+    assert graph._overlay_edges == overlay_edges
@@ -1,8 +1,12 @@
 """
 Tests for the users API endpoints.
 """
+from uuid import UUID
+
 import pytest
 
+from app.models.social import UserSocialEdge
+
 
 def test_create_user(client):
     """Test creating a new user."""
@@ -104,3 +108,68 @@ def test_list_users(client):
     assert "user1" in handles
     assert "user2" in handles
     assert "user3" in handles
+
+
+def test_list_users_paginated_projection(client):
+    """Test a projected, paginated user listing."""
+    for i in range(3):
+        client.post("/users/", json={"handle": f"user{i}", "name": f"User {i}", "age": 20 + i})
+
+    first = client.get("/users/", params={"limit": 2, "fields": "handle"})
+    assert first.status_code == 200
+    assert [set(user) for user in first.json()] == [{"id", "handle"}] * 2
+
+    second = client.get(
+        "/users/", params={"limit": 2, "fields": "handle", "cursor": first.headers["X-Next-Cursor"]}
+    )
+    assert len(second.json()) == 1
+    assert "X-Next-Cursor" not in second.headers
+    handles = {user["handle"] for user in first.json() + second.json()}
+    assert handles == {"user0", "user1", "user2"}
+
+
+def test_create_social_edge(client):
+    """Test adding a social edge between two users."""
+    alice = client.post("/users/", json={"handle": "alice", "name": "Alice"}).json()
+    bob = client.post("/users/", json={"handle": "bob", "name": "Bob"}).json()
+
+    response = client.post(
+        f"/users/{alice['id']}/edges",
+        json={"other_user_id": bob["id"], "relationship_type": "friend", "strength": 0.8},
+    )
+
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["user_id"] == alice["id"]
+    assert data["other_user_id"] == bob["id"]
+    assert data["strength"] == 0.8
+
+
+def test_create_social_edge_unknown_user(client):
+    """Test that edges to unknown users are rejected."""
+    alice = client.post("/users/", json={"handle": "alice", "name": "Alice"}).json()
+
+    response = client.post(
+        f"/users/{alice['id']}/edges",
+        json={"other_user_id": "00000000-0000-0000-0000-000000000000"},
+    )
+
+    assert response.status_code == 404
+
+
+def test_self_edges_are_rejected_and_never_recommended(client, db_session):
+    """Test that a user can't befriend themselves, nor be recommended to themselves."""
+    alice = client.post("/users/", json={"handle": "alice", "name": "Alice"}).json()["id"]
+    bob = client.post("/users/", json={"handle": "bob", "name": "Bob"}).json()["id"]
+
+    response = client.post(f"/users/{alice}/edges", json={"other_user_id": alice})
+    assert response.status_code == 400
+
+    # A self-edge already in the database is ignored by people recos
+    db_session.add(UserSocialEdge(user_id=UUID(alice), other_user_id=UUID(alice), strength=1.0))
+    db_session.commit()
+    client.post(f"/users/{alice}/edges", json={"other_user_id": bob, "strength": 0.5})
+
+    recos = client.get(f"/reco/people/{alice}").json()
+    assert [r["user_id"] for r in recos] == [bob]
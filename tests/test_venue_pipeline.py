@@ -0,0 +1,107 @@
+"""
+Tests for the venue candidate generation pipeline.
+"""
+from uuid import UUID, uuid4
+
+from app.services.venue_index import VenueIndex, venue_index
+from app.services.venue_pipeline import (
+    CandidateContext,
+    VenuePipeline,
+    friends_favorite_candidates,
+    trending_candidates,
+    trending_venues,
+)
+from tests.test_reco import add_edge, create_user, create_venue, interact
+
+
+def test_candidates_are_interleaved_and_capped_at_budget():
+    """Test that every generator is represented and the union is capped."""
+    index = VenueIndex(cell_deg=0.1, refresh_seconds=60)
+    ids = [uuid4() for _ in range(30)]
+    index.load((venue_id, f"Venue {i}", 40.0, -73.0, "bar") for i, venue_id in enumerate(ids))
+    pipeline = VenuePipeline(
+        {
+            "a": lambda ctx, limit: ids[:20][:limit],
+            "b": lambda ctx, limit: ids[10:30][:limit],
+            "empty": lambda ctx, limit: [],
+        },
+        budget=6,
+    )
+    ctx = CandidateContext(db=None, index=index, lat=40.0, lng=-73.0, user_ids=[], engaged={})
+
+    rows = pipeline.candidates(ctx)
+
+    assert [row[0] for row in rows] == [ids[0], ids[10], ids[1], ids[11], ids[2], ids[12]]
+    assert set(ctx.timings) == {"candidates.a", "candidates.b", "candidates.empty", "candidates.merge"}
+
+
+def test_unindexed_candidates_are_dropped():
+    """Test that venue ids missing from the index are not returned."""
+    index = VenueIndex(cell_deg=0.1, refresh_seconds=60)
+    known = uuid4()
+    index.load([(known, "Known", 40.0, -73.0, "bar")])
+    pipeline = VenuePipeline({"a": lambda ctx, limit: [uuid4(), known]}, budget=10)
+    ctx = CandidateContext(db=None, index=index, lat=40.0, lng=-73.0, user_ids=[], engaged={})
+
+    assert [row[0] for row in pipeline.candidates(ctx)] == [known]
+
+
+def test_nearby_wraps_around_the_antimeridian():
+    """Test that a radius query near ±180° finds venues on the other side."""
+    index = VenueIndex(cell_deg=0.1, refresh_seconds=60)
+    east, west, far = uuid4(), uuid4(), uuid4()
+    index.load([
+        (east, "East", -17.0, 179.97, "bar"),
+        (west, "West", -17.0, -179.97, "bar"),
+        (far, "Far", -17.0, 170.0, "bar"),
+    ])
+
+    assert {row[0] for row in index.nearby(-17.0, 179.99, 10.0)} == {east, west}
+    assert {row[0] for row in index.nearby(-17.0, -179.99, 10.0)} == {east, west}
+    assert len(index.nearby(-17.0, 175.0, 5000.0)) == 3
+
+    # Near the pole the box spans every longitude, each cell visited once
+    polar = VenueIndex(cell_deg=0.1, refresh_seconds=60)
+    polar.load([(uuid4(), f"Polar {lng}", 89.5, lng, "bar") for lng in (-179.97, 0.0, 179.97)])
+    assert len(polar.nearby(89.9, 0.0, 300.0)) == 3
+
+
+def test_friends_favorites_are_ranked_and_limited_in_the_database(client, db_session, query_counter):
+    """Test that friends' likes are weighted by edge strength and only the top come back."""
+    alice = create_user(client, "alice")
+    close, distant = create_user(client, "close"), create_user(client, "distant")
+    add_edge(client, alice, close, 0.9)
+    add_edge(client, alice, distant, 0.1)
+    venues = [create_venue(client, f"Bar {i}") for i in range(4)]
+    interact(client, close, venues[0], "like")
+    for venue_id in venues[1:]:
+        interact(client, distant, venue_id, "like")
+    interact(client, distant, venues[3], "like")
+
+    ctx = CandidateContext(
+        db=db_session, index=venue_index, lat=40.0, lng=-73.0, user_ids=[UUID(alice)], engaged={}
+    )
+    query_counter.clear()
+
+    assert friends_favorite_candidates(ctx, 2) == [UUID(venues[0]), UUID(venues[3])]
+    assert any("LIMIT" in statement for statement in query_counter)
+
+
+def test_trending_is_cached_between_refreshes(client, db_session, query_counter, monkeypatch):
+    """Test that the trending ranking is queried once per refresh interval, not per request."""
+    alice = create_user(client, "alice")
+    bar, cafe = create_venue(client, "Bar"), create_venue(client, "Cafe")
+    interact(client, alice, bar, "like")
+    ctx = CandidateContext(
+        db=db_session, index=venue_index, lat=40.0, lng=-73.0, user_ids=[], engaged={}
+    )
+
+    assert trending_candidates(ctx, 5) == [UUID(bar)]
+    interact(client, alice, cafe, "like")
+    interact(client, alice, cafe, "like")
+    query_counter.clear()
+    assert trending_candidates(ctx, 5) == [UUID(bar)]
+    assert query_counter == []
+
+    monkeypatch.setattr(trending_venues, "refresh_seconds", 0)
+    assert trending_candidates(ctx, 5) == [UUID(cafe), UUID(bar)]
@@ -0,0 +1,64 @@
+"""
+Tests for the vectorized venue scoring engine.
+"""
+import numpy as np
+import pytest
+from uuid import uuid4
+
+from app.services.reco_service import geographic_centroid, haversine_km
+from app.services.venue_scoring import VenueCatalog, haversine_km_many, top_k
+
+
+def test_vectorized_haversine_matches_scalar():
+    """Test the batched distance pass against the scalar Haversine formula."""
+    rng = np.random.default_rng(7)
+    lats = rng.uniform(-60, 60, size=50)
+    lngs = rng.uniform(-180, 180, size=50)
+
+    distances = haversine_km_many(40.73, -73.93, lats, lngs)
+
+    for lat, lng, dist in zip(lats, lngs, distances):
+        assert dist == pytest.approx(haversine_km(40.73, -73.93, lat, lng), rel=1e-4, abs=1e-3)
+
+
+def test_group_centroid_across_the_antimeridian():
+    """Test that a group on both sides of ±180° centers on the antimeridian, not at 0°."""
+    lat, lng = geographic_centroid(np.array([-17.0, -17.2]), np.array([179.9, -179.9]))
+
+    assert lat == pytest.approx(-17.1, abs=1e-3)
+    assert abs(lng) == pytest.approx(180.0, abs=1e-3)
+    assert geographic_centroid(np.array([40.70, 40.76]), np.array([-73.93, -73.93])) == (
+        pytest.approx(40.73, abs=1e-4),
+        pytest.approx(-73.93),
+    )
+
+
+def test_catalog_distances_and_scatter():
+    """Test catalog-aligned arrays built from projected rows."""
+    ids = [uuid4() for _ in range(3)]
+    rows = [
+        (ids[0], "A", 40.73, -73.93, "bar"),
+        (ids[1], "B", 40.74, -73.93, "cafe"),
+        (ids[2], "C", 40.75, -73.93, "bar"),
+    ]
+
+    catalog = VenueCatalog.from_rows(rows, {ids[2]: 4})
+
+    assert len(catalog) == 3
+    assert catalog.categories == ["bar", "cafe"]
+    assert catalog.category_codes.tolist() == [0, 1, 0]
+    assert catalog.popularity.tolist() == [0, 0, 4]
+    assert catalog.scatter({ids[1]: 2.5, uuid4(): 9.0}).tolist() == [0, 2.5, 0]
+    assert catalog.distances_km(40.73, -73.93)[0] == pytest.approx(0.0)
+
+
+def test_top_k_matches_full_sort():
+    """Test that argpartition top-K returns the same winners as a full sort."""
+    rng = np.random.default_rng(11)
+    scores = rng.random(1000).astype(np.float32)
+
+    expected = np.argsort(-scores, kind="stable")[:10]
+
+    assert top_k(scores, 10).tolist() == expected.tolist()
+    assert top_k(scores, 5000).tolist() == np.argsort(-scores, kind="stable").tolist()
+    assert top_k(scores, 0).tolist() == []
@@ -1,6 +1,11 @@
 """
 Tests for the venues API endpoints.
 """
+import json
+from uuid import UUID
+
+from app.models.rollups import UserCategoryAffinity, UserVenueAffinity, VenueStats
+from app.services.rollup_service import rebuild_rollups
 
 
 def test_create_venue(client):
@@ -87,3 +92,112 @@ def test_list_venues(client):
     assert "Venue One" in names
     assert "Venue Two" in names
     assert "Venue Three" in names
+
+
+def test_list_venues_keyset_pages(client):
+    """Test walking the venue listing page by page with the next-page cursor."""
+    created = {
+        client.post("/venues/", json={"name": f"Venue {i}", "lat": 40.7, "lng": -73.9}).json()["id"]
+        for i in range(5)
+    }
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/venues/", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        seen += [venue["id"] for venue in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 5
+    assert set(seen) == created
+
+
+def test_list_venues_field_projection(client, query_counter):
+    """Test that fields= returns and selects only the requested columns plus id."""
+    client.post(
+        "/venues/",
+        json={"name": "Bar", "description": "x" * 1000, "lat": 40.7, "lng": -73.9, "rating": 4.5},
+    )
+    query_counter.clear()
+
+    response = client.get("/venues/", params={"fields": "name,rating"})
+
+    assert response.status_code == 200
+    assert [set(venue) for venue in response.json()] == [{"id", "name", "rating"}]
+    assert response.json()[0]["rating"] == 4.5
+    assert not any("description" in statement for statement in query_counter)
+
+
+def test_list_venues_rejects_bad_page_params(client):
+    """Test that unknown fields, malformed cursors and oversized pages are rejected."""
+    assert client.get("/venues/", params={"fields": "name,secret"}).status_code == 400
+    assert client.get("/venues/", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/venues/", params={"limit": 0}).status_code == 422
+    assert client.get("/venues/", params={"limit": 1_000_000}).status_code == 422
+
+
+def test_list_venues_ndjson_stream(client):
+    """Test that stream=ndjson returns every venue, one JSON object per line."""
+    for i in range(5):
+        client.post(
+            "/venues/",
+            json={"name": f"Venue {i}", "description": "Café", "lat": 40.7, "lng": -73.9, "rating": 4.5},
+        )
+    page = client.get("/venues/", params={"limit": 1000})
+
+    response = client.get("/venues/", params={"stream": "ndjson", "limit": 2})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.content.splitlines()
+    assert len(lines) == 5
+    # Same bytes as the paginated listing renders for each row
+    assert b"[" + b",".join(lines) + b"]" == page.content
+
+    projected = client.get("/venues/", params={"stream": "ndjson", "fields": "name"})
+    assert [json.loads(line) for line in projected.content.splitlines()] == [
+        {"id": venue["id"], "name": venue["name"]} for venue in page.json()
+    ]
+
+
+def test_record_interaction_updates_rollups(client, db_session):
+    """Test that interactions maintain the rollup tables, matching a rebuild."""
+    venue_id = client.post(
+        "/venues/", json={"name": "Bar", "category": "bar", "lat": 40.73, "lng": -73.93}
+    ).json()["id"]
+    alice_id = client.post("/users/", json={"handle": "alice", "name": "Alice"}).json()["id"]
+    bob_id = client.post("/users/", json={"handle": "bob", "name": "Bob"}).json()["id"]
+
+    for user_id, interaction_type, dwell in [
+        (alice_id, "view", 30),
+        (alice_id, "like", 120),
+        (bob_id, "interest", 0),
+    ]:
+        response = client.post(
+            f"/venues/{venue_id}/interact",
+            json={"user_id": user_id, "interaction_type": interaction_type, "dwell_time_seconds": dwell},
+        )
+        assert response.status_code == 200
+
+    stats = db_session.get(VenueStats, UUID(venue_id))
+    assert (stats.positive_count, stats.total_dwell_seconds, stats.distinct_users) == (2, 150, 2)
+    affinity = db_session.get(UserVenueAffinity, (UUID(alice_id), UUID(venue_id)))
+    assert (affinity.like_count, affinity.dwell_seconds) == (1, 150)
+    category = db_session.get(UserCategoryAffinity, (UUID(alice_id), "bar"))
+    assert (category.like_count, category.dwell_seconds) == (1, 150)
+
+    rebuild_rollups(db_session)
+    db_session.expire_all()
+
+    stats = db_session.get(VenueStats, UUID(venue_id))
+    assert (stats.positive_count, stats.total_dwell_seconds, stats.distinct_users) == (2, 150, 2)
+    affinity = db_session.get(UserVenueAffinity, (UUID(alice_id), UUID(venue_id)))
+    assert (affinity.like_count, affinity.dwell_seconds) == (1, 150)
+    category = db_session.get(UserCategoryAffinity, (UUID(alice_id), "bar"))
+    assert (category.like_count, category.dwell_seconds) == (1, 150)